@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+"""
+Generate synthetic redistricting data with the same schema as data/rd/NC, at scale.
+
+The files -- census, election, precinct assignments, precincts, and counties --
+have the same names & columns as the NC files, so the example scripts in
+examples/rd run on them unchanged. Rows are precincts. The census can be made
+narrower or wider: columns for older years are dropped first, and extra ones
+are added for later (made-up) years.
+
+For example:
+
+$ bench/generate.py --rows 100000 --cols 500 --out bench/data/100000x500
+
+"""
+
+import os
+import json
+import argparse as ap
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+CENSUS: str = "2020_census_NC.csv"
+ELECTION: str = "2020_election_NC.csv"
+ASSIGNMENTS: str = "2020_precinct_assignments_NC.csv"
+PRECINCTS: str = "precincts.csv"
+COUNTIES: str = "NC_counties.csv"
+
+STATE_FIPS: str = "37"
+N_COUNTIES: int = 100
+N_DISTRICTS: int = 13
+
+# The census groups, in the order of the NC file: a total & the population by
+# race & ethnicity, for a year & a population (total, voting age, citizen VAP)
+DEMOS: list[str] = ["Tot", "Wh", "His", "BlC", "NatC", "AsnC", "PacC"]
+CENSUS_GROUPS: list[tuple[int, str]] = [
+    (2010, "tot"),
+    (2010, "vap"),
+    (2018, "tot"),
+    (2018, "cvap"),
+    (2019, "tot"),
+    (2019, "cvap"),
+    (2020, "tot"),
+    (2020, "vap"),
+]
+REQUIRED_GROUPS: int = 2  # The 2020 groups the examples use
+POPULATIONS: list[str] = ["tot", "vap", "cvap"]
+
+# The contests in the election file, in order: year & office
+CONTESTS: list[tuple[int, str]] = [
+    (2016, "ltg"),
+    (2016, "sen"),
+    (2016, "gov"),
+    (2016, "ag"),
+    (2016, "pres"),
+    (2014, "sen"),
+    (2020, "ag"),
+    (2020, "gov"),
+    (2020, "ltg"),
+    (2020, "sen"),
+    (2020, "pres"),
+]
+
+# Precinct populations & shares, roughly like NC's
+MEDIAN_POPULATION: float = 3300
+POPULATION_SIGMA: float = 0.6
+DEMO_WEIGHTS: list[float] = [20, 3, 6, 0.5, 1, 0.05]  # Wh, His, BlC, NatC, AsnC, PacC
+VAP_SHARE: float = 0.79
+CVAP_SHARE: float = 0.72
+TURNOUT: float = 0.65
+
+CHUNK_CELLS: int = 5_000_000  # Generate & write this many values at a time
+
+
+def census_columns(n_cols: int) -> list[str]:
+    """The census column names for a file n_cols wide, including GEOID20"""
+
+    min_cols: int = 1 + REQUIRED_GROUPS * len(DEMOS)
+    if n_cols < min_cols:
+        raise ValueError(f"The census needs at least {min_cols} columns.")
+
+    groups: list[tuple[int, str]] = list(CENSUS_GROUPS)
+    n_groups: int = -(-(n_cols - 1) // len(DEMOS))  # Rounded up
+
+    # Narrower: drop the oldest groups. Wider: add groups for later years.
+    groups = groups[max(len(groups) - n_groups, 0) :]
+    k: int = 0
+    while len(groups) < n_groups:
+        groups.append((2021 + k // len(POPULATIONS), POPULATIONS[k % len(POPULATIONS)]))
+        k += 1
+
+    names: list[str] = ["GEOID20"] + [
+        f"{demo}_{year}_{population}" for year, population in groups for demo in DEMOS
+    ]
+
+    # Trim a partial group from the front, to keep the 2020 groups whole
+    return names[:1] + names[len(names) - n_cols + 1 :]
+
+
+def election_columns() -> list[str]:
+    return ["GEOID20"] + [
+        f"{party}_{year}_{office}"
+        for year, office in CONTESTS
+        for party in ["Tot", "D", "R"]
+    ]
+
+
+def geoids(start: int, n: int) -> np.ndarray:
+    """GEOIDs like NC's: state, county, & precinct, all the same width"""
+
+    i: np.ndarray = np.arange(start, start + n)
+    counties: np.ndarray = 2 * (i % N_COUNTIES) + 1  # Odd, like NC's
+    precincts: np.ndarray = i // N_COUNTIES + 1
+
+    return np.char.add(
+        np.char.add(STATE_FIPS, np.char.zfill(counties.astype(str), 3)),
+        np.char.zfill(precincts.astype(str), 6),
+    )
+
+
+def chunks(n_rows: int, n_cols: int) -> Iterator[tuple[int, int]]:
+    size: int = max(1000, CHUNK_CELLS // n_cols)
+    for start in range(0, n_rows, size):
+        yield start, min(size, n_rows - start)
+
+
+def generate(
+    out: str, n_rows: int, n_cols: int, *, districts: int = N_DISTRICTS, seed: int = 0
+) -> None:
+    """Write a synthetic data set to the out directory"""
+
+    os.makedirs(out, exist_ok=True)
+    manifest: str = os.path.join(out, "manifest.json")
+    if os.path.exists(manifest):
+        os.remove(manifest)  # Until the new files are complete
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    census_names: list[str] = census_columns(n_cols)
+    census_groups: list[str] = list(
+        dict.fromkeys(name.split("_", 1)[1] for name in census_names[1:])
+    )  # e.g., "2020_vap", in order
+
+    first: bool = True
+    for start, n in chunks(n_rows, n_cols):
+        ids: np.ndarray = geoids(start, n)
+
+        # People
+        population: np.ndarray = rng.lognormal(
+            np.log(MEDIAN_POPULATION), POPULATION_SIGMA, n
+        )
+        shares: np.ndarray = rng.dirichlet(DEMO_WEIGHTS, n)
+
+        census: dict[str, Any] = {"GEOID20": ids}
+        for group in census_groups:
+            year, population_type = group.split("_")
+            scale: float = dict(tot=1.0, vap=VAP_SHARE, cvap=CVAP_SHARE)[
+                population_type
+            ]
+            growth: float = 1.0 + 0.01 * (int(year) - 2020)
+            noise: np.ndarray = rng.normal(1.0, 0.02, n).clip(0.9, 1.1)
+
+            total: np.ndarray = np.rint(population * scale * growth * noise).astype(
+                np.int64
+            )
+            census[f"Tot_{group}"] = total
+            for demo, share in zip(DEMOS[1:], shares.T):
+                census[f"{demo}_{group}"] = np.rint(total * share).astype(np.int64)
+
+        # Votes
+        lean: np.ndarray = rng.beta(2.2, 2.4, n)
+        vap: np.ndarray = np.rint(population * VAP_SHARE)
+
+        election: dict[str, Any] = {"GEOID20": ids}
+        for year, office in CONTESTS:
+            turnout: np.ndarray = vap * TURNOUT * rng.normal(1.0, 0.1, n).clip(0.5, 1.5)
+            d_share: np.ndarray = (lean + rng.normal(0, 0.02, n)).clip(0.01, 0.99)
+
+            votes: np.ndarray = np.rint(turnout).astype(np.int64)
+            d_votes: np.ndarray = np.rint(votes * 0.98 * d_share).astype(np.int64)
+            election[f"Tot_{year}_{office}"] = votes
+            election[f"D_{year}_{office}"] = d_votes
+            election[f"R_{year}_{office}"] = np.rint(votes * 0.98 - d_votes).astype(
+                np.int64
+            )
+
+        district: np.ndarray = rng.integers(1, districts + 1, n)
+
+        census_df: pd.DataFrame = pd.DataFrame(census)[census_names]
+        election_df: pd.DataFrame = pd.DataFrame(election)[election_columns()]
+        assignments_df: pd.DataFrame = pd.DataFrame(
+            {"GEOID20": ids, "District": district}
+        )
+        precincts_df: pd.DataFrame = precincts(census_df, election_df, district)
+
+        mode: str = "w" if first else "a"
+        for df, name in [
+            (census_df, CENSUS),
+            (election_df, ELECTION),
+            (assignments_df, ASSIGNMENTS),
+            (precincts_df, PRECINCTS),
+        ]:
+            df.to_csv(os.path.join(out, name), mode=mode, header=first, index=False)
+        first = False
+
+    counties_df: pd.DataFrame = pd.DataFrame(
+        {
+            "NAME": [f"County {i + 1}" for i in range(N_COUNTIES)],
+            "FIPS": [f"{2 * i + 1:03d}" for i in range(N_COUNTIES)],
+        }
+    )
+    counties_df.to_csv(os.path.join(out, COUNTIES), index=False, quoting=2)
+
+    with open(manifest, "w") as f:
+        json.dump(dict(rows=n_rows, cols=n_cols, districts=districts, seed=seed), f)
+
+
+def precincts(
+    census: pd.DataFrame, election: pd.DataFrame, district: np.ndarray
+) -> pd.DataFrame:
+    """The precincts file, as examples/rd/precincts.t would make it"""
+
+    df: pd.DataFrame = pd.DataFrame({"GEOID": census["GEOID20"], "District": district})
+    df["Total"] = census["Tot_2020_tot"]
+    df["Total_VAP"] = census["Tot_2020_vap"]
+    for demo, name in zip(
+        DEMOS[1:], ["White", "Hispanic", "Black", "Native", "Asian", "Pacific"]
+    ):
+        df[name] = census[f"{demo}_2020_vap"]
+
+    for party in ["D", "R"]:
+        # Same as the composite() user-defined function
+        ag_gov: pd.Series = (
+            election[f"{party}_2020_ag"] + election[f"{party}_2020_gov"]
+        ) / 2
+        sen: pd.Series = (
+            election[f"{party}_2016_sen"] + election[f"{party}_2020_sen"]
+        ) / 2
+        pres: pd.Series = (
+            election[f"{party}_2016_pres"] + election[f"{party}_2020_pres"]
+        ) / 2
+        df[f"{party}_votes"] = (ag_gov + sen + pres) / 3
+
+    return df
+
+
+def ensure(out: str, n_rows: int, n_cols: int, *, seed: int = 0) -> str:
+    """Generate a data set, unless it has been already"""
+
+    manifest: str = os.path.join(out, "manifest.json")
+    if os.path.exists(manifest):
+        with open(manifest, "r") as f:
+            params: dict[str, Any] = json.load(f)
+        if (params["rows"], params["cols"], params["seed"]) == (n_rows, n_cols, seed):
+            return out
+
+    generate(out, n_rows, n_cols, seed=seed)
+
+    return out
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(description="Generate synthetic redistricting data")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of precincts")
+    parser.add_argument(
+        "--cols", type=int, default=57, help="Number of census columns (NC has 57)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--out", required=True, help="Relative directory for the files")
+
+    args: ap.Namespace = parser.parse_args()
+    generate(args.out, args.rows, args.cols, seed=args.seed)
+
+### END ###
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark T on synthetic redistricting data, at scale.
+
+For each scale -- rows x census columns -- generate a data set (once; they're
+kept in bench/data), then time:
+
+- The example scripts in examples/rd, end to end, and
+- Microbenchmarks of individual verbs: read, join, groupby, derive with a
+  user-defined function, and write. Only the verb is timed, not the commands
+  that set up the stack for it.
+- Microbenchmarks of verbs on wide tables, whose column bookkeeping should
+  take time in proportion to the number of columns: keep (in reverse order)
+  & drop all the census counts, and rename one. As commands, most of their
+  time is recomputing the stats of the new table, so they're also timed as
+  just applying the verb: keep_apply, drop_apply, & rename_apply.
+
+Each benchmark is run several times, and the fastest time is reported. The
+results are written to a JSON file. If there's a baseline -- the results of an
+earlier run -- they're compared to it, and slower benchmarks are flagged as
+regressions (and the exit status is 1).
+
+For example:
+
+$ bench/run.py --preset smoke
+$ bench/run.py --scales 100000x57,100000x2000 --only join,groupby --save-baseline
+$ bench/run.py --scales 100000x57,100000x2000 --only join,groupby
+$ bench/run.py --preset wide --only join,keep,drop,rename
+$ bench/run.py --preset wide --only keep_apply,drop_apply,rename_apply
+
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import subprocess
+import argparse as ap
+from contextlib import redirect_stdout
+from typing import Any, Callable, Optional
+
+from tabulate import tabulate
+
+from T.datamodel import Table
+from T.program import Program
+from T.verbs import Verb, KeepVerb, DropVerb, RenameVerb
+from T.lang import interpret, run_mode
+from T.reader import Reader, ReadState
+from T.memo import clear as clear_memo
+
+from generate import ensure, census_columns
+
+BENCH_DIR: str = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR: str = os.path.dirname(BENCH_DIR)
+
+USER: str = os.path.join(ROOT_DIR, "user", "alec.py")
+SCRIPTS_DIR: str = os.path.join(ROOT_DIR, "examples", "rd", "")
+SCRIPTS: list[str] = [
+    "census.t",
+    "elections.t",
+    "precincts.t",
+    "districts.t",
+    "misc.t",
+    "geographic_seats.t",
+]
+
+# The commands that set up the stack, & the commands that are timed
+# {columns} is the census columns, in reverse order, & {column} the last one
+MICROBENCHMARKS: dict[str, tuple[list[str], list[str]]] = {
+    "read": ([], ["from(2020_census_NC.csv)"]),
+    "join": (
+        ["from(2020_precinct_assignments_NC.csv)", "from(2020_census_NC.csv)"],
+        ["join()"],
+    ),
+    "groupby": (["from(precincts.csv)"], ["groupby(by=[District])"]),
+    "derive_udf": (
+        ["from(2020_election_NC.csv)"],
+        [
+            "derive(D_votes, composite(D_2020_ag, D_2020_gov, D_2016_sen, D_2020_sen, D_2016_pres, D_2020_pres))"
+        ],
+    ),
+    "write": (["from(2020_census_NC.csv)"], ["write(bench_write.csv)"]),
+    "keep": (["from(2020_census_NC.csv)"], ["keep({columns})"]),
+    "drop": (["from(2020_census_NC.csv)"], ["drop({columns})"]),
+    "rename": (["from(2020_census_NC.csv)"], ["rename(({column}, Renamed))"]),
+}
+
+# The commands that set up the stack, & the verbs applied to the top table
+# Given the census columns, in reverse order. The stats aren't recomputed.
+VERB_BENCHMARKS: dict[str, tuple[list[str], Callable[[Table, list[str]], Verb]]] = {
+    "keep_apply": (["from(2020_census_NC.csv)"], lambda t, c: KeepVerb(t, c[:-1])),
+    "drop_apply": (["from(2020_census_NC.csv)"], lambda t, c: DropVerb(t, c[:-1])),
+    "rename_apply": (
+        ["from(2020_census_NC.csv)"],
+        lambda t, c: RenameVerb(t, [(c[0], "Renamed")]),
+    ),
+}
+
+# Scales, as rows x census columns
+PRESETS: dict[str, list[str]] = {
+    "smoke": ["10000x57"],
+    # Double the columns, & the time of the verbs on them should just double
+    "wide": ["10000x250", "10000x500", "10000x1000", "10000x2000"],
+    "default": ["10000x50", "10000x57", "100000x57", "100000x500", "1000000x57"],
+    "full": [
+        "10000x50",
+        "10000x57",
+        "100000x57",
+        "100000x500",
+        "100000x2000",
+        "1000000x57",
+        "1000000x500",
+        "10000000x57",
+    ],
+}
+
+RESULTS_VERSION: int = 1
+TOLERANCE: float = 0.10  # Slower than the baseline by more than this is a regression
+MIN_DELTA: float = 0.02  # Seconds; smaller differences are noise
+
+
+### RUNNING BENCHMARKS ###
+
+
+def time_repeats(run: Callable[[], float], repeats: int) -> list[float]:
+    return [run() for _ in range(repeats)]
+
+
+def time_script(script: str, data: str, output: str) -> float:
+    clear_memo()  # Time scripts from scratch, not their memoized results
+
+    env: Program = Program(
+        user=USER, src=SCRIPTS_DIR, data=data, output=output, repl=False, silent=True
+    )
+
+    out: io.StringIO = io.StringIO()
+    start: float = time.perf_counter()
+    with redirect_stdout(out):
+        exit: bool
+        exit, _ = run_mode(script, env)
+    seconds: float = time.perf_counter() - start
+
+    check(out.getvalue(), script)
+    if exit:
+        raise Exception(f"Script {script} failed.")
+
+    return seconds
+
+
+def time_commands(setup: list[str], timed: list[str], data: str, output: str) -> float:
+    env: Program = Program(user=USER, data=data, output=output, repl=False, silent=True)
+
+    out: io.StringIO = io.StringIO()
+    with redirect_stdout(out):
+        run_commands(setup, env)
+
+        start: float = time.perf_counter()
+        run_commands(timed, env)
+        seconds: float = time.perf_counter() - start
+
+    check(out.getvalue(), "; ".join(setup + timed))
+
+    return seconds
+
+
+def time_verb(
+    setup: list[str],
+    make: Callable[[Table, list[str]], Verb],
+    n_cols: int,
+    data: str,
+) -> float:
+    env: Program = Program(user=USER, data=data, repl=False, silent=True)
+
+    out: io.StringIO = io.StringIO()
+    with redirect_stdout(out):
+        run_commands(setup, env)
+    check(out.getvalue(), "; ".join(setup))
+
+    verb: Verb = make(env.table_stack.first(), census_columns(n_cols)[::-1])
+
+    start: float = time.perf_counter()
+    verb.apply()
+
+    return time.perf_counter() - start
+
+
+def run_commands(commands: list[str], env: Program) -> None:
+    r: Reader = Reader()
+    for line in commands:
+        if r.next(line) != ReadState.COMMANDS:
+            raise Exception(f"Incomplete command: {line}")
+
+        for command in r.commands:
+            if interpret(command, env) == "_error_":
+                raise Exception(f"Command failed: {command}")
+
+
+def run_benchmarks(
+    scales: list[str], only: Optional[list[str]], repeats: int, data_dir: str
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = list()
+
+    for scale in scales:
+        n_rows: int
+        n_cols: int
+        n_rows, n_cols = parse_scale(scale)
+
+        print(f"Generating {scale} ...", file=sys.stderr)
+        data: str = os.path.join(
+            ensure(os.path.join(data_dir, scale), n_rows, n_cols), ""
+        )
+        output: str = os.path.join(data, "output", "")
+        os.makedirs(output, exist_ok=True)
+
+        benchmarks: list[tuple[str, Callable[[], float]]] = (
+            [
+                (f"script:{script}", lambda s=script: time_script(s, data, output))
+                for script in SCRIPTS
+            ]
+            + [
+                (
+                    name,
+                    lambda s=setup, t=timed: time_commands(
+                        s, fill_columns(t, n_cols), data, output
+                    ),
+                )
+                for name, (setup, timed) in MICROBENCHMARKS.items()
+            ]
+            + [
+                (name, lambda s=setup, m=make: time_verb(s, m, n_cols, data))
+                for name, (setup, make) in VERB_BENCHMARKS.items()
+            ]
+        )
+
+        for name, run in benchmarks:
+            if only and not any(name == o or name == f"script:{o}" for o in only):
+                continue
+
+            print(f"  {name} ...", file=sys.stderr)
+            times: list[float] = time_repeats(run, repeats)
+            results.append(
+                dict(
+                    benchmark=name,
+                    scale=scale,
+                    rows=n_rows,
+                    cols=n_cols,
+                    seconds=round(min(times), 6),
+                    times=[round(t, 6) for t in times],
+                )
+            )
+
+    return results
+
+
+### COMPARING RESULTS ###
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float
+) -> tuple[str, int]:
+    """Compare results to a baseline. Return a report & the number of regressions."""
+
+    before: dict[tuple[str, str], float] = {
+        (r["benchmark"], r["scale"]): r["seconds"] for r in baseline
+    }
+
+    rows: list[list[str]] = list()
+    n_regressions: int = 0
+    for r in results:
+        seconds: float = r["seconds"]
+        was: Optional[float] = before.get((r["benchmark"], r["scale"]))
+
+        change: str = ""
+        flag: str = ""
+        if was is not None:
+            change = f"{(seconds - was) / was:+.1%}" if was > 0 else ""
+            if seconds > was * (1 + tolerance) and seconds - was > MIN_DELTA:
+                flag = "REGRESSION"
+                n_regressions += 1
+            elif seconds < was * (1 - tolerance) and was - seconds > MIN_DELTA:
+                flag = "faster"
+
+        rows.append(
+            [
+                r["benchmark"],
+                r["scale"],
+                f"{seconds:.3f}",
+                f"{was:.3f}" if was is not None else "",
+                change,
+                flag,
+            ]
+        )
+
+    report: str = tabulate(
+        rows,
+        headers=["BENCHMARK", "SCALE", "SECONDS", "BASELINE", "CHANGE", ""],
+        disable_numparse=True,
+    )
+
+    return report, n_regressions
+
+
+### HELPERS ###
+
+
+def check(out: str, what: str) -> None:
+    """Commands report errors by printing them. Don't time commands that failed."""
+
+    errors: list[str] = [line for line in out.splitlines() if "Exception" in line]
+    if errors:
+        raise Exception(f"{what}: {errors[0]}")
+
+
+def fill_columns(commands: list[str], n_cols: int) -> list[str]:
+    """Fill in the census columns of a data set in commands"""
+
+    names: list[str] = census_columns(n_cols)[::-1]
+
+    return [
+        c.replace("{columns}", ", ".join(names[:-1])).replace("{column}", names[0])
+        for c in commands
+    ]
+
+
+def parse_scale(scale: str) -> tuple[int, int]:
+    rows, cols = scale.lower().split("x")
+
+    return int(rows), int(cols)
+
+
+def environment() -> dict[str, Any]:
+    import numpy as np
+    import pandas as pd
+
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return dict(
+        python=platform.python_version(),
+        pandas=pd.__version__,
+        numpy=np.__version__,
+        platform=platform.platform(),
+        processor=platform.processor() or platform.machine(),
+        commit=commit,
+    )
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(description="Benchmark T on synthetic data")
+    parser.add_argument(
+        "--preset",
+        choices=list(PRESETS.keys()),
+        default="default",
+        help="A set of scales to run",
+    )
+    parser.add_argument(
+        "--scales",
+        help="Comma-separated scales to run instead, as rows x columns, e.g., 100000x500",
+    )
+    parser.add_argument(
+        "--only",
+        help="Comma-separated benchmarks to run, e.g., districts.t,join (default: all)",
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of each benchmark")
+    parser.add_argument(
+        "--data",
+        default=os.path.join(BENCH_DIR, "data"),
+        help="Directory for the generated data sets",
+    )
+    parser.add_argument(
+        "--out",
+        default=os.path.join(BENCH_DIR, "results.json"),
+        help="Path for the results",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=os.path.join(BENCH_DIR, "baseline.json"),
+        help="Path to the results to compare to",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="Fraction slower than the baseline that's a regression",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        dest="save_baseline",
+        action="store_true",
+        help="Save the results as the baseline, too",
+    )
+
+    args: ap.Namespace = parser.parse_args()
+    scales: list[str] = args.scales.split(",") if args.scales else PRESETS[args.preset]
+    only: Optional[list[str]] = args.only.split(",") if args.only else None
+
+    results: list[dict[str, Any]] = run_benchmarks(
+        scales, only, args.repeats, args.data
+    )
+    doc: dict[str, Any] = dict(
+        version=RESULTS_VERSION,
+        created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        environment=environment(),
+        repeats=args.repeats,
+        results=results,
+    )
+
+    with open(args.out, "w") as f:
+        json.dump(doc, f, indent=2)
+
+    baseline: list[dict[str, Any]] = list()
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+
+    report: str
+    n_regressions: int
+    report, n_regressions = compare(results, baseline, args.tolerance)
+
+    print()
+    print(report)
+    print()
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif n_regressions > 0:
+        print(f"{n_regressions} regression(s) vs. {args.baseline}")
+        raise SystemExit(1)
+
+### END ###
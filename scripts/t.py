@@ -17,7 +17,8 @@ $ scripts/T.py -h
 import json
 import argparse as ap
 
-from T import run_script, run_repl
+# NOTE - T is imported after parsing the args, and then only what's needed,
+# so 'T -h' & clients of a server start fast.
 
 
 parser = ap.ArgumentParser(description="Start the T language processor")
@@ -34,11 +35,118 @@ parser.add_argument("-a", "--scriptargs", type=str)
 parser.add_argument(
     "-v", "--verbose", dest="verbose", action="store_true", help="Verbose mode"
 )
+parser.add_argument(
+    "--lazy",
+    dest="lazy",
+    action="store_true",
+    help="Defer & optimize commands until their results are observed",
+)
+parser.add_argument(
+    "--explain",
+    dest="explain",
+    action="store_true",
+    help="Print the plan for running the script, with estimates, instead of running it",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    dest="jobs",
+    type=int,
+    default=1,
+    help="Number of processes for running independent reads & scripts concurrently",
+)
+parser.add_argument(
+    "--batch",
+    dest="batch",
+    help="Relative path to a JSON manifest of script args to run the script with, one job each",
+)
+parser.add_argument(
+    "--cache",
+    dest="cache",
+    help="Relative directory in which to cache the results of scripts across runs",
+)
+parser.add_argument(
+    "--trace",
+    dest="trace",
+    help="Relative path to a JSON file in which to record a trace of the commands run",
+)
+parser.add_argument(
+    "--memory",
+    dest="memory",
+    help="Relative path to a CSV file in which to log the memory each command uses",
+)
+parser.add_argument(
+    "--stack-budget",
+    dest="stack_budget",
+    help="Memory budget for the tables on the stack, e.g., 2GB; lower tables are spilled to disk",
+)
+parser.add_argument(
+    "--scratch",
+    dest="scratch",
+    help="Relative directory for tables spilled to disk (default: a temporary directory)",
+)
+parser.add_argument(
+    "--result-cache",
+    dest="result_cache",
+    help="Memory cap for the results of commands cached in the REPL, e.g., 2GB (default: 1GB; 0 to turn it off)",
+)
+parser.add_argument(
+    "--preview",
+    dest="preview",
+    type=int,
+    help="In the REPL, read just this many rows of each file & run commands on them, until write() or materialize()",
+)
+parser.add_argument(
+    "--preview-sample",
+    dest="preview_sample",
+    action="store_true",
+    help="Preview a random sample of rows, instead of the first ones",
+)
+parser.add_argument(
+    "--checkpoint",
+    dest="checkpoint",
+    help="Relative path to a file in which to save the script's progress, to resume it if it fails (its tables are saved in <path>.tables)",
+)
+parser.add_argument(
+    "--timeout",
+    dest="timeout",
+    type=float,
+    help="Cancel a command that runs for more than this many seconds. Cancelling is cooperative: reads, writes, tallies & scripts stop promptly; other commands stop when their pandas operation finishes",
+)
+parser.add_argument(
+    "--serve",
+    dest="serve",
+    help="Path to a Unix socket on which to serve requests to run scripts",
+)
+parser.add_argument(
+    "--connect",
+    dest="connect",
+    help="Path to the Unix socket of a server to run the script",
+)
 
 args: ap.Namespace = parser.parse_args()
 scriptargs: dict = json.loads(args.scriptargs) if (args.scriptargs) else dict()
 
-if args.file:
+if args.serve:
+    from T import serve
+
+    serve(
+        args.serve,
+        user=args.user,
+        src=args.source,
+        data=args.data,
+        output=args.output,
+        cache=args.cache,
+    )
+elif args.connect:
+    from T import connect
+
+    ok: bool = connect(args.connect, args.file, scriptargs, lazy=args.lazy)
+    if not ok:
+        raise SystemExit(1)
+elif args.file:
+    from T import run_script
+
     run_script(
         user=args.user,
         file=args.file,
@@ -48,8 +156,21 @@ if args.file:
         log=args.logfile,
         verbose=args.verbose,
         scriptargs=scriptargs,
+        lazy=args.lazy,
+        explain=args.explain,
+        cache=args.cache,
+        jobs=args.jobs,
+        batch=args.batch,
+        trace=args.trace,
+        memory=args.memory,
+        stack_budget=args.stack_budget,
+        scratch=args.scratch,
+        checkpoint=args.checkpoint,
+        timeout=args.timeout,
     )
 else:
+    from T import run_repl
+
     run_repl(
         user=args.user,
         src=args.source,
@@ -58,6 +179,15 @@ else:
         log=args.logfile,
         verbose=args.verbose,
         scriptargs=scriptargs,
+        cache=args.cache,
+        trace=args.trace,
+        memory=args.memory,
+        stack_budget=args.stack_budget,
+        scratch=args.scratch,
+        result_cache=args.result_cache,
+        preview=args.preview,
+        preview_sample=args.preview_sample,
+        timeout=args.timeout,
     )
 
 ### END ###
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+"""
+Summarize a trace of a 'T' script by verb.
+
+For example:
+
+$ scripts/t.py -u user/alec.py -s examples/rd -d data/rd/NC -f census.t --trace temp/census.json
+$ scripts/trace_report.py temp/census.json
+
+"""
+
+import argparse as ap
+
+from T.trace import report
+
+
+parser = ap.ArgumentParser(description="Summarize a T trace by verb")
+parser.add_argument("trace", help="Relative path to a trace, written with --trace")
+
+args: ap.Namespace = parser.parse_args()
+
+print(report(args.trace))
+
+### END ###
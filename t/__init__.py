@@ -1,23 +1,139 @@
 # t/__init__.py
 
-from .commands import *
-from .constants import *
-from .datamodel import *
-from .excel import *
-from .expressions import *
-from .lang import *
-from .program import *
-from .reader import *
-from .readwrite import *
-from .run import *
-from .stack import *
-from .udf import *
-from .utils import *
-from .verbs import *
+"""
+T loads its modules -- and pandas, etc. -- on first use, not on import.
+
+The entry points (run_script, run_repl, serve, connect), the names in _EXPORTS,
+& the submodules are imported when they're referenced. For other names, import
+them from their modules, e.g., from T.readwrite import read_distinct_rows.
+
+The imports under TYPE_CHECKING are never run, but they let type checkers --
+and tools that scan for import statements, like PyInstaller -- find the
+modules that are otherwise loaded with importlib. (run & serve are imported
+by name, below.)
+"""
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from . import (
+        commands,
+        constants,
+        datamodel,
+        excel,
+        expressions,
+        lang,
+        program,
+        reader,
+        readwrite,
+        stack,
+        udf,
+        utils,
+        verbs,
+    )
 
 name: str = "T"
 
 
 ### Limit what is re-exported ###
 
-__all__: list[str] = ["run_script", "run_repl"]
+__all__: list[str] = ["run_script", "run_repl", "serve", "connect"]
+
+
+# The modules that used to be star-imported here
+_MODULES: list[str] = [
+    "commands",
+    "constants",
+    "datamodel",
+    "excel",
+    "expressions",
+    "lang",
+    "program",
+    "reader",
+    "readwrite",
+    "run",
+    "serve",
+    "stack",
+    "udf",
+    "utils",
+    "verbs",
+]
+
+# Other names that are still exported, & their modules
+_EXPORTS: dict[str, str] = {
+    "Namespace": "commands",
+    "Command": "commands",
+    "CITIES_DF": "constants",
+    "PRODUCTS_DF": "constants",
+    "Column": "datamodel",
+    "Table": "datamodel",
+    "read_table": "datamodel",
+    "read_tables": "datamodel",
+    "table_to_csv": "datamodel",
+    "table_to_json": "datamodel",
+    "interpret": "lang",
+    "read_script": "lang",
+    "run_mode": "lang",
+    "repl_mode": "lang",
+    "Program": "program",
+    "Tables": "program",
+    "Reader": "reader",
+    "ReadState": "reader",
+    "FileSpec": "readwrite",
+    "DelimitedFileReader": "readwrite",
+    "run_batch": "run",
+    "Stack": "stack",
+    "UDF": "udf",
+    "Verb": "verbs",
+    "KeepVerb": "verbs",
+    "DropVerb": "verbs",
+    "RenameVerb": "verbs",
+    "AliasVerb": "verbs",
+    "SelectVerb": "verbs",
+    "FirstVerb": "verbs",
+    "LastVerb": "verbs",
+    "SampleVerb": "verbs",
+    "CastVerb": "verbs",
+    "DeriveVerb": "verbs",
+    "SortVerb": "verbs",
+    "DistinctVerb": "verbs",
+    "TopVerb": "verbs",
+    "GroupByVerb": "verbs",
+    "TallyVerb": "verbs",
+    "JoinVerb": "verbs",
+    "UnionVerb": "verbs",
+}
+
+
+def __getattr__(name: str) -> Any:
+    match name:
+        case "run_script":
+            from .run import run_script
+
+            return run_script
+        case "run_repl":
+            from .run import run_repl
+
+            return run_repl
+        case "serve":
+            from .serve import serve
+
+            return serve
+        case "connect":
+            from .serve import connect
+
+            return connect
+
+    import importlib
+
+    if name in _MODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    if name in _EXPORTS:
+        module: Any = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+### END ###
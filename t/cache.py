@@ -0,0 +1,107 @@
+# cache.py
+#!/usr/bin/env python3
+
+"""
+CACHE - Cache the results of commands in the REPL
+
+In the REPL, it's common to pop a result and re-issue the same command -- or
+the commands before it -- with small tweaks. Then the unchanged commands
+recompute the same results from the same tables. Instead, cache the results
+of commands, and push the cached result when the same command is run again on
+the same tables.
+
+Results are keyed by the lineage of the tables a command uses -- how they were
+made -- and the command itself:
+
+- A table read from a file descends from the file: its path, size, & modification
+  time, and how it was read.
+- A table a command makes descends from the command -- its verb & arguments, the
+  columns the commands after it use, and the user-defined functions -- and the
+  tables it used.
+
+So a result is only reused when it would be recomputed exactly. Tables on the
+stack aren't modified, so cached results are pushed as is, with their stats.
+
+The cache is least-recently-used, within a memory cap.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .utils import format_bytes
+
+CACHE_VERSION: int = 1  # Bump when how results are computed changes
+CACHE_BYTES: int = 1024**3  # The default memory cap
+
+
+class ResultCache:
+    """Least-recently-used command results, within a memory cap"""
+
+    max_bytes: int
+    n_bytes: int
+    hits: int
+    misses: int
+    _entries: OrderedDict[str, tuple[Any, int]]  # key -> table & its bytes
+
+    def __init__(self, max_bytes: int = CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, key: str) -> Optional[Any]:
+        entry: Optional[tuple[Any, int]] = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)  # Most recently used
+        self.hits += 1
+
+        return entry[0]
+
+    def store(self, key: str, table: Any) -> None:
+        n_bytes: int = table.n_bytes()
+        if n_bytes > self.max_bytes:
+            return  # It would evict everything else
+
+        if key in self._entries:
+            self.n_bytes -= self._entries.pop(key)[1]
+
+        self._entries[key] = (table, n_bytes)
+        self.n_bytes += n_bytes
+
+        while self.n_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.n_bytes -= evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.n_bytes = 0
+
+    def summary(self) -> str:
+        return (
+            f"Cache: {len(self._entries)} result(s), {format_bytes(self.n_bytes)} "
+            f"of {format_bytes(self.max_bytes)}; {self.hits} hit(s), {self.misses} miss(es)"
+        )
+
+
+### HELPERS ###
+
+
+def lineage(parts: list[Any], inputs: list[Any]) -> Optional[str]:
+    """The lineage of a table made from others, or None if theirs aren't all known"""
+
+    if any(table.lineage is None for table in inputs):
+        return None
+
+    return digest([CACHE_VERSION] + parts + [table.lineage for table in inputs])
+
+
+def digest(parts: list[Any]) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+### END ###
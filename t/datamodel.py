@@ -6,23 +6,52 @@ The T data model for 2D tables with rows & columns, implemented over Pandas.
 """
 
 import pandas as pd
+import numpy as np
 from typing import Any, Literal, Optional
 from collections import namedtuple
 import re
 import copy
 from csv import DictWriter
 import json
-
-from .readwrite import DelimitedFileReader, FileSpec, smart_open
-
-from .expressions import rewrite_expr
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .readwrite import (
+    DelimitedFileReader,
+    FileSpec,
+    smart_open,
+    compact_columns,
+    encode_key,
+    decode_key,
+    KEY_DIGITS,
+    sparsify_columns,
+    densify,
+)
+
+from .expressions import rewrite_expr, rewrite_key_literals, mark_slices, isslice
 from .utils import map_keys
 from .udf import UDF
+from .spill import SpilledData, SpillStats
+from .progress import REPORT_ROWS, Cancelled, report
 
 ### PANDAS DATA TYPES ###
 
 # https://pandas.pydata.org/pandas-docs/stable/user_guide/basics.html#dtypes
 
+# Compact types -- e.g., from(..., compact=auto) -- hold the same values in less memory
+PD_INT_TYPES: list[str] = [
+    "int64",
+    "int32",
+    "int16",
+    "int8",
+    "uint64",
+    "uint32",
+    "uint16",
+    "uint8",
+]
+PD_FLOAT_TYPES: list[str] = ["float64", "float32"]
+PD_NUMERIC_TYPES: list[str] = PD_INT_TYPES + PD_FLOAT_TYPES
+
 PD_TYPES: list[str] = [
     "object",
     "string",
@@ -32,13 +61,27 @@ PD_TYPES: list[str] = [
     "datetime64",
     "timedelta64",
     "category",
-]
+] + [t for t in PD_NUMERIC_TYPES if t not in ["int64", "float64"]]
+# Plus T's own: compact numeric types, fixed-width strings of digits stored as integers,
+# & sparse storage for mostly-zero columns
+CAST_TYPES: list[str] = PD_TYPES + ["compact", "key", "sparse"]
+
+
+def dtype_name(dtype: Any) -> str:
+    """The name of a column's type, however it's stored, e.g., Sparse[int64, 0] is int64"""
+
+    if isinstance(dtype, pd.SparseDtype):
+        return dtype.subtype.name
+
+    return dtype.name
+
 
-PD_GROUP_ABLE_TYPES: list[str] = ["int64", "float64", "datetime64", "timedelta64"]
+PD_GROUP_ABLE_TYPES: list[str] = PD_NUMERIC_TYPES + ["datetime64", "timedelta64"]
+PD_SUM_ABLE_TYPES: list[str] = PD_NUMERIC_TYPES
 
 # The stats Pandas df.describe() returns for inspect()
 PD_DESCRIBE_FNS: list[str] = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
-PD_DESCRIBE_TYPES: list[str] = ["int64", "float64", "datetime64", "timedelta64"]
+PD_DESCRIBE_TYPES: list[str] = PD_NUMERIC_TYPES + ["datetime64", "timedelta64"]
 
 # Pandas agg functions for groupby()
 # More - https://pandas.pydata.org/pandas-docs/stable/reference/groupby.html#computations-descriptive-stats
@@ -48,11 +91,15 @@ PD_AGG_FNS: list[str] = ["sum", "count", "mean", "std", "min", "max", "median"]
 class Column:
     """Column definitions are meta data for managing aliases & data types"""
 
+    # Wide tables have thousands of these
+    __slots__ = ("name", "alias", "type", "default", "format", "width")
+
     name: str
     alias: str
     type: str
     default: Optional[Any]
     format: str
+    width: Optional[int]  # of the strings a "key" column encodes
 
     def __init__(self, name: str, dtype: str) -> None:
         """Create a new column definition
@@ -66,11 +113,12 @@ class Column:
         self.type = dtype
         self.default = None
         self.format = ""
+        self.width = None
 
     def copy(self) -> "Column":
-        """Return a copy of the column"""
+        """Return a copy of the column. Its fields aren't modified in place, so it's shallow."""
 
-        return copy.deepcopy(self)
+        return copy.copy(self)
 
     def set_default(self, default: Any) -> None:
         self.default = default
@@ -123,9 +171,11 @@ class Table:
       across modifications (verbs).
     """
 
-    _cols: list[Column]
-    _data: pd.DataFrame
+    _catalog: dict[str, Column]  # the columns by name, in order
+    _df: Optional[pd.DataFrame]  # None, if spilled
+    _spilled: Optional[SpilledData]
     stats: Optional[dict[Any, dict[Any, Any]]]
+    lineage: Optional[str]  # how it was made, for caching results, if known
 
     command: str  # for debugging
 
@@ -138,22 +188,111 @@ class Table:
         self._data = pd.DataFrame({})
 
         self.stats = None
+        self.lineage = None
         self.command = "Unknown"
 
+    @property
+    def _cols(self) -> list[Column]:
+        """The table's columns, in order. Assign a list to replace them all."""
+
+        return list(self._catalog.values())
+
+    @_cols.setter
+    def _cols(self, cols: list[Column]) -> None:
+        self._catalog = {c.name: c for c in cols}
+
+    def _add_column(self, col: Column) -> None:
+        self._catalog[col.name] = col
+
+    @property
+    def _data(self) -> pd.DataFrame:
+        """The table's data, reloaded if it was spilled to disk"""
+
+        if self._df is None:
+            assert self._spilled is not None
+            self._df = self._spilled.load(self.command)
+            self._spilled = None
+
+        return self._df
+
+    @_data.setter
+    def _data(self, df: pd.DataFrame) -> None:
+        self._df = df
+        self._spilled = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Copy & pickle spilled tables with their data, leaving them spilled"""
+
+        state: dict[str, Any] = self.__dict__.copy()
+        if self._spilled is not None:
+            state["_df"] = self._spilled.load(self.command)
+            state["_spilled"] = None
+
+        return state
+
+    def spill(self, dir: str, n_bytes: int, stats: SpillStats) -> None:
+        """Save the table's data to a scratch directory & free it, until it's used again"""
+
+        assert self._df is not None
+        self._spilled = SpilledData(self._df, dir, n_bytes, stats, self.command)
+        self._df = None
+
+    def isspilled(self) -> bool:
+        return self._df is None
+
+    def unspill(self) -> None:
+        """Reload the table's data, if it was spilled"""
+
+        self._data
+
     def read(
         self,
         rel_path: str,
         *,
         delimiter: str = "comma",
         header: bool = True,
+        distinct: bool = False,
+        on: Optional[list[str]] = None,
+        keep: str = "first",
+        nrows: Optional[int] = None,
+        sample: bool = False,
+        categorize: bool | list[str] = False,
+        compact: bool | list[str] = False,
+        keys: bool | list[str] = False,
+        sparse: bool | list[str] = False,
     ) -> None:
-        """Read a table from a delimited file (e.g., CSV."""
+        """Read a table from a delimited file (e.g., CSV.
+
+        Optionally, drop duplicate rows while reading, as do_distinct() does.
+        Or read just the first nrows rows -- or a random sample of them -- to preview it.
+        Or dictionary-encode string columns with few distinct values, as categories.
+        Or downcast numeric columns to the smallest types that hold their values.
+        Or store fixed-width strings of digits, e.g., GEOIDs, as integer keys.
+        Or store mostly-zero numeric columns sparsely.
+        """
 
-        self._data = DelimitedFileReader(
-            rel_path, header=header, delimiter=delimiter
-        ).read()
+        reader: DelimitedFileReader = DelimitedFileReader(
+            rel_path,
+            header=header,
+            delimiter=delimiter,
+            distinct=distinct,
+            on=on,
+            keep=keep,
+            nrows=nrows,
+            sample=sample,
+            categorize=categorize,
+            compact=compact,
+            keys=keys,
+            sparse=sparse,
+        )
+        self._data = reader.read()
         self._extract_col_defs()
 
+        for col in self._cols:
+            if col.name in reader.key_widths:
+                col.type = "key"
+                col.width = reader.key_widths[col.name]
+
     def copy(self) -> "Table":
         """Return a copy of the table"""
 
@@ -173,7 +312,7 @@ class Table:
         """Extract column metadata from the DataFrame"""
 
         names: list[str] = list(self._data.columns)
-        dtypes: list[str] = [x.name for x in self._data.dtypes]
+        dtypes: list[str] = [dtype_name(x) for x in self._data.dtypes]
         self._cols = [Column(name, dtype) for name, dtype in zip(names, dtypes)]
 
     def _calc_stats(self) -> None:
@@ -197,13 +336,17 @@ class Table:
         'sum' and 'median' are added to these stats.
         """
 
-        stats_df: pd.DataFrame = self._data.describe().transpose()
+        # Keys are stored as integers, but they're strings
+        df: pd.DataFrame = self._densified(
+            self._data.drop(columns=list(self.key_widths()))
+        )
+        stats_df: pd.DataFrame = df.describe().transpose()
         self.stats = stats_df.to_dict(orient="index")
 
         # Add sum and median to the 'describe' stats
         names: list[str] = [x.name for x in self._cols if x.type in PD_DESCRIBE_TYPES]
         more: dict = (
-            self._data[names].agg(["sum", "median"], axis="index").to_dict()
+            df[names].agg(["sum", "median"], axis="index").to_dict()
             if names
             else dict()
         )
@@ -215,13 +358,28 @@ class Table:
 
     @property
     def n_cols(self) -> int:
-        if len(self._cols) != self._data.shape[1]:
+        if len(self._catalog) != self._shape()[1]:
             raise ValueError("Number of columns doesn't match DataFrame")
-        return len(self._cols)
+        return len(self._catalog)
 
     @property
     def n_rows(self) -> int:
-        return self._data.shape[0]
+        return self._shape()[0]
+
+    def _shape(self) -> tuple[int, int]:
+        # Don't reload spilled tables just for their shape
+        return self._spilled.shape if self._spilled is not None else self._data.shape
+
+    def n_bytes(self, deep: bool = True) -> int:
+        """The memory the table's data uses. With deep, include the contents of strings, etc.
+
+        Spilled tables don't use any, until they're reloaded.
+        """
+
+        if self._spilled is not None:
+            return 0
+
+        return int(self._data.memory_usage(index=True, deep=deep).sum())
 
     def cols(self) -> list[Column]:
         return self._cols
@@ -231,15 +389,17 @@ class Table:
 
         # When did I need to flatten the row?!?
         # return self._data.loc[n, :].values.flatten().tolist()
-        return list(self._data.loc[n, :].values)
+        return list(
+            self._densified(self._decoded(self._data.loc[[n], :])).iloc[0].values
+        )
 
     def first_n_rows(self, n: int) -> list:
         """Return the first n rows as a list of lists of values."""
 
-        return self._data.head(n).values.tolist()
+        return self._densified(self._decoded(self._data.head(n))).values.tolist()
 
     def col_names(self) -> list[str]:
-        return [c.name for c in self._cols]
+        return list(self._catalog)
 
     def has_aliases(self) -> bool:
         for c in self._cols:
@@ -257,13 +417,131 @@ class Table:
     def col_types(self) -> list[str]:
         return [c.type for c in self._cols]
 
+    def value_type(self, name: str) -> str:
+        """The type of a column's values, however they're stored
+
+        Category columns have the type of their categories, compact numeric
+        columns the 64-bit type, and key columns are strings.
+        """
+
+        col: Column = self.get_column(name)
+        if col.type == "key":
+            return "string"
+        if col.type in PD_INT_TYPES:
+            return "int64"
+        if col.type in PD_FLOAT_TYPES:
+            return "float64"
+        if col.type != "category":
+            return col.type
+
+        categories: pd.Index = self._data[col.name].cat.categories
+
+        return "string" if categories.dtype.name == "object" else categories.dtype.name
+
+    def key_widths(self) -> dict[str, int]:
+        """The key columns & the widths of the strings they encode"""
+
+        return {c.name: c.width for c in self._cols if c.type == "key" and c.width}
+
+    def _decoded(
+        self, df: pd.DataFrame, names: Optional[list[str]] = None
+    ) -> pd.DataFrame:
+        """Rows of the table with its key columns -- or just these -- decoded into strings"""
+
+        named: Optional[set[str]] = set(names) if names is not None else None
+        widths: dict[str, int] = {
+            k: w for k, w in self.key_widths().items() if named is None or k in named
+        }
+        if not widths:
+            return df
+
+        # A shallow copy, so just the decoded columns are copied
+        df = df.copy(deep=False)
+        for name, width in widths.items():
+            df[name] = decode_key(df[name], width)
+
+        return df
+
+    def _densified(
+        self, df: pd.DataFrame, names: Optional[list[str]] = None
+    ) -> pd.DataFrame:
+        """Rows of the table with its sparse columns -- or just these -- stored densely"""
+
+        named: Optional[set[str]] = set(names) if names is not None else None
+        sparse: list[str] = [
+            name
+            for name in df.columns
+            if isinstance(df[name].dtype, pd.SparseDtype)
+            and (named is None or name in named)
+        ]
+        if not sparse:
+            return df
+
+        # A shallow copy, so just the densified columns are copied
+        df = df.copy(deep=False)
+        for name in sparse:
+            df[name] = densify(df[name])
+
+        return df
+
+    def _widened(self, expr: str) -> pd.DataFrame:
+        """The data, with the compact numeric columns an expression uses widened to 64 bits
+
+        Pandas does arithmetic in the type of its operands, so e.g. the difference
+        of two uint16 columns would wrap around instead of going negative.
+        And it can't evaluate expressions of sparse columns, so they're densified.
+        Category columns are decoded into their values, e.g., so strings can be
+        concatenated to them.
+        """
+
+        referenced: list[Column] = [
+            c for c in self._cols if re.search(rf"\b{re.escape(c.name)}\b", expr)
+        ]
+
+        df: pd.DataFrame = self._widened_cols(
+            [c.name for c in referenced if c.type in PD_NUMERIC_TYPES]
+        )
+
+        decode: dict[str, str] = {
+            c.name: self.value_type(c.name) for c in referenced if c.type == "category"
+        }
+        if not decode:
+            return df
+
+        # A shallow copy, so just the decoded columns are copied
+        if df is self._data:
+            df = self._data.copy(deep=False)
+        for name, t in decode.items():
+            df[name] = df[name].astype(t)
+
+        return df
+
+    def _widened_cols(self, names: list[str]) -> pd.DataFrame:
+        """The data, with these columns widened to 64 bits, if they're compact, & densified, if they're sparse"""
+
+        df: pd.DataFrame = self._densified(self._data, names)
+
+        widen: dict[str, str] = {
+            name: self.value_type(name)
+            for name in names
+            if self.get_column(name).type in PD_NUMERIC_TYPES
+            and self.get_column(name).type != self.value_type(name)
+        }
+        if not widen:
+            return df
+
+        # A shallow copy, so just the widened columns are copied
+        if df is self._data:
+            df = self._data.copy(deep=False)
+        for name, t in widen.items():
+            df[name] = df[name].astype(t)
+
+        return df
+
     def has_column(self, name: str) -> bool:
         """Does the table have a column called <name>? (soft fail)"""
 
-        if name in self.col_names():
-            return True
-        else:
-            return False
+        return name in self._catalog
 
     def iscolumn(self, name: str) -> bool:
         """Does the table have a column called <name>? (hard fail)"""
@@ -274,11 +552,11 @@ class Table:
             raise Exception("Column {0} not in table.".format(name))
 
     def get_column(self, name: str) -> Column:
-        for col in self._cols:
-            if col.name == name:
-                return col
+        col: Optional[Column] = self._catalog.get(name)
+        if col is None:
+            raise Exception("Column {0} not in table.".format(name))
 
-        raise Exception("Column {0} not in table.".format(name))
+        return col
 
     def are_cols(self, names: list[str]) -> bool:
         if len(names) < 1:
@@ -296,7 +574,7 @@ class Table:
         if not name.isidentifier():
             return False
 
-        if name in self.col_names():
+        if name in self._catalog:
             return False
 
         return True
@@ -314,6 +592,9 @@ class Table:
     def group_able_col_names(self) -> list[str]:
         return [c.name for c in self._cols if c.type in PD_GROUP_ABLE_TYPES]
 
+    def sum_able_col_names(self) -> list[str]:
+        return [c.name for c in self._cols if c.type in PD_SUM_ABLE_TYPES]
+
     ### WRAPPERS ENCAPSULATING PANDAS DATAFRAME METHODS ###
     ### Validate column references before calling them. ###
 
@@ -334,6 +615,7 @@ class Table:
         for col in self._cols:
             if col.name in renames:
                 col.set_name(renames[col.name])
+        self._cols = self._cols  # Re-index them by their new names
 
     def do_alias_cols(self, aliases: dict[str, str]) -> None:
         """Alias columns in the table"""
@@ -352,9 +634,18 @@ class Table:
         Validate the expression & columns referenced in it before calling this.
 
         NOTE - This expression hasn't had aggregate column references replaced like 'DERIVE'.
+
+        Key columns are compared to string literals as integers. Keys used any other way
+        are decoded into strings first.
         """
 
-        self._data = self._data.query(expr)
+        decode: list[str]
+        expr, decode = rewrite_key_literals(expr, self.key_widths())
+
+        df: pd.DataFrame = self._decoded(self._widened(expr), decode)
+        self._data = (
+            self._data.query(expr) if df is self._data else self._data[df.eval(expr)]
+        )
 
     def do_first(self, n: int = 5) -> None:
         """Select the first n rows of the table"""
@@ -368,6 +659,17 @@ class Table:
         self._data = self._data.tail(n)
         self._data = self._data.reset_index(drop=True)
 
+    def do_distinct(self, on_list: Optional[list[str]] = None, keep="first") -> None:
+        """Drop duplicate rows, keeping the first (or last) of each set of duplicates
+
+        Rows are duplicates if they have the same values in the 'on' columns,
+        or in all columns by default. The columns are unchanged.
+        """
+
+        duplicates: pd.Series = self._data.duplicated(subset=on_list, keep=keep)
+        self._data = self._data[~duplicates]
+        self._data = self._data.reset_index(drop=True)
+
     def do_sample(self, n: int = 5) -> None:
         """Sample n rows of the table"""
 
@@ -375,25 +677,72 @@ class Table:
         self._data = self._data.reset_index(drop=True)
 
     def do_cast_cols(self, names: list[str], dtype: str) -> None:
-        """Cast the specified columns to the given data type"""
+        """Cast the specified columns to the given data type
 
-        col_names: list[str] = self.col_names()
-        col_types: list[str] = self.col_types()
+        The 'compact' type downcasts numeric columns to the smallest types that hold their values.
+        The 'key' type stores fixed-width strings of digits, e.g., GEOIDs, as integers.
+        The 'sparse' type stores just the values of numeric columns that aren't zero.
+        """
 
-        cast_types: dict[str, str] = dict(zip(col_names, col_types))
-        for col in names:
-            cast_types[col] = dtype
+        if dtype == "sparse":
+            # Keys can't be sparse, so decode them to say so
+            self._data = sparsify_columns(
+                self._decoded(self._data, names).copy(deep=False), names
+            )
+
+            return  # The types of the values are the same
+
+        # Keys are cast from the strings they encode, & sparse columns densely
+        self._data = self._densified(self._decoded(self._data, names), names)
+
+        if dtype == "compact":
+            self._data = compact_columns(self._data.copy(deep=False), names)
+            for name in names:
+                self.get_column(name).type = dtype_name(self._data[name].dtype)
+
+            return
+
+        if dtype == "key":
+            df: pd.DataFrame = self._data.copy(deep=False)
+            widths: dict[str, int] = dict()
+            for name in names:
+                encoded: Optional[pd.Series] = encode_key(df[name])
+                if encoded is None:
+                    raise Exception(
+                        f"{name} isn't a fixed-width string of at most {KEY_DIGITS} digits."
+                    )
+                widths[name] = len(str(df[name].iloc[0]))
+                df[name] = encoded
+            self._data = df
+        else:
+            self._data = self._data.astype(
+                {name: dtype for name in names}, errors="raise"
+            )
+            widths = dict()
 
-        self._data = self._data.astype(cast_types, errors="raise")
         # Update the new column types in the table's column metadata.
-        for col in self._cols:
-            if col.name in names:
-                col.type = dtype
+        for name in names:
+            col: Column = self.get_column(name)
+            col.type = dtype
+            col.width = widths.get(name)
 
     def do_derive(
         self, name: str, tokens: list[str], udf: Optional[UDF] = None
     ) -> None:
-        """Derive a new column from the table"""
+        """Derive a new column from the table
+
+        Copies & slices of key columns are keys, derived without decoding them.
+        """
+
+        keyed: Optional[tuple[pd.Series, int]] = self._derived_key(tokens)
+        if keyed is not None:
+            self._data[name] = keyed[0]
+            key_col: Column = Column(name, "key")
+            key_col.width = keyed[1]
+            self._add_column(key_col)
+            self.n_cols
+
+            return
 
         # TYPE HINT
         # assert self.stats is not None
@@ -411,33 +760,138 @@ class Table:
 
         df: pd.DataFrame = self._data
 
+        # Upcast compact columns & decode keys first
+        decode: list[str] = [k for k in self.key_widths() if k in tokens]
         # env.update(wrapped)
-        env.update({"df": df})
+        env.update({"df": self._decoded(self._widened(expr), decode)})
 
         df[name] = eval(expr, env)
 
         # Add new column metadata
-        dtype: str = df[name].dtype.name
+        dtype: str = dtype_name(df[name].dtype)
         new_col: Column = Column(name, dtype)
-        self._cols.append(new_col)
+        self._add_column(new_col)
 
         # Cross-check the # columns matches the # in the dataframe
         self.n_cols
 
+    def _derived_key(self, tokens: list[str]) -> Optional[tuple[pd.Series, int]]:
+        """A key column -- or a slice of its digits, e.g., GEOID[2:5] -- & its width, if that's all the tokens are
+
+        The digits of the slice are the quotient of the key & a power of 10, modulo another.
+        """
+
+        marked: list[str] = mark_slices(tokens)
+        widths: dict[str, int] = self.key_widths()
+        if not 1 <= len(marked) <= 2 or marked[0] not in widths:
+            return None
+
+        key: pd.Series = self._data[marked[0]]
+        width: int = widths[marked[0]]
+        if len(marked) == 1:
+            return key.copy(), width
+
+        if not isslice(marked[1]):
+            return None
+        bounds: list[Optional[int]] = [
+            int(x) if x else None for x in marked[1][len("slice[") : -1].split(":")
+        ]
+        start: int
+        stop: int
+        start, stop, _ = slice(*bounds).indices(width)
+        if stop <= start:
+            return None
+
+        return key // 10 ** (width - stop) % 10 ** (stop - start), stop - start
+
     def do_sort(self, by_list: list[str], ascending_list: list[bool]) -> None:
-        """Sort the table by the specified columns in the specified order"""
+        """Sort the table by the specified columns in the specified order
 
-        self._data.sort_values(by=by_list, ascending=ascending_list, inplace=True)
+        The sort is stable: rows with equal keys keep their order. That makes the
+        result well defined, so 'top' can select the same rows without a full sort.
+        """
+
+        self._data.sort_values(
+            by=by_list, ascending=ascending_list, kind="stable", inplace=True
+        )
+
+    def do_top(
+        self,
+        n: int,
+        by_list: list[str],
+        ascending_list: list[bool],
+        within: Optional[list[str]] = None,
+    ) -> None:
+        """Keep the first n rows the table would have if it were sorted
+
+        - Without 'within', this is the same as do_sort() followed by do_first().
+        - With 'within', keep the first n rows of each group, and order the
+          result by the 'within' columns and then the sort columns.
+
+        Instead of sorting every row, first narrow the rows down to candidates using
+        the first sort column: np.partition() to find the n-th value for the whole
+        table, or a per-group rank. All rows tied with the n-th value are candidates,
+        so a stable sort of just the candidates gives the same rows in the same order.
+        """
+
+        df: pd.DataFrame = self._data
+        key: pd.Series = df[by_list[0]]
+        ascending: bool = ascending_list[0]
+
+        candidates: pd.DataFrame = df
+        prunable: bool = (
+            key.dtype.name in PD_SUM_ABLE_TYPES and not key.isna().any() and n > 0
+        )
+
+        if within is None:
+            if prunable and n < len(df):
+                values: np.ndarray = key.to_numpy(dtype="float64")
+                if not ascending:
+                    values = -values
+                nth: float = np.partition(values, n - 1)[n - 1]
+                candidates = df[values <= nth]
+
+            candidates = candidates.sort_values(
+                by=by_list, ascending=ascending_list, kind="stable"
+            )
+            self._data = candidates.head(n)
+
+        else:
+            if prunable:
+                ranks: pd.Series = df.groupby(within, sort=False, observed=True)[
+                    by_list[0]
+                ].rank(method="min", ascending=ascending)
+                candidates = df[ranks <= n]
+
+            candidates = candidates.sort_values(
+                by=within + by_list,
+                ascending=[True] * len(within) + ascending_list,
+                kind="stable",
+            )
+            self._data = candidates.groupby(within, sort=False, observed=True).head(n)
+
+        self._data = self._data.reset_index(drop=True)
 
     def do_groupby(
-        self, by_list: list[str], agg_list: list[str], agg_fns: list
+        self, by_list: list[str], agg_list: list[str], agg_fns: list | dict
     ) -> None:
-        """Group the table by the specified columns"""
+        """Group the table by the specified columns
+
+        agg_fns is either a list of functions to apply to every column in agg_list,
+        or a dict mapping each column in agg_list to its own list of functions.
+        """
 
         # Grab these to preserve aliases
         by_cols: list[Column] = [self.get_column(name) for name in by_list]
 
-        self._data = self._data.groupby(by_list)[agg_list].agg(agg_fns)
+        # Just the groups that occur, not every combination of categories
+        # Pandas can't aggregate sparse columns with every function, and it
+        # aggregates compact columns in their own type, e.g., float32 means
+        self._data = (
+            self._widened_cols(agg_list)
+            .groupby(by_list, observed=True)[agg_list]
+            .agg(agg_fns)
+        )
 
         # Flatten the multi-index columns
         # https://towardsdatascience.com/how-to-flatten-multiindex-columns-and-rows-in-pandas-f5406c50e569
@@ -446,7 +900,7 @@ class Table:
 
         # Update the column metadata
         names: list[str] = list(self._data.columns)
-        dtypes: list[str] = [x.name for x in self._data.dtypes]
+        dtypes: list[str] = [dtype_name(x) for x in self._data.dtypes]
         self._cols = (
             by_cols
             + [Column(name, dtype) for name, dtype in zip(names, dtypes)][
@@ -454,20 +908,122 @@ class Table:
             ]
         )
 
+    def do_tally(
+        self, plan_list: list[str], sum_list: list[str], names: tuple[str, str]
+    ) -> None:
+        """Sum columns by district for many plans (assignment columns) at once
+
+        The result is in long format: one row per plan & district, with a <col>_sum
+        column for each summed column. Rows with a missing district are skipped.
+
+        Each plan's districts are integer-encoded, and then each column is summed by
+        district with one np.bincount() per plan, so memory is proportional to the
+        rows plus the result, not to the rows times the plans.
+
+        Integer columns are summed exactly: in float64, if their sums fit in its
+        53-bit mantissa, and otherwise with an int64 accumulator.
+        """
+
+        plan_name: str
+        district_name: str
+        plan_name, district_name = names
+
+        values: dict[str, np.ndarray] = dict()
+        for name in sum_list:
+            column: pd.Series = self._data[name]
+            if self.get_column(name).type in PD_INT_TYPES:
+                ints: np.ndarray = column.fillna(0).to_numpy(dtype="int64")
+                exact: bool = np.abs(ints).sum(dtype="float64") < 2**53
+                values[name] = ints.astype("float64") if exact else ints
+            else:
+                values[name] = np.nan_to_num(column.to_numpy(dtype="float64"))
+
+        districts_list: list[pd.Series] = list()
+        counts: list[int] = list()
+        sums: dict[str, list[np.ndarray]] = {name: list() for name in sum_list}
+        for i, plan in enumerate(plan_list):
+            report("Tallying plans", i, len(plan_list), "plans")
+            codes: np.ndarray
+            uniques: Any
+            codes, uniques = pd.factorize(self._data[plan], sort=True)
+            n: int = len(uniques)
+            districts_list.append(pd.Series(uniques))
+            counts.append(n)
+
+            # Park rows with missing districts in an extra, discarded bin
+            codes[codes < 0] = n
+            for name, weights in values.items():
+                if weights.dtype.kind == "f":
+                    sums[name].append(
+                        np.bincount(codes, weights=weights, minlength=n + 1)[:n]
+                    )
+                else:
+                    total: np.ndarray = np.zeros(n + 1, dtype="int64")
+                    np.add.at(total, codes, weights)
+                    sums[name].append(total[:n])
+
+        tallied: pd.DataFrame = pd.DataFrame(
+            {
+                plan_name: pd.Series(np.repeat(plan_list, counts), dtype="string"),
+                district_name: pd.concat(districts_list, ignore_index=True),
+            }
+        )
+        for name in sum_list:
+            summed: np.ndarray = np.concatenate(sums.pop(name))
+            if self.get_column(name).type in PD_INT_TYPES:
+                summed = summed.astype("int64")
+            tallied[name + "_sum"] = summed
+
+        self._data = tallied
+        self._extract_col_defs()
+
 
 ### MULTI-TABLE WRAPPERS ###
 
 
-def do_union(y_table: Table, x_table: Table) -> Table:
-    """Union two matching tables
+def do_union(*tables: Table) -> Table:
+    """Union two or more matching tables
 
+    - The tables are in stack order, from the bottom up, e.g., (y_table, x_table)
+    - The rows of the last (top) table come first
     - Verify that the tables match, before calling this
-    - Preserve the y_table's column metadata (e.g., aliases)
+    - Preserve the first (bottom) table's column metadata (e.g., aliases)
+    - Concatenate all the tables at once, so the rows are copied just once
+    - Key columns stay keys if they're keys of the same width in every table
     """
 
+    key_widths: list[dict[str, int]] = [t.key_widths() for t in tables]
+    # Decode keys that aren't keys -- or are keys of different widths -- in another table
+    decode: list[str] = [
+        name
+        for name in tables[0].col_names()
+        if len(set(widths.get(name) for widths in key_widths)) > 1
+    ]
+
     union_table: Table = Table()
-    union_table._cols = list(y_table._cols)
-    union_table._data = pd.concat([x_table._data, y_table._data], ignore_index=True)
+    union_table._cols = list(tables[0]._cols)
+    union_table._data = pd.concat(
+        [t._decoded(t._data, decode) for t in reversed(tables)], ignore_index=True
+    )
+
+    # Concatenating categories that differ -- or with strings -- makes object columns
+    recast: dict[str, str] = {
+        c.name: c.type
+        for c in union_table._cols
+        if c.type in ["category", "string"]
+        and union_table._data[c.name].dtype.name != c.type
+    }
+    if recast:
+        union_table._data = union_table._data.astype(recast)
+
+    # And concatenating numbers of different widths makes the wider type
+    for c in union_table._cols:
+        dtype: str = dtype_name(union_table._data[c.name].dtype)
+        if dtype != c.type and not (c.type == "key" and c.name not in decode):
+            wider: Column = c.copy()
+            wider.type = dtype
+            wider.width = None
+            union_table._add_column(wider)  # In its place
 
     return union_table
 
@@ -481,7 +1037,10 @@ def columns_match(table1: Table, table2: Table, match_names: bool = True) -> boo
     ):
         return False
 
-    if not all([a == b for a, b in zip(table1.col_types(), table2.col_types())]):
+    # Category columns match columns of the type of their values
+    types1: list[str] = [table1.value_type(name) for name in table1.col_names()]
+    types2: list[str] = [table2.value_type(name) for name in table2.col_names()]
+    if not all([a == b for a, b in zip(types1, types2)]):
         return False
 
     return True
@@ -512,11 +1071,17 @@ def do_join(
     assert suffixes[0] is not None or suffixes[1] is not None
     swapped: tuple[str, str] | tuple[None, str] | tuple[str, None] = suffixes[::-1]  # type: ignore
 
+    left_df: pd.DataFrame
+    right_df: pd.DataFrame
+    widths: dict[str, int]
+    left_df, right_df, widths = align_keys(left, right, left_on, right_on)
+    left_df, right_df = align_categories(left_df, right_df, left_on, right_on)
+
     join_table: Table = Table()
     if validate:
         join_table._data = pd.merge(
-            left._data,
-            right._data,
+            left_df,
+            right_df,
             how=how,
             left_on=left_on,
             right_on=right_on,
@@ -525,8 +1090,8 @@ def do_join(
         )
     else:
         join_table._data = pd.merge(
-            left._data,
-            right._data,
+            left_df,
+            right_df,
             how=how,
             left_on=left_on,
             right_on=right_on,
@@ -542,9 +1107,112 @@ def do_join(
     # Instead of blasting them with this:
     # join_table._extract_col_defs()
 
+    # But merging can change types, e.g., keys that are categories on one side only
+    for col in join_table._cols:
+        dtype: str = dtype_name(join_table._data[col.name].dtype)
+        width: Optional[int] = col.width if col.type == "key" else widths.get(col.name)
+        if width is not None and dtype in ["int64", "Int64", "float64"]:
+            # Unmatched rows of an outer join make key columns floats
+            if dtype == "float64":
+                join_table._data[col.name] = join_table._data[col.name].astype("Int64")
+            col.type = "key"
+            col.width = width
+        else:
+            col.type = dtype
+            col.width = None
+
     return join_table
 
 
+def align_keys(
+    left: Table, right: Table, left_on: list[str], right_on: list[str]
+) -> tuple[pd.DataFrame, pd.DataFrame, dict[str, int]]:
+    """Make join keys that are key columns on either side match
+
+    - Keys of the same width on both sides are merged as integers, as they are.
+    - A key on one side is matched by encoding the other side, if it can be.
+    - Otherwise, the keys are decoded into strings.
+
+    Return the data & the widths of the columns encoded as keys, by name.
+    """
+
+    left_df: pd.DataFrame = left._data
+    right_df: pd.DataFrame = right._data
+    widths: dict[str, int] = dict()
+
+    for l, r in zip(left_on, right_on):
+        l_width: Optional[int] = left.key_widths().get(l)
+        r_width: Optional[int] = right.key_widths().get(r)
+        if l_width == r_width:
+            continue
+
+        # Shallow copies, so the tables aren't modified
+        left_df = left_df.copy(deep=False)
+        right_df = right_df.copy(deep=False)
+
+        encoded: Optional[pd.Series] = None
+        if r_width is None:
+            assert l_width is not None
+            encoded = encode_key(right_df[r], l_width)
+            if encoded is not None:
+                right_df[r] = encoded
+                widths[r] = l_width
+                continue
+        elif l_width is None:
+            encoded = encode_key(left_df[l], r_width)
+            if encoded is not None:
+                left_df[l] = encoded
+                widths[l] = r_width
+                continue
+
+        if l_width is not None:
+            left_df[l] = decode_key(left_df[l], l_width)
+        if r_width is not None:
+            right_df[r] = decode_key(right_df[r], r_width)
+
+    return left_df, right_df, widths
+
+
+def align_categories(
+    left_df: pd.DataFrame,
+    right_df: pd.DataFrame,
+    left_on: list[str],
+    right_on: list[str],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Give join keys that are categories on either side the same categories
+
+    Then Pandas merges them by their codes, and the keys stay categories.
+    """
+
+    for l, r in zip(left_on, right_on):
+        if "category" not in [left_df[l].dtype.name, right_df[r].dtype.name]:
+            continue
+
+        categories: pd.Index = categories_of(left_df[l]).union(
+            categories_of(right_df[r])
+        )
+        dtype: pd.CategoricalDtype = pd.CategoricalDtype(categories)
+
+        # Shallow copies, so the tables aren't modified
+        if left_df[l].dtype != dtype:
+            left_df = left_df.copy(deep=False)
+            left_df[l] = left_df[l].astype(dtype)
+        if right_df[r].dtype != dtype:
+            right_df = right_df.copy(deep=False)
+            right_df[r] = right_df[r].astype(dtype)
+
+    return left_df, right_df
+
+
+def categories_of(series: pd.Series) -> pd.Index:
+    """The categories of a category column, or the distinct values of another"""
+
+    if series.dtype.name == "category":
+        return series.cat.categories
+
+    return pd.Index(series.dropna().unique())
+
+
 def joined_columns(
     joined: Table,
     left: Table,
@@ -563,10 +1231,12 @@ def joined_columns(
     """
 
     keys_match: bool = left_on == right_on
+    left_keys: set[str] = set(left_on)
+    right_keys: set[str] = set(right_on)
     joined_columns: list[Column] = list()
 
     for col in left._cols:
-        if col.name in left_on:
+        if col.name in left_keys:
             joined_columns.append(col.copy())
         elif not right.has_column(col.name):
             joined_columns.append(col.copy())
@@ -577,7 +1247,7 @@ def joined_columns(
             joined_columns.append(new_col)
 
     for col in right._cols:
-        if col.name in right_on:
+        if col.name in right_keys:
             if not keys_match:
                 joined_columns.append(col.copy())
         elif not left.has_column(col.name):
@@ -594,18 +1264,89 @@ def joined_columns(
     if len(join_order) != len(joined_columns):
         raise ValueError("Mismatched column counts!")
 
+    by_name: dict[str, Column] = dict()
+    for col in joined_columns:
+        by_name.setdefault(col.name, col)
+
     ordered_columns: list[Column] = list()
     for col_ref in join_order:
-        for col in joined_columns:
-            if col.name == col_ref:
-                ordered_columns.append(col)
-                break
-        else:
+        if col_ref not in by_name:
             raise ValueError(f"Joined column {col_ref} not found!")
+        ordered_columns.append(by_name[col_ref])
 
     return ordered_columns
 
 
+### READ HELPERS ###
+
+
+def read_table(
+    rel_path: str,
+    nrows: Optional[int] = None,
+    sample: bool = False,
+    categorize: bool | list[str] = False,
+    compact: bool | list[str] = False,
+    keys: bool | list[str] = False,
+    sparse: bool | list[str] = False,
+) -> Table:
+    """Read a table from a CSV file -- or a preview of one"""
+
+    table: Table = Table()
+    table.read(
+        rel_path,
+        nrows=nrows,
+        sample=sample,
+        categorize=categorize,
+        compact=compact,
+        keys=keys,
+        sparse=sparse,
+    )
+
+    return table
+
+
+def read_tables(
+    rel_paths: list[str],
+    nrows: Optional[int] = None,
+    sample: bool = False,
+    categorize: bool | list[str] = False,
+    compact: bool | list[str] = False,
+    keys: bool | list[str] = False,
+    sparse: bool | list[str] = False,
+) -> list[Table]:
+    """Read tables from several CSV files in parallel, in the order given
+
+    Parsing is CPU bound, so the files are read in separate processes.
+    """
+
+    if len(rel_paths) == 1:
+        return [
+            read_table(rel_paths[0], nrows, sample, categorize, compact, keys, sparse)
+        ]
+
+    workers: int = min(len(rel_paths), os.cpu_count() or 1)
+    tables: list[Table] = list()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for table in executor.map(
+                read_table,
+                rel_paths,
+                [nrows] * len(rel_paths),
+                [sample] * len(rel_paths),
+                [categorize] * len(rel_paths),
+                [compact] * len(rel_paths),
+                [keys] * len(rel_paths),
+                [sparse] * len(rel_paths),
+            ):
+                tables.append(table)
+                report("Reading files", len(tables), len(rel_paths), "files")
+        except Cancelled:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return tables
+
+
 ### WRITE HELPERS ###
 
 
@@ -620,19 +1361,31 @@ def table_to_csv(table: Table, rel_path: Optional[str]) -> None:
         col_names: list[str] = table.col_names()
         header: str = ",".join(table.col_aliases_or_names()) + "\n"
 
+        # Write keys, string categories, & missing values as the strings they encode
+        df: pd.DataFrame = table._densified(table._decoded(table._data))
+        decode: dict[str, str] = {
+            c.name: "string"
+            for c in table.cols()
+            if c.type == "category" and table.value_type(c.name) == "string"
+        }
+        if decode:
+            df = df.astype(decode)
+
         with smart_open(cf) as handle:
             writer: DictWriter[str] = DictWriter(handle, fieldnames=col_names)
 
             # Write the header row with aliases (faking out 'writer')
             handle.write(header)
 
-            for _, row in table._data.iterrows():
+            for i, (_, row) in enumerate(df.iterrows()):
+                if i % REPORT_ROWS == 0:
+                    report("Writing", i, table.n_rows)
                 mod: dict = dict(zip(col_names, row))
                 # TODO - Handle missing values?
                 # mod = {k: missing_to_str(v) for (k, v) in row.dict().items()}
                 writer.writerow(mod)
 
-    except:
+    except Exception:
         raise Exception("Exception writing CSV.")
 
 
@@ -653,7 +1406,10 @@ def table_to_json(table: Table, rel_path: Optional[str]) -> None:
             table.map_names_to_aliases() if table.has_aliases() else None
         )
 
-        for _, row in table._data.iterrows():
+        df: pd.DataFrame = table._densified(table._decoded(table._data))
+        for i, (_, row) in enumerate(df.iterrows()):
+            if i % REPORT_ROWS == 0:
+                report("Writing", i, table.n_rows)
             d: dict = dict(zip(col_names, row))
             if mapping:
                 d = map_keys(d, mapping)
@@ -662,7 +1418,7 @@ def table_to_json(table: Table, rel_path: Optional[str]) -> None:
         with smart_open(cf) as handle:
             json.dump(rows, handle)
 
-    except:
+    except Exception:
         raise Exception("Exception writing JSON.")
 
 
@@ -0,0 +1,608 @@
+# explain.py
+#!/usr/bin/env python3
+
+"""
+EXPLAIN - Estimate what running a script will take, without running it
+
+Walk the commands in a script, simulating the table stack. Instead of tables,
+the stack holds estimates: the columns (names, types, bytes per value, and
+number of distinct values) and the number of rows.
+
+The estimates for a CSV file come from its size and a profile of its first
+rows. Profiles are cached by path, size, and modification time, so explaining
+a script again -- or a script that reads the same files -- doesn't re-read them.
+
+Each step reports the rows, columns, and memory of the table it produces, the
+work it does (mostly bytes copied), and the strategy for joins, groupbys, etc.
+"""
+
+import os
+import math
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from .commands import Command, Namespace, string_to_list
+from .datamodel import Table, PD_AGG_FNS, PD_GROUP_ABLE_TYPES, PD_SUM_ABLE_TYPES
+from .optimize import fuse_sort_first, prune_groupby_outputs, referenced_names
+from .readwrite import (
+    FileSpec,
+    PREREAD_LINES,
+    infer_column_types,
+    is_glob,
+    glob_paths,
+)
+from .utils import split_col_spec_string, format_bytes
+
+# Guesses, when nothing better is known
+SELECTIVITY: float = 0.5  # The fraction of rows a 'select' keeps
+DERIVED_BYTES: int = 8  # Bytes per value of a derived column
+MAX_COMMAND_WIDTH: int = 60  # Longer commands are truncated in reports
+
+
+### ESTIMATES ###
+
+
+class ColumnEstimate:
+    """The estimated shape of one column"""
+
+    name: str
+    type: str
+    width: float  # bytes per value
+    distinct: float  # number of distinct values
+
+    def __init__(self, name: str, dtype: str, width: float, distinct: float) -> None:
+        self.name = name
+        self.type = dtype
+        self.width = width
+        self.distinct = distinct
+
+
+class TableEstimate:
+    """The estimated shape of a table"""
+
+    cols: list[ColumnEstimate]
+    n_rows: float
+
+    def __init__(self, cols: list[ColumnEstimate], n_rows: float) -> None:
+        self.cols = cols
+        self.n_rows = n_rows
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.cols)
+
+    @property
+    def memory(self) -> float:
+        return self.n_rows * sum(c.width for c in self.cols)
+
+    def col_names(self) -> list[str]:
+        return [c.name for c in self.cols]
+
+    def get_column(self, name: str) -> ColumnEstimate:
+        for col in self.cols:
+            if col.name == name:
+                return col
+
+        raise Exception(f"Column {name} not in table.")
+
+    def with_rows(self, n_rows: float) -> "TableEstimate":
+        """The same columns with fewer (or more) rows"""
+
+        n_rows = max(n_rows, 0)
+        cols: list[ColumnEstimate] = [
+            ColumnEstimate(c.name, c.type, c.width, min(c.distinct, n_rows))
+            for c in self.cols
+        ]
+
+        return TableEstimate(cols, n_rows)
+
+    def distinct(self, names: list[str]) -> float:
+        """Estimate the number of distinct combinations of values in some columns"""
+
+        product: float = 1
+        for name in names:
+            product *= max(self.get_column(name).distinct, 1)
+
+        return min(product, self.n_rows)
+
+
+### FILE PROFILES ###
+
+_profiles: dict[tuple[str, int, int], TableEstimate] = dict()
+
+
+def profile_csv(rel_path: str) -> TableEstimate:
+    """Estimate the shape of a CSV file from its size and first rows"""
+
+    abs_path: str = FileSpec(rel_path).abs_path
+    stat: os.stat_result = os.stat(abs_path)
+    key: tuple[str, int, int] = (abs_path, stat.st_size, stat.st_mtime_ns)
+
+    if key not in _profiles:
+        str_cols: dict[Any, Any]
+        dt_cols: list
+        str_cols, dt_cols = infer_column_types(abs_path, header=0)
+
+        sample: pd.DataFrame = pd.read_csv(
+            abs_path,
+            dtype=str_cols,
+            parse_dates=dt_cols,
+            nrows=PREREAD_LINES,
+            engine="python",
+        )
+        n_sample: int = len(sample)
+
+        # Extrapolate the number of rows from the bytes per row of the sample
+        with open(abs_path, "rb") as f:
+            header_bytes: int = len(f.readline())
+            sample_bytes: int = sum(len(line) for _, line in zip(range(n_sample), f))
+
+        n_rows: float = n_sample
+        if n_sample == PREREAD_LINES and sample_bytes > 0:
+            n_rows = (stat.st_size - header_bytes) / (sample_bytes / n_sample)
+
+        memory: pd.Series = sample.memory_usage(index=False, deep=True)
+        cols: list[ColumnEstimate] = list()
+        for name in sample.columns:
+            width: float = memory[name] / max(n_sample, 1)
+
+            # Assume unique-looking columns stay unique, and the others don't grow
+            distinct: float = sample[name].nunique()
+            if n_sample > 0 and distinct / n_sample > 0.9:
+                distinct = n_rows * distinct / n_sample
+
+            cols.append(ColumnEstimate(name, sample[name].dtype.name, width, distinct))
+
+        _profiles[key] = TableEstimate(cols, n_rows)
+
+    return _profiles[key]
+
+
+def profile_table(table: Table) -> TableEstimate:
+    """Estimate the shape of a table that's already on the stack"""
+
+    df: pd.DataFrame = table._data
+    n_rows: int = len(df)
+    sample: pd.DataFrame = df.head(PREREAD_LINES)
+    n_sample: int = len(sample)
+    memory: pd.Series = sample.memory_usage(index=False, deep=True)
+
+    cols: list[ColumnEstimate] = list()
+    for name in df.columns:
+        width: float = memory[name] / max(n_sample, 1)
+
+        distinct: float = sample[name].nunique()
+        if n_sample > 0 and distinct / n_sample > 0.9:
+            distinct = n_rows * distinct / n_sample
+
+        cols.append(ColumnEstimate(name, df[name].dtype.name, width, distinct))
+
+    return TableEstimate(cols, n_rows)
+
+
+### EXPLAIN ###
+
+
+class Step:
+    """One line of an explanation"""
+
+    depth: int
+    command: str
+    table: Optional[TableEstimate]
+    work: float
+    strategy: str
+
+    def __init__(
+        self,
+        depth: int,
+        command: str,
+        table: Optional[TableEstimate],
+        work: float = 0,
+        strategy: str = "",
+    ) -> None:
+        self.depth = depth
+        self.command = command
+        self.table = table
+        self.work = work
+        self.strategy = strategy
+
+
+class Explainer:
+    """Simulate running a script on estimates of its tables"""
+
+    src: str
+    data: str
+    stack: list[TableEstimate]  # top last
+    steps: list[Step]
+    peak: float
+
+    def __init__(
+        self,
+        src: Optional[str] = None,
+        data: Optional[str] = None,
+        stack: Optional[list[Table]] = None,
+    ) -> None:
+        self.src = src or ""
+        self.data = data or ""
+        self.stack = [profile_table(table) for table in stack] if stack else list()
+        self.steps = list()
+        self.peak = 0
+
+    def explain(self, rel_path: str, scriptargs: Namespace, depth: int = 0) -> None:
+        """Explain each command in a script"""
+
+        from .lang import read_script  # lang imports this module
+
+        commands: list[str]
+        commands, _ = read_script(self.src + rel_path)
+        commands = fuse_sort_first(commands)
+        used_by: dict[int, set[str]] = prune_groupby_outputs(commands, scriptargs)
+
+        for i, command in enumerate(commands):
+            cmd: Command = Command(command, scriptargs)
+            cmd.bind()
+            cmd.parse()
+
+            verb: str = "from" if cmd.verb == "from_" else cmd.verb
+            text: str = f"{verb}({cmd._args_str})"
+
+            if verb == "from" and FileSpec(cmd.positional_args[0]).extension == ".t":
+                self.steps.append(Step(depth, text, None, strategy="run script"))
+                self.explain(
+                    cmd.positional_args[0], Namespace(cmd.keyword_args), depth + 1
+                )
+                continue
+
+            step: Step = self._explain_command(cmd, verb, used_by.get(i))
+            step.depth = depth
+            step.command = text
+            self.steps.append(step)
+
+            self.peak = max(self.peak, sum(t.memory for t in self.stack))
+
+    def report(self) -> str:
+        """Format the explanation as a table"""
+
+        total: float = sum(step.work for step in self.steps) or 1
+
+        rows: list[list[str]] = list()
+        for i, step in enumerate(self.steps):
+            table: Optional[TableEstimate] = step.table
+            command: str = "  " * step.depth + step.command
+            if len(command) > MAX_COMMAND_WIDTH:
+                command = command[: MAX_COMMAND_WIDTH - 3] + "..."
+
+            rows.append(
+                [
+                    str(i + 1),
+                    command,
+                    f"{round(table.n_rows):,}" if table else "",
+                    f"{table.n_cols:,}" if table else "",
+                    format_bytes(table.memory) if table else "",
+                    f"{100 * step.work / total:.0f}%" if step.work else "",
+                    step.strategy,
+                ]
+            )
+
+        headers: list[str] = [
+            "#",
+            "COMMAND",
+            "ROWS",
+            "COLS",
+            "MEMORY",
+            "COST",
+            "STRATEGY",
+        ]
+        out: str = tabulate(rows, headers=headers, disable_numparse=True)
+        out += f"\n\nPeak stack memory: {format_bytes(self.peak)}"
+
+        return out
+
+    ### VERBS ###
+
+    def _explain_command(
+        self, cmd: Command, verb: str, used: Optional[set[str]]
+    ) -> Step:
+        pos: list[str] = cmd.positional_args
+        kw: dict[str, str] = cmd.keyword_args
+
+        match verb:
+            case "from":
+                return self._explain_read(pos[0], kw)
+            case "write" | "show" | "inspect" | "history":
+                top: TableEstimate = self._top()
+                work: float = top.memory if verb == "write" else 0
+                return Step(0, "", top, work, "output" if verb == "write" else "")
+            case "stack" | "materialize":
+                return Step(0, "", self._top() if self.stack else None)
+            case "save_session":
+                work = sum(t.memory for t in self.stack)
+                return Step(0, "", self._top() if self.stack else None, work, "output")
+            case "duplicate":
+                return self._push(self._top(), self._top().memory, "copy")
+            case "clear":
+                self.stack.clear()
+                return Step(0, "", None)
+            case "pop":
+                self.stack.pop()
+                return Step(0, "", self._top() if self.stack else None)
+            case "swap":
+                self.stack[-1], self.stack[-2] = self.stack[-2], self.stack[-1]
+                return Step(0, "", self._top())
+            case "reverse":
+                self.stack.reverse()
+                return Step(0, "", self._top())
+            case "rotate":
+                self.stack.append(self.stack.pop(0))  # The bottom table to the top
+                return Step(0, "", self._top())
+            case "join":
+                return self._explain_join(kw)
+            case "union":
+                return self._explain_union(pos, kw)
+            case "groupby":
+                return self._explain_groupby(kw, used)
+            case "tally":
+                return self._explain_tally(kw)
+            case _:
+                return self._explain_top_table(verb, pos, kw)
+
+    def _explain_read(self, name: str, kw: dict[str, str]) -> Step:
+        rel_path: str = self.data + name.strip("'")
+        paths: list[str] = glob_paths(rel_path) if is_glob(rel_path) else [rel_path]
+
+        profiles: list[TableEstimate] = [profile_csv(path) for path in paths]
+        table: TableEstimate = profiles[0].with_rows(sum(p.n_rows for p in profiles))
+        size: float = sum(os.path.getsize(path) for path in paths)
+
+        strategy: str = f"read {format_bytes(size)}"
+        if len(paths) > 1:
+            strategy += f" in {len(paths)} files, in parallel"
+
+        if "distinct" in kw:
+            on: list[str] = (
+                table.col_names()
+                if kw["distinct"] == "all"
+                else string_to_list(kw["distinct"])
+            )
+            table = table.with_rows(table.distinct(on))
+            strategy += ", distinct rows in chunks"
+
+        return self._push(table, size, strategy, pop=0)
+
+    def _explain_top_table(self, verb: str, pos: list[str], kw: dict[str, str]) -> Step:
+        """Verbs that replace the top table with a modified copy"""
+
+        x: TableEstimate = self._top()
+        cols: list[ColumnEstimate] = list(x.cols)
+        n_rows: float = x.n_rows
+        work: float = x.memory  # Every verb copies its input
+        strategy: str = ""
+
+        match verb:
+            case "keep":
+                cols = [x.get_column(name) for name in pos]
+            case "drop":
+                cols = [c for c in x.cols if c.name not in pos]
+            case "rename" | "alias":
+                renames: dict[str, str] = dict(split_col_spec_string(p) for p in pos)  # type: ignore
+                cols = [
+                    ColumnEstimate(
+                        renames.get(c.name, c.name), c.type, c.width, c.distinct
+                    )
+                    for c in x.cols
+                ]
+            case "derive":
+                # With no idea how many distinct values there are, guess sqrt(n)
+                distinct: float = math.sqrt(n_rows)
+                cols.append(ColumnEstimate(pos[0], "float64", DERIVED_BYTES, distinct))
+            case "cast":
+                cast: list[str] = (
+                    string_to_list(pos[0]) if pos[0].startswith("[") else [pos[0]]
+                )
+                cols = [
+                    ColumnEstimate(
+                        c.name, pos[-1], np.dtype(pos[-1]).itemsize, c.distinct
+                    )
+                    if c.name in cast and pos[-1] in PD_SUM_ABLE_TYPES
+                    else c
+                    for c in x.cols
+                ]
+            case "select":
+                n_rows = x.n_rows * self._selectivity(x, pos[0])
+                strategy = "filter"
+            case "sort":
+                work = x.memory * max(math.log2(max(x.n_rows, 2)), 1)
+                strategy = "stable sort"
+            case "top":
+                n: float = float(pos[0])
+                if "within" in kw:
+                    n *= x.distinct(string_to_list(kw["within"]))
+                n_rows = min(n, x.n_rows)
+                strategy = "partial sort (np.partition)"
+            case "first" | "last" | "sample":
+                n = float(pos[0])
+                n_rows = min(x.n_rows * n / 100 if len(pos) > 1 else n, x.n_rows)
+            case "distinct":
+                on: list[str] = (
+                    string_to_list(kw["on"]) if "on" in kw else x.col_names()
+                )
+                n_rows = x.distinct(on)
+                strategy = "hash rows"
+            case _:
+                raise Exception(f"Can't explain '{verb}'.")
+
+        table: TableEstimate = TableEstimate(cols, x.n_rows).with_rows(n_rows)
+
+        return self._push(table, work, strategy)
+
+    def _explain_join(self, kw: dict[str, str]) -> Step:
+        x: TableEstimate = self.stack[-1]
+        y: TableEstimate = self.stack[-2]
+
+        from .lang import parse_join_on  # lang imports this module
+
+        on: Any = parse_join_on(kw)
+        y_on: list[str]
+        x_on: list[str]
+        if on is None:
+            y_on = x_on = [name for name in y.col_names() if name in x.col_names()]
+        elif isinstance(on, str):
+            y_on = x_on = [on]
+        elif isinstance(on[0], list):
+            y_on, x_on = on[0], on[1]
+        else:
+            y_on = x_on = on
+
+        how: str = kw.get("how", "inner").lower()
+
+        # The textbook estimate: each key value matches rows/distinct rows in the other table
+        y_keys: float = y.distinct(y_on)
+        x_keys: float = x.distinct(x_on)
+        n_rows: float = y.n_rows * x.n_rows / max(y_keys, x_keys, 1)
+        if how == "left":
+            n_rows = max(n_rows, y.n_rows)
+        elif how == "right":
+            n_rows = max(n_rows, x.n_rows)
+        elif how == "outer":
+            n_rows = max(n_rows, y.n_rows, x.n_rows)
+
+        def cardinality(n_keys: float, n_rows: float) -> str:
+            return "1" if n_keys >= 0.99 * n_rows else "M"
+
+        shape: str = cardinality(y_keys, y.n_rows) + ":" + cardinality(x_keys, x.n_rows)
+        strategy: str = f"{how} hash join ({shape}) on {', '.join(y_on)}"
+
+        suffixes: tuple[str, str] = ("_y", "_x")
+        if "suffixes" in kw:
+            suffixes = split_col_spec_string(kw["suffixes"])  # type: ignore
+
+        cols: list[ColumnEstimate] = list()
+        shared: set[str] = set(y.col_names()) & set(x.col_names())
+        for table, suffix, keys in [(y, suffixes[0], y_on), (x, suffixes[1], x_on)]:
+            for c in table.cols:
+                if c.name in keys and table is x and x_on == y_on:
+                    continue
+                name: str = c.name
+                if name in shared and not (name in keys and x_on == y_on):
+                    name += suffix
+                cols.append(ColumnEstimate(name, c.type, c.width, c.distinct))
+
+        table: TableEstimate = TableEstimate(cols, n_rows).with_rows(n_rows)
+        work: float = y.memory + x.memory + table.memory
+
+        return self._push(table, work, strategy, pop=2)
+
+    def _explain_union(self, pos: list[str], kw: dict[str, str]) -> Step:
+        n: int = len(self.stack) if pos == ["all"] else int(kw.get("n", 2))
+        tables: list[TableEstimate] = self.stack[-n:]
+
+        n_rows: float = sum(t.n_rows for t in tables)
+        table: TableEstimate = tables[0].with_rows(n_rows)
+
+        return self._push(table, table.memory, f"one concatenation of {n}", pop=n)
+
+    def _explain_groupby(self, kw: dict[str, str], used: Optional[set[str]]) -> Step:
+        x: TableEstimate = self._top()
+
+        by: list[str] = string_to_list(kw["by"])
+        only: list[str] = (
+            string_to_list(kw["only"])
+            if "only" in kw
+            else [
+                c.name
+                for c in x.cols
+                if c.type in PD_GROUP_ABLE_TYPES and c.name not in by
+            ]
+        )
+        fns: list[str] = string_to_list(kw["agg"]) if "agg" in kw else PD_AGG_FNS
+
+        outputs: list[str] = [f"{name}_{fn}" for name in only for fn in fns]
+        strategy: str = f"hash groupby on {', '.join(by)}"
+        if used is not None:
+            pruned: list[str] = [name for name in outputs if name in used]
+            if pruned and len(pruned) < len(outputs):
+                strategy += f", {len(pruned)} of {len(outputs)} outputs used"
+                outputs = pruned
+
+        n_groups: float = x.distinct(by)
+        cols: list[ColumnEstimate] = [x.get_column(name) for name in by] + [
+            ColumnEstimate(name, "float64", 8, n_groups) for name in outputs
+        ]
+        table: TableEstimate = TableEstimate(cols, n_groups).with_rows(n_groups)
+        work: float = x.memory + x.n_rows * 8 * len(outputs)
+
+        return self._push(table, work, strategy)
+
+    def _explain_tally(self, kw: dict[str, str]) -> Step:
+        x: TableEstimate = self._top()
+
+        plans: list[str] = string_to_list(kw["by"])
+        sums: list[str] = (
+            string_to_list(kw["only"])
+            if "only" in kw
+            else [
+                c.name
+                for c in x.cols
+                if c.type in PD_SUM_ABLE_TYPES and c.name not in plans
+            ]
+        )
+
+        n_rows: float = sum(x.get_column(plan).distinct for plan in plans)
+        cols: list[ColumnEstimate] = [
+            ColumnEstimate("Plan", "string", 60, len(plans)),
+            ColumnEstimate("District", "int64", 8, n_rows),
+        ] + [ColumnEstimate(f"{name}_sum", "float64", 8, n_rows) for name in sums]
+        table: TableEstimate = TableEstimate(cols, n_rows).with_rows(n_rows)
+        work: float = x.n_rows * 8 * len(plans) * (len(sums) + 1)
+
+        return self._push(table, work, f"bincount over {len(plans)} plans")
+
+    ### HELPERS ###
+
+    def _top(self) -> TableEstimate:
+        if not self.stack:
+            raise Exception("No tables on the stack.")
+
+        return self.stack[-1]
+
+    def _push(
+        self, table: TableEstimate, work: float, strategy: str, pop: int = 1
+    ) -> Step:
+        for _ in range(pop):
+            self.stack.pop()
+        self.stack.append(table)
+
+        return Step(0, "", table, work, strategy)
+
+    def _selectivity(self, x: TableEstimate, expr: str) -> float:
+        """Guess the fraction of rows a 'select' expression keeps"""
+
+        names: list[str] = [n for n in referenced_names(expr) if n in x.col_names()]
+        if "==" in expr and len(names) == 1:
+            return 1 / max(x.get_column(names[0]).distinct, 1)
+
+        return SELECTIVITY
+
+
+def explain_script(
+    rel_path: str,
+    scriptargs: Namespace,
+    src: Optional[str] = None,
+    data: Optional[str] = None,
+    stack: Optional[list[Table]] = None,
+) -> str:
+    """Explain a script: what each command will produce and roughly what it costs
+
+    The script runs on the tables already on the stack, if any (bottom first).
+    """
+
+    explainer: Explainer = Explainer(src, data, stack)
+    explainer.explain(rel_path, scriptargs)
+
+    return explainer.report()
+
+
+### END ###
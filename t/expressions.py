@@ -6,6 +6,7 @@ EXPRESSION HANDLING for SELECT & DERIVE
 """
 
 import ast
+import re
 from typing import Optional, Any, Type
 
 from .constants import STATS_METRICS
@@ -391,4 +392,78 @@ def udf_rewrite_rule(tok: str, udf: Optional[UDF]) -> str:
     return f"df.apply({alias}, axis=1)"
 
 
+### KEYS ###
+
+KEY_COMPARISONS: str = r"==|!=|<=|>=|<|>"
+QUOTED: str = r"'[^']*'|\"[^\"]*\""
+
+
+def rewrite_key_literals(expr: str, keys: dict[str, int]) -> tuple[str, list[str]]:
+    """Compare key columns to the integers that string literals encode, instead of strings
+
+    E.g., "GEOID == '37001'" becomes "GEOID == 37001". Literals that can't be
+    keys of the same width become -1, which no key equals.
+
+    Return the rewritten expression & the keys it uses any other way -- ordered
+    against a literal of another width, sliced, etc. -- which must be decoded.
+    """
+
+    decode: list[str] = list()
+    for name, width in keys.items():
+        col: str = re.escape(name)
+        patterns: list[str] = [
+            rf"(?<![\w.])(?P<col>{col})\s*(?P<op>{KEY_COMPARISONS})\s*(?P<lit>{QUOTED})",
+            rf"(?P<lit>{QUOTED})\s*(?P<op>{KEY_COMPARISONS})\s*(?P<col>{col})(?!\w)",
+            rf"(?<![\w.])(?P<col>{col})\s*(?P<op>==|!=|not\s+in|in)\s*"
+            rf"\[(?P<lits>\s*(?:{QUOTED})(?:\s*,\s*(?:{QUOTED}))*\s*)\]",
+        ]
+
+        # Replace the comparisons with placeholders, to find any other references
+        rewrites: list[str] = list()
+        ordered: bool = True
+
+        def rule(m: re.Match) -> str:
+            nonlocal ordered
+            op: str = m.group("op")
+            if m.groupdict().get("lits") is not None:
+                lits: list[str] = re.findall(QUOTED, m.group("lits"))
+                ints: list[str] = [key_literal(x, width) or "-1" for x in lits]
+                rewrites.append(f"{name} {op} [{', '.join(ints)}]")
+            else:
+                n: Optional[str] = key_literal(m.group("lit"), width)
+                if n is None and op not in ["==", "!="]:
+                    ordered = False
+                n = n or "-1"
+                rewrites.append(
+                    f"{name} {op} {n}"
+                    if m.start("col") < m.start("lit")
+                    else f"{n} {op} {name}"
+                )
+
+            return f"\0{len(rewrites) - 1}\0"
+
+        marked: str = expr
+        for pattern in patterns:
+            marked = re.sub(pattern, rule, marked)
+
+        unquoted: str = re.sub(QUOTED, "", marked)
+        if not ordered or re.search(rf"(?<![\w.]){col}(?!\w)", unquoted):
+            decode.append(name)
+            continue
+
+        expr = re.sub(r"\0(\d+)\0", lambda m: rewrites[int(m.group(1))], marked)
+
+    return expr, decode
+
+
+def key_literal(literal: str, width: int) -> Optional[str]:
+    """The integer a quoted string literal encodes as a key of some width, if any"""
+
+    value: str = literal[1:-1]
+    if len(value) == width and value.isascii() and value.isdigit():
+        return str(int(value))
+
+    return None
+
+
 ### END ###
@@ -6,10 +6,11 @@ INTERPRETER AND REPL, RUN SCRIPT, & DEBUGGER MODES
 """
 
 import logging
+from contextlib import ExitStack, nullcontext
 from logging.handlers import RotatingFileHandler
 from typing import Callable, Literal, Optional
 
-from .datamodel import PD_TYPES
+from .datamodel import CAST_TYPES
 from .commands import (
     Command,
     Namespace,
@@ -22,8 +23,20 @@ from .commands import (
 )
 from .program import Program
 from .reader import Reader, ReadState, FILE_IN_VERBS, make_input_fn
+from .optimize import fuse_sort_first, prune_groupby_outputs
+from .plan import Plan
+from .memo import run_memoized
+from .schedule import Prefetched, Prefetcher, push_prefetched
+from .session import Checkpoint
+from .progress import check, current, run_command
 from .readwrite import FileSpec
-from .utils import split_col_spec_string, isstringifiedlist, islistofstr
+from .trace import phase
+from .utils import (
+    split_col_spec_string,
+    split_args_string,
+    isstringifiedlist,
+    islistofstr,
+)
 
 ERROR: str = "_error_"
 
@@ -31,12 +44,28 @@ ERROR: str = "_error_"
 def interpret(command: str, env: Program) -> str:
     """Interpret one T command"""
 
+    check()  # Stop a script, if it was cancelled
+
+    if env.tracer is None and env.monitor is None:
+        return _interpret(command, env)
+
+    with ExitStack() as measures:
+        if env.tracer is not None:
+            measures.enter_context(env.tracer.command(command, env))
+        if env.monitor is not None:
+            measures.enter_context(env.monitor.command(command, env))
+
+        return _interpret(command, env)
+
+
+def _interpret(command: str, env: Program) -> str:
     ### BIND VARIABLES & PARSE COMMANDS ###
 
     try:
-        cmd: Command = Command(command, env.call_stack.first())
-        cmd.bind()
-        cmd.parse()
+        with phase(env.tracer, "parse"):
+            cmd: Command = Command(command, env.call_stack.first())
+            cmd.bind()
+            cmd.parse()
         env.command = command  # for debugging
     except Exception as e:
         print("Exception parsing command syntax: ", e)
@@ -61,6 +90,8 @@ def interpret(command: str, env: Program) -> str:
             return _handle_union(cmd, env)
         case "groupby":
             return _handle_groupby(cmd, env)
+        case "tally":
+            return _handle_tally(cmd, env)
         case "keep":
             return _handle_keep(cmd, env)
         case "drop":
@@ -77,6 +108,10 @@ def interpret(command: str, env: Program) -> str:
             return _handle_first(cmd, env)
         case "last":
             return _handle_last(cmd, env)
+        case "top":
+            return _handle_top(cmd, env)
+        case "distinct":
+            return _handle_distinct(cmd, env)
         case "sample":
             return _handle_sample(cmd, env)
         case "cast":
@@ -87,6 +122,16 @@ def interpret(command: str, env: Program) -> str:
             return _handle_history(cmd, env)
         case "inspect":
             return _handle_inspect(cmd, env)
+        case "stack":
+            return _handle_stack(cmd, env)
+        case "explain":
+            return _handle_explain(cmd, env)
+        case "materialize":
+            return _handle_materialize(cmd, env)
+        case "save_session":
+            return _handle_save_session(cmd, env)
+        case "load_session":
+            return _handle_load_session(cmd, env)
         case "clear":
             return _handle_clear(cmd, env)
         case "pop":
@@ -134,7 +179,7 @@ def repl_mode(env: Program) -> None:
     app_log.info("000")
 
     r: Reader = Reader()
-    prompt = ">>> "
+    prompt = prompts(env)[0]
 
     while True:
         try:
@@ -150,18 +195,27 @@ def repl_mode(env: Program) -> None:
                 continue
 
             if state == ReadState.CONTINUED:
-                prompt = "... "
+                prompt = prompts(env)[1]
                 continue
 
             if r.commands[0].lower() == "quit()":
                 break
 
-            prompt = ">>> "
+            prompt = prompts(env)[0]
 
             print()
 
             for command in r.commands:
-                result: str = interpret(command, env)
+                # Run it in a worker thread, so it can be cancelled
+                result: str = (
+                    run_command(
+                        command,
+                        env,
+                        lambda: interpret(command, env),
+                        timeout=env.timeout,
+                    )
+                    or ERROR
+                )
 
                 count += 1
                 app_log.info(str(count).zfill(3) + " " + command)
@@ -169,55 +223,150 @@ def repl_mode(env: Program) -> None:
                 if result.strip("_") in FILE_IN_VERBS:
                     is_rooted = True
 
+                # Record what was run on the previews, to replay on the full data
+                if env.preview is not None and result != ERROR:
+                    env.preview.record(command, result)
+                    env.preview.flush(env)  # Write the files that scripts skipped
+                elif env.preview is not None:
+                    env.preview.deferred = False
+
             print()
 
+            prompt = prompts(env)[0]  # materialize() ends previews
+
         except Exception as e:
             print("Exception while processing command: ", e)
 
 
-def run_mode(rel_path: str, env: Program) -> tuple[bool, str | None]:
-    """Run a T script, i.e., interpret a file of T commands"""
+def prompts(env: Program) -> tuple[str, str]:
+    """The REPL prompts, for a new command & to continue one. Flag previews."""
 
-    if env.src:
-        rel_path = env.src + rel_path
+    if env.preview is not None:
+        return "(preview) >>> ", "(preview) ... "
 
-    result: Optional[str] = None
-    exit: bool = False
-    last_verb: Optional[str] = None
+    return ">>> ", "... "
+
+
+def read_script(rel_path: str) -> tuple[list[str], bool]:
+    """Read the commands in a T script file. Also return whether the script ended cleanly."""
+
+    commands: list[str] = list()
 
     fs: FileSpec = FileSpec(rel_path)
     abs_path: str = fs.abs_path
     with open(abs_path, "r") as f:
         r: Reader = Reader()
-        line: str = f.readline()
 
-        while line:
+        for line in f:
             state: Literal[
                 ReadState.BLANK, ReadState.COMMANDS, ReadState.CONTINUED
             ] = r.next(line)
 
             if state == ReadState.COMMANDS:
-                for command in r.commands:
-                    result = interpret(command, env)
+                commands.extend(r.commands)
+
+        # Check for unclosed block comments or multi-line statements
+        complete: bool = not (r.continued or r.in_block)
+
+    return commands, complete
 
-                    if result == ERROR:
-                        exit = True
-                        break
 
-                    if result != "comment":
-                        last_verb = result
+def run_mode(
+    rel_path: str, env: Program, checkpoint: Optional[str] = None
+) -> tuple[bool, str | None]:
+    """Run a T script, i.e., interpret a file of T commands
 
-            if result and result == ERROR:
+    With a checkpoint path, save the script's progress as it runs. If it fails,
+    running it again with the same args resumes from the last completed command.
+    """
+
+    if env.src:
+        rel_path = env.src + rel_path
+
+    result: Optional[str] = None
+    exit: bool = False
+    last_verb: Optional[str] = None
+
+    commands: list[str]
+    complete: bool
+    commands, complete = read_script(rel_path)
+    commands = fuse_sort_first(commands)
+
+    # Look ahead to see what the commands use
+    used_by: dict[int, set[str]] = prune_groupby_outputs(
+        commands, env.call_stack.first()
+    )
+
+    # Resume from a checkpoint, if the script failed before
+    saver: Optional[Checkpoint] = (
+        Checkpoint(checkpoint, rel_path, commands, env) if checkpoint else None
+    )
+    start: int = saver.resume(env) if saver is not None else 0
+
+    # In lazy mode, defer commands until their results are observed
+    plan: Optional[Plan] = Plan(env) if env.lazy else None
+
+    # With more than one job, run the independent 'from' commands ahead, concurrently
+    prefetcher: Optional[Prefetcher] = (
+        Prefetcher(commands, env, start) if env.jobs > 1 else None
+    )
+
+    # Note the files read, so the checkpoint isn't resumed if they change
+    with env.memo.tracking(saver.reads) if saver is not None else nullcontext():
+        for i, command in enumerate(commands[start:], start):
+            if plan is not None:
+                if plan.defer(command, used_by.get(i)):
+                    last_verb = plan.steps[-1].verb
+                    continue
+
+                if not plan.run():
+                    exit = True
+                    break
+
+            env.prefetched = prefetcher.take(i) if prefetcher is not None else None
+            env.used_outputs = used_by.get(i)
+            if env.timeout is not None and current() is None:
+                # Run it in a worker thread, so it can time out
+                result = (
+                    run_command(
+                        command,
+                        env,
+                        lambda: interpret(command, env),
+                        timeout=env.timeout,
+                        show=False,
+                    )
+                    or ERROR
+                )
+            else:
+                result = interpret(command, env)
+            env.used_outputs = None
+            env.prefetched = None
+
+            if result == ERROR:
                 exit = True
                 break
 
-            # Read the next line -or- EOF
-            line = f.readline()
+            if result != "comment":
+                last_verb = result
 
-        # Check for unclosed block comments or multi-line statements
-        if r.continued or r.in_block:
+            if saver is not None and (plan is None or not plan.steps):
+                saver.mark(env, i + 1)
+
+        if plan is not None and not exit and not plan.run():
             exit = True
 
+    if prefetcher is not None:
+        prefetcher.close()
+
+    if not complete:
+        exit = True
+
+    if saver is not None:
+        if exit:
+            saver.save_last(env)
+        else:
+            saver.remove()
+
     if exit:
         print("Exiting program due to errors.")
 
@@ -282,6 +431,27 @@ def _handle_from(cmd: Command, env: Program) -> str:
     >>> # Read a table from a CSV file
     >>> from(2020_census_NC.csv)
 
+    >>> # Read the union of all the CSV files that match a pattern
+    >>> from(precincts_*.csv)
+
+    >>> # Read just the distinct rows of a CSV file, a chunk at a time
+    >>> from(2020_census_NC.csv, distinct=all)
+    >>> from(2020_census_NC.csv, distinct=[GEOID20], keep=last)
+
+    >>> # Dictionary-encode string columns with few distinct values -- or those listed -- as categories
+    >>> from(precincts.csv, categorize=auto)
+    >>> from(precincts.csv, categorize=[County, District])
+
+    >>> # Downcast numeric columns to the smallest types that hold their values
+    >>> from(2020_census_NC.csv, compact=auto)
+
+    >>> # Store fixed-width strings of digits -- or those listed -- as integer keys
+    >>> from(2020_census_NC.csv, keys=auto)
+    >>> from(2020_census_NC.csv, keys=[GEOID20])
+
+    >>> # Store numeric columns that are mostly zeroes -- or those listed -- sparsely
+    >>> from(2020_census_NC.csv, sparse=auto)
+
     >>> # Execute a T script with arguments
     >>> from(precincts.t, paf=2020_precinct_assignments_NC.csv, census=2020_census_NC.csv, elections=2020_election_NC.csv)
 
@@ -289,6 +459,10 @@ def _handle_from(cmd: Command, env: Program) -> str:
 
     verb: str = "from"  # HACK - cmd.verb has 'from_'
 
+    # If it ran ahead, use its result -- but not for the commands of a script it runs
+    prefetched: Optional[Prefetched] = env.prefetched
+    env.prefetched = None
+
     try:
         validate_nargs(verb, cmd.n_pos, 1, most=1)  # There is one positional arg
 
@@ -302,7 +476,17 @@ def _handle_from(cmd: Command, env: Program) -> str:
                 call_args = cmd.keyword_args if cmd.n_kw > 0 else dict()
                 env.call_stack.push(Namespace(call_args))
 
-                run_mode(fs.rel_path, env)
+                # Push the memoized result, if the script has been run before
+                run_memoized(
+                    fs.rel_path,
+                    call_args,
+                    env,
+                    lambda: (
+                        run_mode(fs.rel_path, env)[0]
+                        if prefetched is None
+                        else push_prefetched(prefetched, env)
+                    ),
+                )
                 # NOTE - Run mode updates the env/program Table stack
 
                 env.call_stack.pop()
@@ -310,9 +494,69 @@ def _handle_from(cmd: Command, env: Program) -> str:
 
             case _:  # Read table from a file
                 validate_nargs(
-                    verb, cmd.n_kw, 0, most=0, arg_type="keyword"
-                )  # There are no keyword args
-                env.read(fs.rel_path)
+                    verb, cmd.n_kw, 0, most=6, arg_type="keyword"
+                )  # There are at most six keyword args
+                keywords: list[str] = list(cmd.keyword_args.keys())
+                for kw in keywords:
+                    if kw not in [
+                        "distinct",
+                        "keep",
+                        "categorize",
+                        "compact",
+                        "keys",
+                        "sparse",
+                    ]:
+                        raise Exception(f"Invalid keyword argument: {kw}")
+                if "keep" in keywords and "distinct" not in keywords:
+                    raise Exception("'keep' requires 'distinct'")
+
+                distinct: Optional[str] = cmd.keyword_args.get("distinct")
+                on: Optional[list[str]] = (
+                    string_to_list(distinct)
+                    if distinct is not None and distinct != "all"
+                    else None
+                )
+                keep: str = cmd.keyword_args.get("keep", "first")
+                if keep not in ["first", "last"]:
+                    raise Exception(f"Invalid keep option: {keep}")
+
+                categorize: Optional[str] = cmd.keyword_args.get("categorize")
+                categories: bool | list[str] = (
+                    string_to_list(categorize)
+                    if categorize is not None and categorize != "auto"
+                    else categorize == "auto"
+                )
+                compact: Optional[str] = cmd.keyword_args.get("compact")
+                # all is the same as auto
+                compacted: bool | list[str] = (
+                    string_to_list(compact)
+                    if compact is not None and compact not in ["auto", "all"]
+                    else compact in ["auto", "all"]
+                )
+                keys: Optional[str] = cmd.keyword_args.get("keys")
+                keyed: bool | list[str] = (
+                    string_to_list(keys)
+                    if keys is not None and keys != "auto"
+                    else keys == "auto"
+                )
+                sparse: Optional[str] = cmd.keyword_args.get("sparse")
+                sparsified: bool | list[str] = (
+                    string_to_list(sparse)
+                    if sparse is not None and sparse != "auto"
+                    else sparse == "auto"
+                )
+
+                env.read(
+                    fs.rel_path,
+                    distinct=(distinct is not None),
+                    on=on,
+                    keep=keep,
+                    categorize=categories,
+                    compact=compacted,
+                    keys=keyed,
+                    sparse=sparsified,
+                    prefetched=prefetched[0][0] if prefetched is not None else None,
+                )
 
     except Exception as e:
         print_parsing_exception(verb, e)
@@ -503,15 +747,31 @@ def _handle_union(cmd: Command, env: Program) -> str:
     Examples:
 
     >>> union()
+    >>> union(n=5)
+    >>> union(all)
     """
 
     try:
-        # There are no positional args
-        validate_nargs(cmd.verb, cmd.n_pos, 0, most=0)
-        # and no keyword args
-        validate_nargs(cmd.verb, cmd.n_kw, 0, most=0, arg_type="keyword")
+        # There are no positional args, except 'all'
+        validate_nargs(cmd.verb, cmd.n_pos, 0, most=1)
+        # and at most one keyword arg
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=1, arg_type="keyword")
+
+        if cmd.n_pos + cmd.n_kw > 1:
+            raise Exception("Use either 'all' or 'n', not both.")
+        if cmd.n_pos == 1 and cmd.positional_args[0] != "all":
+            raise Exception(f"Invalid argument: {cmd.positional_args[0]}")
+        for kw in cmd.keyword_args:
+            if kw != "n":
+                raise Exception(f"Invalid keyword argument: {kw}")
+
+        n: int = 2
+        if cmd.n_pos == 1:
+            n = env.table_stack.len()
+        elif cmd.n_kw == 1:
+            n = int(cmd.keyword_args["n"])
 
-        env.union()
+        env.union(n)
 
     except Exception as e:
         print_parsing_exception(cmd.verb, e)
@@ -559,6 +819,52 @@ def _handle_groupby(cmd: Command, env: Program) -> str:
     return cmd.verb
 
 
+def _handle_tally(cmd: Command, env: Program) -> str:
+    """Execute a 'tally' command
+
+    Examples:
+
+    >>> tally(by=[District_1, District_2, District_3])
+    >>> tally(by=[District_1, District_2], only=[Total, D_votes, R_votes], names=(Map, CD))
+    """
+
+    try:
+        # There are no positional args
+        validate_nargs(cmd.verb, cmd.n_pos, 0, most=0)
+        # and one or more keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 1, arg_type="keyword")
+
+        keywords: list[str] = list(cmd.keyword_args.keys())
+        if "by" not in keywords:
+            raise Exception("Missing 'by' keyword argument")
+        for kw in keywords:
+            if kw not in ["by", "only", "names"]:
+                raise Exception(f"Invalid keyword argument: {kw}")
+
+        by: list[str] = string_to_list(cmd.keyword_args["by"])
+        only: list[str] | None = (
+            string_to_list(cmd.keyword_args["only"]) if "only" in keywords else None
+        )
+
+        names: Optional[tuple[str, str]] = None
+        if "names" in keywords:
+            if not isidpair(cmd.keyword_args["names"]):
+                raise Exception(f"Invalid names argument: {cmd.keyword_args['names']}")
+            temp: tuple[str, str] | str = split_col_spec_string(
+                cmd.keyword_args["names"]
+            )
+            assert isinstance(temp, tuple)
+            names = temp
+
+        env.tally(by=by, only=only, names=names)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
 # Row verbs
 
 
@@ -750,6 +1056,87 @@ def _handle_first(cmd: Command, env: Program) -> str:
     return cmd.verb
 
 
+def _handle_top(cmd: Command, env: Program) -> str:
+    """Execute a 'top' command
+
+    Examples:
+
+    >>> top(10, by=(Total, DESC))
+    >>> top(3, by=[(Total, DESC), GEOID20], within=[County])
+    """
+
+    try:
+        # There is one positional arg
+        validate_nargs(cmd.verb, cmd.n_pos, 1, most=1)
+        # And one or two keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 1, most=2, arg_type="keyword")
+
+        keywords: list[str] = list(cmd.keyword_args.keys())
+        if "by" not in keywords:
+            raise Exception("Missing 'by' keyword argument")
+        for kw in keywords:
+            if kw not in ["by", "within"]:
+                raise Exception(f"Invalid keyword argument: {kw}")
+
+        n: int = int(cmd.positional_args[0])
+
+        by: str = cmd.keyword_args["by"]
+        sort_args: list[str] = (
+            split_args_string(by[1:-1]) if isstringifiedlist(by) else [by]
+        )
+        for v in sort_args:
+            if not isidentifier(v) and not isidpair(v):
+                raise Exception(f"Invalid sort argument: {v}")
+        col_specs: list = [split_col_spec_string(arg) for arg in sort_args]
+
+        within: list[str] | None = (
+            string_to_list(cmd.keyword_args["within"]) if "within" in keywords else None
+        )
+
+        env.top(n, col_specs, within)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
+def _handle_distinct(cmd: Command, env: Program) -> str:
+    """Execute a 'distinct' command
+
+    Examples:
+
+    >>> distinct()
+    >>> distinct(on=[GEOID20])
+    >>> distinct(on=[County, District], keep=last)
+    """
+
+    try:
+        # There are no positional args
+        validate_nargs(cmd.verb, cmd.n_pos, 0, most=0)
+        # And zero to two keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=2, arg_type="keyword")
+
+        keywords: list[str] = list(cmd.keyword_args.keys())
+        for kw in keywords:
+            if kw not in ["on", "keep"]:
+                raise Exception(f"Invalid keyword argument: {kw}")
+
+        on: list[str] | None = (
+            string_to_list(cmd.keyword_args["on"]) if "on" in keywords else None
+        )
+        keep: str = cmd.keyword_args.get("keep", "first")
+
+        env.distinct(on, keep)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
 def _handle_last(cmd: Command, env: Program) -> str:
     """Execute a 'last' command
 
@@ -819,6 +1206,9 @@ def _handle_cast(cmd: Command, env: Program) -> str:
 
     >>> cast([GEOID20], string)
     >>> cast([Total], int64)
+    >>> cast([Total, White, Black], compact)
+    >>> cast([GEOID20], key)
+    >>> cast([PacC_2010_tot, NatC_2010_tot], sparse)
     """
 
     try:
@@ -829,7 +1219,7 @@ def _handle_cast(cmd: Command, env: Program) -> str:
 
         col_names: list[str] = string_to_list(cmd.positional_args[0])
         dtype: str = cmd.positional_args[1]
-        if dtype not in PD_TYPES:
+        if dtype not in CAST_TYPES:
             raise Exception(f"Invalid Pandas dtype: {dtype}")
 
         env.cast(col_names, dtype)
@@ -870,6 +1260,29 @@ def _handle_show(cmd: Command, env: Program) -> str:
     return cmd.verb
 
 
+def _handle_stack(cmd: Command, env: Program) -> str:
+    """Execute a 'stack' command
+
+    Example:
+
+    >>> stack()
+    """
+
+    try:
+        # There are no positional args
+        validate_nargs(cmd.verb, cmd.n_pos, 0)
+        # And no keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=0, arg_type="keyword")
+
+        env.stack()
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
 def _handle_history(cmd: Command, env: Program) -> str:
     """Execute a 'history' command
 
@@ -924,9 +1337,110 @@ def _handle_inspect(cmd: Command, env: Program) -> str:
     return cmd.verb
 
 
+def _handle_explain(cmd: Command, env: Program) -> str:
+    """Execute an 'explain' command
+
+    Example:
+
+    >>> explain(precincts.t, paf=2020_precinct_assignments_NC.csv, census=2020_census_NC.csv, elections=2020_election_NC.csv)
+    """
+
+    try:
+        # There is one positional arg, the script
+        validate_nargs(cmd.verb, cmd.n_pos, 1, most=1)
+
+        name: str = cmd.positional_args[0].strip("'")
+        if FileSpec(name).extension != ".t":
+            raise Exception("Only T scripts can be explained.")
+
+        # Any keyword args are passed to the script
+        env.explain(name, cmd.keyword_args)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
 # Stack operations
 
 
+def _handle_materialize(cmd: Command, env: Program) -> str:
+    """Execute a 'materialize' command
+
+    Example:
+
+    >>> materialize()
+    """
+
+    try:
+        # There are no positional args
+        validate_nargs(cmd.verb, cmd.n_pos, 0)
+        # And no keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=0, arg_type="keyword")
+
+        env.materialize()
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
+def _handle_save_session(cmd: Command, env: Program) -> str:
+    """Execute a 'save_session' command
+
+    Example:
+
+    >>> save_session(census.session)
+    """
+
+    try:
+        # There is one positional arg
+        validate_nargs(cmd.verb, cmd.n_pos, 1, most=1)
+        # And no keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=0, arg_type="keyword")
+
+        filename: str = cmd.positional_args[0].strip("'")
+        could_be_filename(filename)
+
+        env.save_session(filename)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
+def _handle_load_session(cmd: Command, env: Program) -> str:
+    """Execute a 'load_session' command
+
+    Example:
+
+    >>> load_session(census.session)
+    """
+
+    try:
+        # There is one positional arg
+        validate_nargs(cmd.verb, cmd.n_pos, 1, most=1)
+        # And no keyword args
+        validate_nargs(cmd.verb, cmd.n_kw, 0, most=0, arg_type="keyword")
+
+        filename: str = cmd.positional_args[0].strip("'")
+        could_be_filename(filename)
+
+        env.load_session(filename)
+
+    except Exception as e:
+        print_parsing_exception(cmd.verb, e)
+        return ERROR
+
+    return cmd.verb
+
+
 def _handle_clear(cmd: Command, env: Program) -> str:
     """Execute a 'clear' command
 
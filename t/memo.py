@@ -0,0 +1,319 @@
+# memo.py
+#!/usr/bin/env python3
+
+"""
+MEMO - Memoize the results of scripts run with from(script.t, ...)
+
+Running a script pushes tables onto the stack. When the same script is run
+again with the same arguments -- and neither it, the user-defined functions,
+nor the files it reads have changed -- push copies of the tables it pushed
+the first time instead of running it again.
+
+Results are kept in memory, least-recently-used within a memory cap, and,
+optionally, in a cache directory on disk across runs. When the stack is over
+its memory budget and spills tables, the results in memory are released.
+
+Scripts aren't memoized if they do more than push tables: if they write or
+display anything, sample rows at random, or use tables that were on the stack
+before they ran.
+"""
+
+import os
+import copy
+import glob
+import pickle
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, Optional
+
+from .datamodel import Table
+from .reader import DISPLAY_VERBS
+from .readwrite import FileSpec
+from .utils import split_verb_and_args
+
+# Verbs with effects other than the tables they push
+IMPURE_VERBS: list[str] = DISPLAY_VERBS + [
+    "history",
+    "explain",
+    "sample",
+    "load_session",
+    "materialize",
+]
+
+MAX_ENTRIES: int = 32  # Results kept in memory, most recent
+MEMO_BYTES: int = 256 * 1024**2  # The memory they can use
+CACHE_VERSION: int = 4  # Bump to invalidate results cached on disk
+
+Fingerprint = Optional[tuple[int, int]]  # size & modification time, or None if missing
+
+
+class Entry:
+    """The memoized result of running a script"""
+
+    tables: list[Table]  # bottom first
+    deps: dict[str, Fingerprint]  # the files it read, & their fingerprints
+    globs: dict[str, list[str]]  # the patterns it read, & the files they matched
+    n_bytes: int
+
+    def __init__(
+        self,
+        tables: list[Table],
+        deps: dict[str, Fingerprint],
+        globs: Optional[dict[str, list[str]]] = None,
+    ) -> None:
+        self.tables = tables
+        self.deps = deps
+        self.globs = globs or dict()
+        self.n_bytes = sum(table.n_bytes() for table in tables)
+
+    def isvalid(self) -> bool:
+        return all(fingerprint(path) == fp for path, fp in self.deps.items()) and all(
+            matches(pattern) == paths for pattern, paths in self.globs.items()
+        )
+
+
+class Recording:
+    """The files a running script reads, and whether its result can be memoized"""
+
+    floor: int  # the number of tables on the stack when the script started
+    paths: set[str]
+    patterns: set[str]  # globs, which a new file can match
+    memoizable: bool
+
+    def __init__(self, floor: int) -> None:
+        self.floor = floor
+        self.paths = set()
+        self.patterns = set()
+        self.memoizable = True
+
+
+# Shared by all programs in the process -- & the threads of a server
+_entries: dict[str, Entry] = dict()
+_n_bytes: int = 0
+_lock: threading.Lock = threading.Lock()
+
+
+class Memo:
+    """Memoize script results for a program"""
+
+    dir: Optional[str]
+    recordings: list[Recording]  # for the scripts that are running, innermost last
+
+    def __init__(self, dir: Optional[str] = None) -> None:
+        self.dir = dir
+        self.recordings = list()
+
+    def record(self, *paths: str) -> None:
+        """Note files that the running scripts depend on"""
+
+        for recording in self.recordings:
+            recording.paths.update(os.path.abspath(path) for path in paths)
+
+    def record_glob(self, pattern: str, paths: list[str]) -> None:
+        """Note a pattern -- & the files it matches -- that the running scripts read"""
+
+        self.record(*paths)
+        for recording in self.recordings:
+            recording.patterns.add(os.path.abspath(pattern))
+
+    def taint(self) -> None:
+        """Note that none of the running scripts can be memoized"""
+
+        for recording in self.recordings:
+            recording.memoizable = False
+
+    def reach(self, depth: int) -> None:
+        """Note that an operation uses the tables on the stack above this depth
+
+        Scripts that use tables that were on the stack before they started can't
+        be memoized.
+        """
+
+        for recording in self.recordings:
+            if depth < recording.floor:
+                recording.memoizable = False
+
+    @contextmanager
+    def recording(self, floor: int) -> Generator[Recording, None, None]:
+        with self.tracking(Recording(floor)) as recording:
+            yield recording
+
+    @contextmanager
+    def tracking(self, recording: Recording) -> Generator[Recording, None, None]:
+        """Note the files read in a recording, while in the context"""
+
+        self.recordings.append(recording)
+        try:
+            yield recording
+        finally:
+            self.recordings.pop()
+
+    def lookup(self, key: str) -> Optional[Entry]:
+        with _lock:
+            entry: Optional[Entry] = _entries.get(key)
+
+        if entry is None and self.dir:
+            try:
+                with open(self._cache_path(key), "rb") as f:
+                    entry = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                entry = None
+
+        if entry is None or not entry.isvalid():
+            return None
+
+        keep(key, entry)  # Most recently used
+
+        return entry
+
+    def store(self, key: str, entry: Entry) -> None:
+        keep(key, entry)
+
+        if self.dir:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self._cache_path(key), "wb") as f:
+                pickle.dump(entry, f)
+
+    def _cache_path(self, key: str) -> str:
+        assert self.dir is not None
+        return os.path.join(self.dir, key + ".pkl")
+
+
+def run_memoized(
+    rel_path: str, call_args: dict, env: Any, run: Callable[[], bool]
+) -> bool:
+    """Run a script -- or push its memoized result. Return whether it exited with errors."""
+
+    from .lang import read_script  # lang imports this module
+
+    memo: Memo = env.memo
+    script_path: str = FileSpec(env.src + rel_path if env.src else rel_path).abs_path
+    memo.record(script_path)
+
+    commands: list[str]
+    commands, _ = read_script(script_path)
+    if not all(ispure(command) for command in commands):
+        memo.taint()
+        return run()
+
+    key: str = memo_key(script_path, call_args, env)
+
+    entry: Optional[Entry] = memo.lookup(key)
+    if entry is not None:
+        memo.record(*entry.deps.keys())
+        for pattern, paths in entry.globs.items():
+            memo.record_glob(pattern, paths)
+        for table in entry.tables:
+            env.table_stack.push(copy.deepcopy(table))
+        env._update_table_shortcuts()
+
+        return False
+
+    floor: list[Table] = list(env.table_stack._queue_)
+
+    with memo.recording(len(floor)) as recording:
+        exit: bool = run()
+
+    # Push the tables the script read on to the scripts that called it
+    memo.record(*recording.paths)
+    for pattern in recording.patterns:
+        memo.record_glob(pattern, [])
+
+    n_pushed: int = env.table_stack.len() - len(floor)
+    below: list[Table] = list(env.table_stack._queue_)[max(n_pushed, 0) :]
+    untouched: bool = n_pushed >= 0 and all(a is b for a, b in zip(below, floor))
+
+    if not exit and recording.memoizable and untouched:
+        tables: list[Table] = env.table_stack.top_n(n_pushed)
+        tables.reverse()  # Bottom first
+        deps: dict[str, Fingerprint] = {
+            path: fingerprint(path) for path in sorted(recording.paths)
+        }
+        globs: dict[str, list[str]] = {
+            pattern: matches(pattern) for pattern in sorted(recording.patterns)
+        }
+        memo.store(key, Entry(tables, deps, globs))
+
+    return exit
+
+
+def clear() -> None:
+    """Forget the results memoized in memory, e.g., to time scripts from scratch,
+    or to free their memory when the stack is over its budget
+    """
+
+    global _n_bytes
+
+    with _lock:
+        _entries.clear()
+        _n_bytes = 0
+
+
+def keep(key: str, entry: Entry) -> None:
+    """Keep a result in memory, evicting the least recently used to stay under the caps"""
+
+    global _n_bytes
+
+    with _lock:
+        old: Optional[Entry] = _entries.pop(key, None)
+        if old is not None:
+            _n_bytes -= old.n_bytes
+        if entry.n_bytes > MEMO_BYTES:
+            return  # It would evict everything else
+
+        _entries[key] = entry
+        _n_bytes += entry.n_bytes
+        while len(_entries) > MAX_ENTRIES or _n_bytes > MEMO_BYTES:
+            _n_bytes -= _entries.pop(next(iter(_entries))).n_bytes
+
+
+### HELPERS ###
+
+
+def memo_key(script_path: str, call_args: dict, env: Any) -> str:
+    """Key a script's result by its text, args, UDFs, & where it looks for files"""
+
+    with open(script_path, "rb") as f:
+        text: bytes = f.read()
+
+    udf: Fingerprint = fingerprint(env.user) if env.user else None
+
+    parts: list[Any] = [
+        CACHE_VERSION,
+        hashlib.sha256(text).hexdigest(),
+        sorted((str(k), str(v)) for k, v in call_args.items()),
+        env.user,
+        udf,
+        env.src,
+        env.data,
+        env._preview_rows(),  # Previews aren't the full results
+    ]
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def ispure(command: str) -> bool:
+    """Does a command only push tables on the stack?"""
+
+    try:
+        verb: str = split_verb_and_args(command)[0].lower()
+    except:
+        return False
+
+    return verb not in IMPURE_VERBS
+
+
+def matches(pattern: str) -> list[str]:
+    return sorted(glob.glob(pattern))
+
+
+def fingerprint(path: str) -> Fingerprint:
+    try:
+        stat: os.stat_result = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+
+
+### END ###
@@ -0,0 +1,164 @@
+# memory.py
+#!/usr/bin/env python3
+
+"""
+MEMORY - Record the memory each command uses, to find what exhausts it
+
+For each command, record:
+
+- rss_peak: the high-water mark of the process's resident memory, after it
+- rss_growth: how much it raised that high-water mark
+- allocated: the net memory Python allocated, per tracemalloc
+- peak_allocated: the most it allocated along the way, over what it started with
+- stack_tables & stack_bytes: the tables left on the stack & their shallow
+  memory -- strings count just their pointers -- so measuring it doesn't scan
+  the data after every command
+
+Each command is written to a CSV file as it finishes, and the file is flushed,
+so the log survives the process being killed for running out of memory. Then
+the command that was running is the one after the last one logged.
+
+Tracing allocations with tracemalloc slows Python down, so this is opt-in.
+"""
+
+import sys
+import csv
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Generator, Optional, TextIO
+
+FIELDS: list[str] = [
+    "command",
+    "depth",
+    "rows",
+    "cols",
+    "rss_peak",
+    "rss_growth",
+    "allocated",
+    "peak_allocated",
+    "stack_tables",
+    "stack_bytes",
+]
+
+
+class MemoryRecord:
+    """The memory measurements for a command that's running"""
+
+    command: str
+    rss_start: Optional[int]
+    traced_start: int
+    peak: int  # the peak traced memory seen so far, including nested commands
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.rss_start = rss_peak()
+        self.traced_start = tracemalloc.get_traced_memory()[0]
+        self.peak = self.traced_start
+
+
+class MemoryMonitor:
+    """Log the memory used by each command a program runs"""
+
+    records: list[MemoryRecord]  # the commands that are running, innermost last
+    _file: TextIO
+    _writer: Any
+
+    def __init__(self, rel_path: str) -> None:
+        self.records = list()
+        self._file = open(rel_path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(FIELDS)
+        self._file.flush()
+
+        tracemalloc.start()
+
+    @contextmanager
+    def command(self, command: str, env: Any) -> Generator[None, None, None]:
+        """Measure the memory a command uses"""
+
+        if self.records:
+            # Save the outer command's peak, before resetting it for this one
+            outer: MemoryRecord = self.records[-1]
+            outer.peak = max(outer.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        record: MemoryRecord = MemoryRecord(command)
+        self.records.append(record)
+        try:
+            yield
+        finally:
+            self.records.pop()
+
+            current: int
+            peak: int
+            current, peak = tracemalloc.get_traced_memory()
+            record.peak = max(record.peak, peak)
+            if self.records:
+                self.records[-1].peak = max(self.records[-1].peak, record.peak)
+
+            self._log(record, current, env)
+
+    def close(self) -> None:
+        tracemalloc.stop()
+        self._file.close()
+
+    def _log(self, record: MemoryRecord, current: int, env: Any) -> None:
+        rss: Optional[int] = rss_peak()
+        tables: list[Any] = env.table_stack.top_n(env.table_stack.len())
+        top: Optional[Any] = tables[0] if tables else None
+
+        values: dict[str, Any] = dict(
+            command=record.command,
+            depth=len(self.records),
+            rows=top.n_rows if top is not None else "",
+            cols=top.n_cols if top is not None else "",
+            rss_peak=rss if rss is not None else "",
+            rss_growth=(
+                rss - record.rss_start
+                if (rss is not None and record.rss_start is not None)
+                else ""
+            ),
+            allocated=current - record.traced_start,
+            peak_allocated=record.peak - record.traced_start,
+            stack_tables=len(tables),
+            stack_bytes=stack_memory(tables, deep=False),
+        )
+
+        self._writer.writerow([values[field] for field in FIELDS])
+        self._file.flush()
+
+        # Also record the measurements in the trace, if tracing
+        tracer: Any = env.tracer
+        if tracer is not None and tracer.records:
+            tracer.records[-1].args.update(
+                {
+                    k: v
+                    for k, v in values.items()
+                    if k not in ["command", "depth", "rows", "cols"]
+                }
+            )
+
+
+### HELPERS ###
+
+
+def rss_peak() -> Optional[int]:
+    """The high-water mark of the process's resident memory, in bytes, if known"""
+
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes vs. KB
+
+
+def stack_memory(tables: list[Any], deep: bool = True) -> int:
+    """The memory held by tables on the stack. With deep, include the contents of strings, etc."""
+
+    return sum(table.n_bytes(deep=deep) for table in tables)
+
+
+### END ###
@@ -0,0 +1,141 @@
+# optimize.py
+#!/usr/bin/env python3
+
+"""
+OPTIMIZE - Analyze the commands in a script before running them
+"""
+
+from typing import Optional
+
+from .commands import Command, Namespace, isidentifier
+from .utils import tokenize, split_verb_and_args
+
+
+# Verbs that only reference columns of the top table, and only by naming them in their args
+COLUMN_LOCAL_VERBS: list[str] = [
+    "keep",
+    "drop",
+    "rename",
+    "alias",
+    "derive",
+    "select",
+    "cast",
+    "sort",
+    "first",
+    "last",
+    "top",
+    "sample",
+]
+
+
+def bind_command(command: str, scriptargs: Namespace) -> Optional[tuple[str, str]]:
+    """Bind a command's script args & return its verb and args string, or None if it doesn't parse."""
+
+    try:
+        cmd: Command = Command(command, scriptargs)
+        bound: str = cmd.bind()
+
+        return split_verb_and_args(bound)
+    except:
+        return None
+
+
+def referenced_names(args_str: str) -> set[str]:
+    """The identifiers in a command's args string, i.e., potential column references"""
+
+    return {tok for tok in tokenize(args_str) if isidentifier(tok)}
+
+
+### AGGREGATION PRUNING ###
+
+
+def prune_groupby_outputs(
+    commands: list[str], scriptargs: Namespace
+) -> dict[int, set[str]]:
+    """Find the aggregated columns that the commands after each 'groupby' use.
+
+    Scan forward from each 'groupby' until a 'keep' narrows the table's columns.
+    Everything named along the way is potentially used. Anything else -- a join,
+    a display verb, another table on the stack, the end of the script -- could
+    observe every column, so the 'groupby' is left alone.
+
+    Returns a map from the index of a prunable 'groupby' to the names used after it.
+    """
+
+    bound: list[Optional[tuple[str, str]]] = [
+        bind_command(command, scriptargs) for command in commands
+    ]
+
+    used_by: dict[int, set[str]] = dict()
+
+    for i, parsed in enumerate(bound):
+        if parsed is None or parsed[0] != "groupby":
+            continue
+
+        used: set[str] = set()
+        for later in bound[i + 1 :]:
+            if later is None or later[0] not in COLUMN_LOCAL_VERBS:
+                break
+
+            verb: str
+            args_str: str
+            verb, args_str = later
+            used |= referenced_names(args_str)
+
+            if verb == "keep":
+                used_by[i] = used
+                break
+
+    return used_by
+
+
+### SORT FUSION ###
+
+
+def fuse_sort_first(commands: list[str]) -> list[str]:
+    """Rewrite each 'sort' immediately followed by 'first(n)' as one 'top' command.
+
+    For example, 'sort((Total, DESC))' followed by 'first(10)' becomes
+    'top(10, by=[(Total, DESC)])'. Sorts are stable, so the result is the same;
+    'top' just avoids sorting the rows that don't make the cut.
+
+    A 'first' with a percentage or a script arg is left alone.
+    """
+
+    fused: list[str] = list()
+
+    i: int = 0
+    while i < len(commands):
+        command: str = commands[i]
+
+        if i + 1 < len(commands):
+            this: Optional[tuple[str, str]] = _split_command(command)
+            following: Optional[tuple[str, str]] = _split_command(commands[i + 1])
+
+            if (
+                this is not None
+                and following is not None
+                and this[0] == "sort"
+                and following[0] == "first"
+                and following[1].strip().isdigit()
+            ):
+                fused.append(f"top({following[1].strip()}, by=[{this[1]}])")
+                i += 2
+                continue
+
+        fused.append(command)
+        i += 1
+
+    return fused
+
+
+def _split_command(command: str) -> Optional[tuple[str, str]]:
+    """Split an unbound command into its verb and args string, or None"""
+
+    try:
+        return split_verb_and_args(command.strip())
+    except:
+        return None
+
+
+### END ###
@@ -0,0 +1,435 @@
+# plan.py
+#!/usr/bin/env python3
+
+"""
+PLAN - Run the commands in a script lazily
+
+Instead of running each command as soon as it's read, record it in a plan.
+Run the plan only when something observes its results -- 'write', 'show',
+'inspect', reading another table or script, any other command that isn't a
+table or stack operation, or the end of the script.
+
+Before running a plan, rewrite it into one that produces the same tables with
+less work. Every command copies the top table and recomputes its stats, so
+fewer, cheaper commands add up:
+
+- Eliminate 'derive' commands whose columns are dropped before they're used
+- Move 'select' commands ahead of 'derive' commands they don't depend on
+- Fuse consecutive 'keep' & 'drop' commands, and consecutive 'rename' commands
+- Run a 'select' that follows an inner 'join' on the one input table it
+  references, before the join. Whether that's legal depends on the columns of
+  the input tables, so it's decided when the plan runs.
+
+Rewriting can eliminate commands, so before it does, the column references of
+the commands are checked against the columns of the top table, as they'd be
+when the commands ran. Commands that change the columns in other ways -- e.g.,
+'join' or 'groupby' -- end a run of commands that are checked & rewritten
+together. If a reference isn't valid, the commands run as written, so the
+script fails just as it would if they weren't deferred.
+
+"""
+
+import contextlib
+import io
+from typing import Any, Optional
+
+from .commands import Command, Namespace, isidentifier
+from .program import Program
+from .reader import STACK_VERBS
+from .optimize import referenced_names
+from .expressions import has_valid_col_refs, has_valid_refs
+from .udf import UDF
+from .utils import tokenize, split_col_spec_string
+
+# Table & stack operations that can wait until their results are observed
+DEFERRABLE_VERBS: list[str] = [
+    "keep",
+    "drop",
+    "rename",
+    "alias",
+    "derive",
+    "select",
+    "cast",
+    "sort",
+    "first",
+    "last",
+    "top",
+    "distinct",
+    "sample",
+    "groupby",
+    "tally",
+    "join",
+    "union",
+    "duplicate",
+] + STACK_VERBS
+
+# Verbs that only touch the columns of the top table that they name
+NAMED_COLUMN_VERBS: list[str] = [
+    "keep",
+    "drop",
+    "rename",
+    "alias",
+    "derive",
+    "select",
+    "cast",
+    "sort",
+    "first",
+    "last",
+    "top",
+    "sample",
+]
+
+# Verbs whose effect on the columns of the top table is known before they run
+CHECKED_VERBS: list[str] = NAMED_COLUMN_VERBS + ["distinct", "duplicate"]
+
+
+class Step:
+    """One command in a plan"""
+
+    command: str
+    verb: str
+    positional_args: list[str]
+    keyword_args: dict[str, str]
+    used_outputs: Optional[set[str]]
+
+    def __init__(
+        self,
+        command: str,
+        scriptargs: Namespace,
+        used_outputs: Optional[set[str]] = None,
+    ) -> None:
+        cmd: Command = Command(command, scriptargs)
+        cmd.bind()
+        cmd.parse()
+
+        self.command = command
+        self.verb = cmd.verb
+        self.positional_args = cmd.positional_args
+        self.keyword_args = cmd.keyword_args
+        self.used_outputs = used_outputs
+
+    @classmethod
+    def rewrite(cls, verb: str, args: list[str]) -> "Step":
+        """Make a new step from a verb and bound args"""
+
+        return cls(f"{verb}({', '.join(args)})", Namespace({}))
+
+    def names(self) -> set[str]:
+        """The identifiers in the step's args, i.e., potential column references"""
+
+        names: set[str] = set()
+        for arg in self.positional_args + list(self.keyword_args.values()):
+            names |= referenced_names(arg)
+
+        return names
+
+
+class Plan:
+    """A plan of deferred commands for a program"""
+
+    env: Program
+    steps: list[Step]
+
+    def __init__(self, env: Program) -> None:
+        self.env = env
+        self.steps = list()
+
+    def defer(self, command: str, used_outputs: Optional[set[str]] = None) -> bool:
+        """Add a command to the plan, if it can wait. Return whether it was added."""
+
+        try:
+            step: Step = Step(command, self.env.call_stack.first(), used_outputs)
+        except:
+            return False  # Let the interpreter report the error
+
+        if step.verb not in DEFERRABLE_VERBS:
+            return False
+
+        self.steps.append(step)
+
+        return True
+
+    def run(self) -> bool:
+        """Optimize & run the deferred commands. Return False if any of them fail."""
+
+        pending: list[Step] = self.steps
+        self.steps = list()
+
+        while pending:
+            n: Optional[int] = self._checked(pending)
+            steps: list[Step]
+            if n is None:
+                steps, pending = pending, list()  # Fail as if they weren't deferred
+            elif n == 0:
+                steps, pending = pending[:1], pending[1:]
+            else:
+                steps, pending = optimize_plan(pending[:n]), pending[n:]
+
+            for step in steps:
+                if not self._run_step(step, pending):
+                    return False
+
+        return True
+
+    def _run_step(self, step: Step, pending: list[Step]) -> bool:
+        """Run a step. Return False if it fails."""
+
+        from .lang import interpret, ERROR  # lang imports this module
+
+        # Run the selects right after an inner join on its inputs instead
+        while step.verb == "join" and pending:
+            side: Optional[str] = self._select_side(step, pending[0])
+            if side is None:
+                break
+
+            select: str = pending.pop(0).command
+            pushed: list[str] = (
+                [select] if side == "x" else ["swap()", select, "swap()"]
+            )
+            for command in pushed:
+                if interpret(command, self.env) == ERROR:
+                    return False
+
+        self.env.used_outputs = step.used_outputs
+        result: str = interpret(step.command, self.env)
+        self.env.used_outputs = None
+
+        return result != ERROR
+
+    def _checked(self, steps: list[Step]) -> Optional[int]:
+        """How many of the first steps can be rewritten together, with their column references checked
+
+        None, if one of the references isn't valid.
+        """
+
+        if self.env.table_stack.len() < 1:
+            return 0
+
+        udf: Optional[UDF] = None
+        if self.env.user and any(step.verb == "derive" for step in steps):
+            udf = UDF(self.env.user)
+
+        cols: list[str] = self.env.table_stack.first().col_names()
+        for i, step in enumerate(steps):
+            if step.verb not in CHECKED_VERBS:
+                return i
+
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    cols = check_step(step, cols, udf)
+            except:
+                return None
+
+        return len(steps)
+
+    def _select_side(self, join: Step, select: Step) -> Optional[str]:
+        """The input table -- x (top) or y (second) -- a 'select' after a 'join' can run on first
+
+        Only for inner joins without validation, when every name in the
+        select expression is a column of that table and not of the other one.
+        """
+
+        if select.verb != "select":
+            return None
+        if join.keyword_args.get("how", "inner").lower() != "inner":
+            return None
+        if "validate" in join.keyword_args:
+            return None
+        if self.env.table_stack.len() < 2:
+            return None
+
+        x_cols: set[str] = set(self.env.table_stack.first().col_names())
+        y_cols: set[str] = set(self.env.table_stack.second().col_names())
+        names: set[str] = select.names()
+
+        if not names:
+            return None
+        if names <= x_cols and not (names & y_cols):
+            return "x"
+        if names <= y_cols and not (names & x_cols):
+            return "y"
+
+        return None
+
+
+### OPTIMIZER ###
+
+
+def optimize_plan(steps: list[Step]) -> list[Step]:
+    """Apply the rewrite rules until none of them apply"""
+
+    steps = list(steps)
+
+    changed: bool = True
+    while changed:
+        changed = False
+        for rule in [eliminate_dead_derives, move_selects_up, fuse_column_ops]:
+            rewritten: Optional[list[Step]] = rule(steps)
+            if rewritten is not None:
+                steps = rewritten
+                changed = True
+
+    return steps
+
+
+def eliminate_dead_derives(steps: list[Step]) -> Optional[list[Step]]:
+    """Remove the first 'derive' whose column is dropped -- or not kept -- before it's used"""
+
+    for i, step in enumerate(steps):
+        if step.verb != "derive":
+            continue
+        name: str = step.positional_args[0]
+
+        for j in range(i + 1, len(steps)):
+            later: Step = steps[j]
+            if later.verb not in NAMED_COLUMN_VERBS:
+                break
+
+            if later.verb == "drop" and name in later.positional_args:
+                others: list[str] = [x for x in later.positional_args if x != name]
+                rewritten: list[Step] = steps[:i] + steps[i + 1 : j]
+                if others:
+                    rewritten.append(Step.rewrite("drop", others))
+
+                return rewritten + steps[j + 1 :]
+
+            if later.verb == "keep" and name not in later.positional_args:
+                return steps[:i] + steps[i + 1 :]
+
+            if name in later.names():
+                break
+
+    return None
+
+
+def move_selects_up(steps: list[Step]) -> Optional[list[Step]]:
+    """Swap the first 'derive' followed by a 'select' that doesn't use the derived column
+
+    Rows are filtered before the new column is computed, rather than after. The
+    derive mustn't call any functions -- aggregate stats or UDFs -- as their
+    results could depend on which rows there are.
+    """
+
+    for i in range(len(steps) - 1):
+        derive: Step = steps[i]
+        select: Step = steps[i + 1]
+
+        if derive.verb != "derive" or select.verb != "select":
+            continue
+        if derive.positional_args[0] in select.names():
+            continue
+        if has_calls(derive.positional_args[1]):
+            continue
+
+        return steps[:i] + [select, derive] + steps[i + 2 :]
+
+    return None
+
+
+def fuse_column_ops(steps: list[Step]) -> Optional[list[Step]]:
+    """Fuse the first pair of consecutive 'keep'/'drop' or 'rename' commands"""
+
+    for i in range(len(steps) - 1):
+        fused: Optional[list[Step]] = fuse_pair(steps[i], steps[i + 1])
+        if fused is not None:
+            return steps[:i] + fused + steps[i + 2 :]
+
+    return None
+
+
+def fuse_pair(first: Step, second: Step) -> Optional[list[Step]]:
+    """Fuse two commands into zero or one, if they can be"""
+
+    a: list[str] = first.positional_args
+    b: list[str] = second.positional_args
+
+    match first.verb, second.verb:
+        case "keep", "keep" if set(b) <= set(a):
+            return [second]
+        case "drop", "drop" if not (set(a) & set(b)):
+            return [Step.rewrite("drop", a + b)]
+        case "keep", "drop" if set(b) <= set(a) and not set(a) <= set(b):
+            return [Step.rewrite("keep", [x for x in a if x not in b])]
+        case "drop", "keep" if not (set(a) & set(b)):
+            return [second]
+        case "rename", "rename":
+            return fuse_renames(first, second)
+
+    return None
+
+
+def fuse_renames(first: Step, second: Step) -> Optional[list[Step]]:
+    """Compose two renames into one, e.g., (a, b) then (b, c) => (a, c)"""
+
+    try:
+        pairs1: list[Any] = [split_col_spec_string(x) for x in first.positional_args]
+        pairs2: list[Any] = [split_col_spec_string(x) for x in second.positional_args]
+        renames1: dict[str, str] = dict(pairs1)
+        renames2: dict[str, str] = dict(pairs2)
+    except:
+        return None
+
+    # The second rename can't rename a column the first one renamed away
+    if (set(renames2.keys()) - set(renames1.values())) & set(renames1.keys()):
+        return None
+
+    composed: dict[str, str] = {a: renames2.get(b, b) for a, b in renames1.items()}
+    for a, b in renames2.items():
+        if a not in renames1.values():
+            composed[a] = b
+    composed = {a: b for a, b in composed.items() if a != b}
+
+    # Renaming a column to a name another column is renamed from can't be done in one step
+    if set(composed.values()) & set(composed.keys()):
+        return None
+
+    args: list[str] = [f"({a}, {b})" for a, b in composed.items()]
+
+    return [Step.rewrite("rename", args)] if args else []
+
+
+### HELPERS ###
+
+
+def check_step(step: Step, cols: list[str], udf: Optional[UDF] = None) -> list[str]:
+    """Check the column references of a step. Return the columns of the table it makes."""
+
+    args: list[str] = [x.strip() for x in step.positional_args]
+
+    match step.verb:
+        case "keep" | "drop":
+            are_cols(args, cols)
+            return args if step.verb == "keep" else [x for x in cols if x not in args]
+        case "rename" | "alias":
+            renames: dict[str, str] = dict(split_col_spec_string(x) for x in args)
+            are_cols(list(renames.keys()), cols)
+            return [renames.get(x, x) for x in cols]
+        case "derive":
+            has_valid_refs(tokenize(args[1]), cols, udf)
+            return cols if args[0] in cols else cols + [args[0]]
+        case "select":
+            has_valid_col_refs(tokenize(args[0]), cols)
+
+    return cols
+
+
+def are_cols(names: list[str], cols: list[str]) -> None:
+    """Raise an exception if any of the names isn't a column"""
+
+    for name in names:
+        if name not in cols:
+            raise Exception("Column {0} not in table.".format(name))
+
+
+def has_calls(expr: str) -> bool:
+    """Does an expression call any functions, e.g., sum(Total) or a UDF?"""
+
+    tokens: list[str] = tokenize(expr)
+
+    return any(
+        isidentifier(tok) and i + 1 < len(tokens) and tokens[i + 1] == "("
+        for i, tok in enumerate(tokens)
+    )
+
+
+### END ###
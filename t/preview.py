@@ -0,0 +1,128 @@
+# preview.py
+#!/usr/bin/env python3
+
+"""
+PREVIEW - Run REPL commands on previews of tables, & on the full tables only when needed
+
+In the REPL, each command shows just the first few rows of its result, but it
+computes all of them. In preview mode, from() reads just the first rows of a
+file -- or a random sample of them -- and every command runs on those, so it's
+immediate.
+
+The commands that change the stack are recorded. When a write() or
+save_session() needs the full tables -- or materialize() asks for them -- the
+commands recorded since the last time are replayed on the full data, in a
+shadow program, and its tables are what's written. So, the full tables are only
+computed when they're needed, & only once.
+
+A write() or save_session() in a script that's run on the previews doesn't
+write anything then. When the top-level command that ran the script finishes,
+it's replayed on the full data, & the script writes the full tables.
+"""
+
+from typing import Any, Optional
+
+from .reader import DISPLAY_VERBS
+from .progress import Cancelled, Snapshot, snapshot
+from .session import restore
+
+# Commands that don't change the stack, so they aren't replayed
+NOT_REPLAYED: list[str] = DISPLAY_VERBS + ["history", "explain", "materialize"]
+
+
+class Preview:
+    """Preview the tables read, & replay the commands on the full ones when needed"""
+
+    rows: int
+    sample: bool  # a random sample of rows, instead of the first ones
+    depth: int  # the depth of the call stack at the top level
+    commands: list[str]  # not yet replayed on the full tables
+    shadow: Optional[Any]  # the Program with the full tables
+    deferred: bool  # a script skipped writing a file, on the previews
+
+    def __init__(self, rows: int, sample: bool = False, depth: int = 1) -> None:
+        if rows < 1:
+            raise ValueError("Previews need at least one row.")
+
+        self.rows = rows
+        self.sample = sample
+        self.depth = depth
+        self.commands = list()
+        self.shadow = None
+        self.deferred = False
+
+    def label(self) -> str:
+        return f"{'a sample' if self.sample else 'the first'} of {self.rows:,} rows"
+
+    def istop(self, env: Any) -> bool:
+        """Is a command at the top level, i.e., not in a script?"""
+
+        return env.call_stack.len() <= self.depth
+
+    def record(self, command: str, verb: str) -> None:
+        """Record a command that the REPL ran on the previews"""
+
+        if verb == "clear":
+            self.commands = list()  # The commands before don't matter
+
+        if verb.strip("_") not in NOT_REPLAYED:
+            self.commands.append(command)
+
+    def defer(self) -> None:
+        """Write a file in a script on the full tables, when its command finishes"""
+
+        self.deferred = True
+
+    def flush(self, env: Any) -> None:
+        """Replay the commands recorded, if a script skipped writing a file"""
+
+        if not self.deferred:
+            return
+
+        self.deferred = False
+        full: Any = self.replay(env)
+        env.written.extend(w for w in full.written if w not in env.written)
+
+    def replay(self, env: Any) -> Any:
+        """Replay the commands recorded on the full tables. Return the program with them."""
+
+        # The program imports this module
+        from .lang import interpret, ERROR
+        from .program import Program
+
+        if self.shadow is None:
+            self.shadow = Program(
+                user=env.user,
+                src=env.src,
+                data=env.data,
+                output=env.output,
+                log=env.log,
+                repl=False,
+                silent=True,
+            )
+            self.shadow.call_stack.clear()
+            for namespace in reversed(env.call_stack._queue_):
+                self.shadow.call_stack.push(namespace)
+            self.shadow.spiller = env.spiller
+
+        if self.commands:
+            print(f"Replaying {len(self.commands)} command(s) on the full data ...")
+
+        while self.commands:
+            command: str = self.commands[0]
+            saved: Snapshot = snapshot(self.shadow)
+            try:
+                result: str = interpret(command, self.shadow)
+            except Cancelled:
+                restore(self.shadow, *saved)  # Replay it again next time
+                raise
+            if result == ERROR:
+                raise Exception(
+                    f"Replaying '{command}' on the full data failed. Use clear() to start over."
+                )
+            self.commands.pop(0)
+
+        return self.shadow
+
+
+### END ###
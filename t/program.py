@@ -14,19 +14,31 @@ from tabulate import tabulate
 from typing import Any, Callable, Optional, Generator
 
 from .constants import STATS_METRICS
-from .utils import value_width
+from .utils import value_width, format_bytes
 from .udf import UDF
-from .readwrite import fns_from_path
+from .readwrite import FileSpec, fns_from_path, is_glob, glob_paths
 from .datamodel import (
     Table,
     Column,
     table_to_csv,
     table_to_json,
+    read_tables,
     MergeHow,
     ValidationOptions,
     PD_DESCRIBE_TYPES,
+    PD_NUMERIC_TYPES,
 )
 from .stack import Stack
+from .memo import Memo, fingerprint, clear as clear_memo
+from .cache import ResultCache, lineage
+from .preview import Preview
+from .explain import explain_script, MAX_COMMAND_WIDTH
+from .trace import Tracer, phase, traced
+from .memory import MemoryMonitor, stack_memory
+from .spill import StackSpiller
+from .schedule import Prefetched
+from .session import save_session, load_session
+from .progress import check
 from .commands import Namespace
 from .verbs import (
     KeepVerb,
@@ -38,11 +50,14 @@ from .verbs import (
     AliasVerb,
     FirstVerb,
     LastVerb,
+    TopVerb,
+    DistinctVerb,
     SampleVerb,
     CastVerb,
     SortVerb,
     JoinVerb,
     GroupByVerb,
+    TallyVerb,
     UnionVerb,
 )
 
@@ -58,27 +73,54 @@ def do_pre_op(required: int = 1) -> Callable[..., Callable[..., Any]]:
 
             if required > 1 and self.table_stack.len() < required:
                 raise Exception("Not enough tables on the stack.")
+            self.memo.reach(self.table_stack.len() - required)
 
-            new_table: Table = func(self, *args, **kwargs)
-
-            return new_table
+            return func(self, *args, **kwargs)
 
         return wrapper
 
     return decorate
 
 
-def do_post_op(pop: int = 1) -> Callable[..., Callable[..., Any]]:
-    """A decorator to take care of housekeeping tasks *after* each operation."""
+def do_post_op(pop: int = 1, cache: bool = True) -> Callable[..., Callable[..., Any]]:
+    """A decorator to take care of housekeeping tasks *after* each operation.
+
+    When caching results (in the REPL), operations that replace the tables they
+    use push the cached result, if they've been run on the same tables before.
+    """
 
     def decorate(func) -> Callable[..., Any]:
         @wraps(func)
         def wrapper(self, *args, **kwargs) -> Any:
+            key: Optional[str] = None
+            if self.cache is not None and pop > 0 and self.table_stack.len() >= pop:
+                key = self._result_key(func.__name__, args, kwargs, pop)
+
+            if cache and key is not None:
+                assert self.cache is not None
+                cached: Optional[Table] = self.cache.lookup(key)
+                if cached is not None:
+                    self.memo.reach(self.table_stack.len() - pop)
+                    self._push_cached(cached, pop)
+                    with phase(self.tracer, "display"):
+                        self._display_table()
+
+                    return cached
+
             new_table: Table = func(self, *args, **kwargs)
             if new_table is None:
                 raise Exception("Command failed. No new table created.")
+            if pop > 0:
+                new_table.lineage = key  # Not the lineage of the table it copied
+            check()  # Don't change the stack, if the command was cancelled
             self._update_stack(new_table, pop)
-            self._display_table()
+
+            if cache and key is not None:
+                assert self.cache is not None
+                self.cache.store(key, new_table)
+
+            with phase(self.tracer, "display"):
+                self._display_table()
 
             return new_table
 
@@ -93,6 +135,8 @@ class Program:
     debug: bool
     repl: bool
     silent: bool
+    lazy: bool
+    jobs: int
     user_functions: dict
     table_stack: Stack
     call_stack: Stack
@@ -103,8 +147,19 @@ class Program:
     log: str
 
     command: str  # current command
-
-    cache: dict
+    used_outputs: Optional[set[str]]  # columns the following commands use, if known
+    prefetched: Optional[
+        Prefetched
+    ]  # the result of the current 'from', if it ran ahead
+
+    cache: Optional[ResultCache]  # if caching command results, in the REPL
+    preview: Optional[Preview]  # if previewing commands on samples, in the REPL
+    timeout: Optional[float]  # seconds before cancelling a command, if any
+    memo: Memo
+    written: list[str]  # the files written, for reporting
+    tracer: Optional[Tracer]  # if tracing commands
+    monitor: Optional[MemoryMonitor]  # if logging the memory commands use
+    spiller: Optional[StackSpiller]  # if the stack has a memory budget
 
     stats: Optional[dict]
     cols: Optional[list[str]]
@@ -125,6 +180,8 @@ class Program:
         self.debug = debug
         self.repl = repl
         self.silent = silent
+        self.lazy = False
+        self.jobs = 1
 
         self.table_stack = Stack()
         self.call_stack = Stack()
@@ -140,7 +197,16 @@ class Program:
         self.log = "logs/history.log" if (log is None) or (log == "") else log
 
         self.command = ""
-        self.cache = dict()
+        self.used_outputs = None
+        self.prefetched = None
+        self.cache = None
+        self.preview = None
+        self.timeout = None
+        self.memo = Memo()
+        self.written = list()
+        self.tracer = None
+        self.monitor = None
+        self.spiller = None
         self._reset_cached_props()
 
     @property
@@ -160,19 +226,99 @@ class Program:
     ### TABLE OPERATIONS ###
 
     @do_post_op(pop=0)
-    def read(self, rel_path: str, field_types=None) -> Table | None:
-        """READ a CSV table from disk and push it onto the stack."""
+    @traced("op")
+    def read(
+        self,
+        rel_path: str,
+        field_types=None,
+        *,
+        distinct: bool = False,
+        on: Optional[list[str]] = None,
+        keep: str = "first",
+        categorize: bool | list[str] = False,
+        compact: bool | list[str] = False,
+        keys: bool | list[str] = False,
+        sparse: bool | list[str] = False,
+        prefetched: Optional[Table] = None,
+    ) -> Table | None:
+        """READ a CSV table from disk and push it onto the stack.
+
+        Optionally, keep only the distinct rows, reading the file a chunk at a time.
+
+        Optionally, dictionary-encode string columns as categories: the columns
+        listed, or -- if categorize is True -- those with few distinct values.
+        And downcast numeric columns to the smallest types that hold their values.
+        And store fixed-width strings of digits, e.g., GEOIDs, as integer keys.
+        And store mostly-zero numeric columns sparsely.
+
+        If the path is a glob (e.g., precincts_*.csv), read all the matching files
+        in parallel and push their union, with the rows in file name order.
+
+        If the table was read ahead, concurrently, push that instead.
+        """
 
         try:
             if self.data:
                 rel_path = self.data + rel_path
 
-            new_table: Table = Table()
-            new_table.read(rel_path)
+            new_table: Table
+            if is_glob(rel_path):
+                if distinct:
+                    raise Exception("Can't read distinct rows from multiple files.")
+
+                paths: list[str] = glob_paths(rel_path)
+                self.memo.record_glob(rel_path, paths)
+
+                tables: list[Table] = read_tables(
+                    paths, *self._preview_rows(), categorize, compact, keys, sparse
+                )
+                tables.reverse()  # Stack order, from the bottom up
+                new_table = UnionVerb(*tables).apply() if len(tables) > 1 else tables[0]
+            elif prefetched is not None:
+                self.memo.record(rel_path)
+
+                new_table = prefetched
+            else:
+                self.memo.record(rel_path)
+
+                new_table = Table()
+                new_table.read(
+                    rel_path,
+                    distinct=distinct,
+                    on=on,
+                    keep=keep,
+                    nrows=self._preview_rows()[0],
+                    sample=self._preview_rows()[1],
+                    categorize=categorize,
+                    compact=compact,
+                    keys=keys,
+                    sparse=sparse,
+                )
 
             if new_table.n_rows == 0:
                 raise Exception("No rows in table.")
 
+            # Random samples differ, so results made from them aren't cached
+            if self.cache is not None and not self._preview_rows()[1]:
+                files: list[str] = (
+                    glob_paths(rel_path) if is_glob(rel_path) else [rel_path]
+                )
+                new_table.lineage = lineage(
+                    [
+                        "read",
+                        [(os.path.abspath(f), fingerprint(f)) for f in files],
+                        distinct,
+                        on,
+                        keep,
+                        self._preview_rows(),
+                        categorize,
+                        compact,
+                        keys,
+                        sparse,
+                    ],
+                    [],
+                )
+
             return new_table
 
         except Exception as e:
@@ -180,12 +326,25 @@ class Program:
             return
 
     @do_pre_op()
+    @traced("op")
     def write(
         self, rel_path: Optional[str] = None, format: Optional[str] = None
     ) -> None:
         """WRITE the top table on the stack to disk as a CSV."""
 
         try:
+            if self.preview is not None and self.preview.istop(self):
+                # Write the full table, not the preview
+                full: Program = self.preview.replay(self)
+                full.write(rel_path, format)
+                self.written.extend(w for w in full.written if w not in self.written)
+                return
+
+            if self.preview is not None:
+                # In a script, write the full table when the command that ran it finishes
+                self.preview.defer()
+                return
+
             top: Table = self.table_stack.first()
 
             if rel_path and self.output:
@@ -198,11 +357,15 @@ class Program:
             else:
                 raise Exception("Unrecognized format.")
 
+            if rel_path:
+                self.written.append(FileSpec(rel_path).abs_path)
+
         except Exception as e:
             print_execution_exception("write", e)
             return
 
     @do_pre_op()
+    @traced("display")
     def show(self, nrows: Optional[int] = None) -> None:
         """SHOW the top N rows to STDOUT with a header"""
 
@@ -240,7 +403,153 @@ class Program:
             print_execution_exception("history", e)
             return
 
+    def explain(self, rel_path: str, call_args: Optional[dict] = None) -> None:
+        """Print the plan for running a T script, with estimates, without running it."""
+
+        try:
+            tables: list[Table] = self.table_stack.top_n(self.table_stack.len())
+            tables.reverse()  # Bottom first
+            print()
+            print(
+                explain_script(
+                    rel_path,
+                    Namespace(call_args or dict()),
+                    src=self.src,
+                    data=self.data,
+                    stack=tables,
+                )
+            )
+            print()
+
+        except Exception as e:
+            print_execution_exception("explain", e)
+            return
+
+    def stack(self) -> None:
+        """Show the tables on the stack, top first, & the memory they hold."""
+
+        try:
+            tables: list[Table] = self.table_stack.top_n(self.table_stack.len())
+
+            print()
+            if not tables:
+                print("The stack is empty.")
+                print()
+                return
+
+            rows: list[list[Any]] = [
+                [
+                    i + 1,
+                    (
+                        table.command
+                        if len(table.command) <= MAX_COMMAND_WIDTH
+                        else table.command[: MAX_COMMAND_WIDTH - 3] + "..."
+                    ),
+                    f"{table.n_rows:,}",
+                    f"{table.n_cols:,}",
+                    (
+                        format_bytes(table.n_bytes())
+                        if not table.isspilled()
+                        else "spilled"
+                    ),
+                ]
+                for i, table in enumerate(tables)
+            ]
+            print(
+                tabulate(
+                    rows,
+                    headers=["#", "COMMAND", "ROWS", "COLS", "MEMORY"],
+                    colalign=("right", "left", "right", "right", "right"),
+                    disable_numparse=True,
+                )
+            )
+            print()
+            print(
+                f"Total: {format_bytes(stack_memory(tables))} in {len(tables)} table(s)"
+            )
+            if self.spiller is not None:
+                print(f"Budget: {format_bytes(self.spiller.budget)}")
+                print(self.spiller.stats.summary())
+            if self.cache is not None:
+                print(self.cache.summary())
+            print()
+
+        except Exception as e:
+            print_execution_exception("stack", e)
+            return
+
+    def save_session(self, rel_path: str) -> None:
+        """SAVE the tables on the stack -- & the script args -- to a session file."""
+
+        try:
+            if self.preview is not None and self.preview.istop(self):
+                # Save the full tables, not the previews
+                full: Program = self.preview.replay(self)
+                full.save_session(rel_path)
+                self.written.extend(w for w in full.written if w not in self.written)
+                return
+
+            if self.preview is not None:
+                # In a script, save the full tables when the command that ran it finishes
+                self.preview.defer()
+                return
+
+            if self.output:
+                rel_path = self.output + rel_path
+
+            save_session(self, rel_path)
+            self.written.append(FileSpec(rel_path).abs_path)
+
+        except Exception as e:
+            print_execution_exception("save_session", e)
+            return
+
+    def load_session(self, rel_path: str) -> None:
+        """LOAD a session file, replacing the tables on the stack.
+
+        At the top level, the script args are restored too. In a script, they're not.
+        """
+
+        try:
+            if self.output:
+                rel_path = self.output + rel_path
+
+            load_session(self, rel_path, namespaces=(len(self.call_stack._queue_) == 1))
+            if not self.table_stack.isempty():
+                self._display_table()
+
+        except Exception as e:
+            print_execution_exception("load_session", e)
+            return
+
+    def materialize(self) -> None:
+        """MATERIALIZE the previews: replay the commands on the full data & use its tables from now on."""
+
+        try:
+            if self.preview is None:
+                return  # They're full already
+
+            full: Program = self.preview.replay(self)
+
+            self.table_stack.clear()
+            for table in reversed(full.table_stack._queue_):
+                self.table_stack.push(table)
+            self.preview = None
+
+            if self.table_stack.isempty():
+                self._reset_cached_props()
+            else:
+                self._update_table_shortcuts()
+                self._display_table()
+
+            print("The tables are full, & preview mode is off.")
+
+        except Exception as e:
+            print_execution_exception("materialize", e)
+            return
+
     @do_pre_op()
+    @traced("display")
     def inspect(self, filter_on: Optional[str] = None) -> None:
         try:
             top: Table = self.table_stack.first()
@@ -250,6 +559,14 @@ class Program:
             print("---------")
             print("# rows:", top.n_rows)
             print("# cols:", top.n_cols)
+            print("memory:", format_bytes(top.n_bytes()))
+            print(
+                "stack: ",
+                format_bytes(
+                    stack_memory(self.table_stack.top_n(self.table_stack.len()))
+                ),
+                f"in {self.table_stack.len()} table(s)",
+            )
             print()
 
             cols: list[Column] = (
@@ -333,6 +650,7 @@ class Program:
 
     @do_post_op(pop=0)
     @do_pre_op()
+    @traced("op")
     def duplicate(self) -> Table | None:
         """DUPLICATE the table on the top of the stack and push it onto the stack."""
 
@@ -414,7 +732,9 @@ class Program:
         try:
             top: Table = self.table_stack.first()
 
-            v: GroupByVerb = GroupByVerb(top, by=by, only=only, agg=agg)
+            v: GroupByVerb = GroupByVerb(
+                top, by=by, only=only, agg=agg, outputs=self.used_outputs
+            )
             new_table: Table = v.apply()
 
             return new_table
@@ -423,17 +743,59 @@ class Program:
             print_execution_exception("groupby", e)
             return
 
-    @do_post_op(pop=2)
+    @do_post_op()
+    @do_pre_op()
+    def tally(
+        self,
+        by: list[str],
+        *,
+        only: Optional[list[str]] = None,
+        names: Optional[tuple[str, str]] = None,
+    ) -> Table | None:
+        """TALLY district sums for many plans at once
+
+        * Each 'by' column is a plan, i.e., a column of district assignments
+        * All -or- specified numeric columns are summed
+        * Pop the plans table off and push the long-format table of sums
+        """
+
+        try:
+            top: Table = self.table_stack.first()
+
+            v: TallyVerb = (
+                TallyVerb(top, by=by, only=only, names=names)
+                if names
+                else TallyVerb(top, by=by, only=only)
+            )
+            new_table: Table = v.apply()
+
+            return new_table
+
+        except Exception as e:
+            print_execution_exception("tally", e)
+            return
+
+    @do_post_op(pop=0)
     @do_pre_op(required=2)
-    def union(self) -> Table | None:
-        """UNION the top two tables on the stack, pop them, and push the result."""
+    def union(self, n: int = 2) -> Table | None:
+        """UNION the top n tables on the stack, pop them, and push the result."""
 
         try:
-            x_table: Table = self.table_stack.first()
-            y_table: Table = self.table_stack.second()
+            if n < 2 or n > self.table_stack.len():
+                raise Exception(f"Can't union {n} tables.")
 
-            v: UnionVerb = UnionVerb(y_table, x_table)
+            tables: list[Table] = self.table_stack.top_n(n)
+            tables.reverse()  # Stack order, from the bottom up
+
+            v: UnionVerb = UnionVerb(*tables)
             new_table: Table = v.apply()
+            new_table.lineage = (
+                lineage(["union", n], tables) if self.cache is not None else None
+            )
+
+            # The number of tables to pop varies, so pop them here
+            for _ in range(n):
+                self.table_stack.pop()
 
             return new_table
 
@@ -582,6 +944,44 @@ class Program:
 
     @do_post_op()
     @do_pre_op()
+    def top(
+        self, n: int, col_specs: list, within: Optional[list[str]] = None
+    ) -> Table | None:
+        """TOP n rows by one or more sort columns"""
+
+        try:
+            top: Table = self.table_stack.first()
+
+            v: TopVerb = TopVerb(top, n, col_specs, within)
+            new_table: Table = v.apply()
+
+            return new_table
+
+        except Exception as e:
+            print_execution_exception("top", e)
+            return
+
+    @do_post_op()
+    @do_pre_op()
+    def distinct(
+        self, on: Optional[list[str]] = None, keep: str = "first"
+    ) -> Table | None:
+        """DISTINCT rows"""
+
+        try:
+            top: Table = self.table_stack.first()
+
+            v: DistinctVerb = DistinctVerb(top, on, keep)
+            new_table: Table = v.apply()
+
+            return new_table
+
+        except Exception as e:
+            print_execution_exception("distinct", e)
+            return
+
+    @do_post_op(cache=False)
+    @do_pre_op()
     def sample(self, n: int, pct=None) -> Table | None:
         """SAMPLE"""
 
@@ -641,7 +1041,7 @@ class Program:
 
     @do_pre_op()
     def rotate(self) -> None:
-        self.table_stack.rotate
+        self.table_stack.rotate()
         self._update_table_shortcuts()
 
     ### HOUSEKEEPING ROUTINES ###
@@ -673,7 +1073,8 @@ class Program:
         new_table.command = self.command  # for debugging
         self.table_stack.push(new_table)
 
-        self._calc_column_stats()
+        with phase(self.tracer, "stats"):
+            self._calc_column_stats()
         self._update_table_shortcuts()
 
         if self.debug:
@@ -689,7 +1090,14 @@ class Program:
             print()
 
     def _update_table_shortcuts(self) -> None:
-        """Cache table stats on the program object, so they can be referenced w/o stack ops."""
+        """Cache table stats on the program object, so they can be referenced w/o stack ops.
+
+        This is done whenever the stack changes, so keep it within its memory budget too.
+        """
+
+        if self.spiller is not None:
+            if self.spiller.enforce(self.table_stack.top_n(self.table_stack.len())):
+                clear_memo()  # Memory is tight, so don't hold on to old results
 
         top: Table = self.table_stack.first()
 
@@ -699,6 +1107,39 @@ class Program:
 
         self.stats = top.stats
 
+    def _preview_rows(self) -> tuple[Optional[int], bool]:
+        """How many rows to read, if previewing, & whether to sample them"""
+
+        if self.preview is None:
+            return None, False
+
+        return self.preview.rows, self.preview.sample
+
+    def _result_key(
+        self, verb: str, args: tuple, kwargs: dict, n_inputs: int
+    ) -> Optional[str]:
+        """Key the result of an operation by what it does & the tables it uses, if known"""
+
+        udf: Any = fingerprint(self.user) if self.user else None
+        used: Optional[list[str]] = (
+            sorted(self.used_outputs) if self.used_outputs is not None else None
+        )
+        parts: list[Any] = [verb, args, sorted(kwargs.items()), used, self.user, udf]
+
+        return lineage(parts, self.table_stack.top_n(n_inputs))
+
+    def _push_cached(self, table: Table, pop: int) -> None:
+        """Push a cached result. Its stats were calculated when it was first pushed."""
+
+        for _ in range(pop):
+            self.table_stack.pop()
+        self.table_stack.push(table)
+
+        self._update_table_shortcuts()
+
+        if self.debug:
+            print(f"Cached result: {table.command}")
+
     def _calc_column_stats(self) -> None:
         """Automatically calc column statistics for a table"""
 
@@ -750,7 +1191,7 @@ def show_tabulate(top: Table, n: int) -> None:
     data.extend(top.first_n_rows(n))
 
     disable_numparse: list[int] = [
-        i for i, x in enumerate(top.cols()) if x.type not in ["int64", "float64"]
+        i for i, x in enumerate(top.cols()) if x.type not in PD_NUMERIC_TYPES
     ]
 
     print(
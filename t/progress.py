@@ -0,0 +1,297 @@
+# progress.py
+#!/usr/bin/env python3
+
+"""
+PROGRESS - Run commands in a worker thread, report their progress, & cancel them
+
+In the REPL, each command runs in a worker thread, while the main thread waits
+for it. If it runs for more than a moment, the main thread shows its progress:
+the rows read or written so far, the plans tallied, etc. -- whatever the command
+reports -- and how long it's been running.
+
+Ctrl-C -- or a timeout -- cancels the command. Python can't stop a thread, so
+the command is asked to stop, and stops the next time it reports progress or
+is about to change the stack. A command that's a single pandas operation, e.g.,
+a join, can't report progress, so it stops only when the operation finishes. Then the stack is restored to what it was before
+the command, so a cancelled command doesn't leave it half-done.
+"""
+
+import sys
+import time
+import threading
+import contextlib
+from typing import Any, Callable, Optional, TextIO
+
+PROGRESS_DELAY: float = 1.0  # Seconds before showing the progress of a command
+PROGRESS_INTERVAL: float = 0.25  # Seconds between updates
+REPORT_BYTES: int = 1024 * 1024  # Report reading files this often
+REPORT_ROWS: int = 10000  # Report writing rows this often
+
+Snapshot = tuple[list[Any], list[Any]]  # the table & call stacks, bottom first
+
+
+class Cancelled(BaseException):
+    """A command was cancelled. Like KeyboardInterrupt, it isn't an Exception, so verbs don't catch it."""
+
+
+class Task:
+    """A command running in a worker thread"""
+
+    command: str
+    start: float
+    label: str  # what it's doing
+    done: int
+    total: Optional[int]
+    unit: str
+    _cancelled: threading.Event
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.start = time.perf_counter()
+        self.label = ""
+        self.done = 0
+        self.total = None
+        self.unit = ""
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def iscancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def status(self) -> str:
+        elapsed: float = time.perf_counter() - self.start
+        if not self.label:
+            return f"Running {self.command} ... {elapsed:.0f}s"
+
+        progress: str = f"{self.done:,}"
+        if self.total:
+            progress += f" of {self.total:,} {self.unit} ({self.done / self.total:.0%})"
+        else:
+            progress += f" {self.unit}"
+
+        return f"{self.label}: {progress.strip()} ... {elapsed:.0f}s"
+
+
+_local: threading.local = threading.local()
+
+
+def current() -> Optional[Task]:
+    """The task running in this thread, if any"""
+
+    return getattr(_local, "task", None)
+
+
+def report(
+    label: str, done: int, total: Optional[int] = None, unit: str = "rows"
+) -> None:
+    """Report the progress of the command running in this thread. Stop, if it was cancelled."""
+
+    task: Optional[Task] = current()
+    if task is None:
+        return
+
+    task.label = label
+    task.done = done
+    task.total = total
+    task.unit = unit
+
+    if task.iscancelled():
+        raise Cancelled()
+
+
+def check() -> None:
+    """Stop the command running in this thread, if it was cancelled"""
+
+    task: Optional[Task] = current()
+    if task is not None and task.iscancelled():
+        raise Cancelled()
+
+
+class ProgressFile:
+    """A text file that reports how much of it has been read, for pandas to read"""
+
+    label: str
+    total: int
+    n_bytes: int
+    _file: TextIO
+    _reported: int
+
+    def __init__(self, path: str, label: str, total: int) -> None:
+        self._file = open(path, "r", encoding="utf-8", newline="")
+        self.label = label
+        self.total = total
+        self.n_bytes = 0
+        self._reported = 0
+
+    def read(self, size: int = -1) -> str:
+        return self._count(self._file.read(size))
+
+    def readline(self, size: int = -1) -> str:
+        return self._count(self._file.readline(size))
+
+    def __iter__(self) -> "ProgressFile":
+        return self
+
+    def __next__(self) -> str:
+        line: str = self.readline()
+        if not line:
+            raise StopIteration
+
+        return line
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ProgressFile":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _count(self, text: str) -> str:
+        self.n_bytes += len(text)  # characters, which are bytes for ASCII
+        if self.n_bytes - self._reported >= REPORT_BYTES:
+            self._reported = self.n_bytes
+            report(self.label, min(self.n_bytes, self.total), self.total, "bytes")
+
+        return text
+
+
+def run_command(
+    command: str,
+    env: Any,
+    run: Callable[[], str],
+    *,
+    timeout: Optional[float] = None,
+    show: bool = True,
+) -> Optional[str]:
+    """Run a command in a worker thread. Return its result, or None if it was cancelled."""
+
+    saved: Snapshot = snapshot(env)
+
+    task: Task = Task(command)
+    outcome: dict[str, Any] = dict()
+
+    finished: threading.Event = threading.Event()
+
+    def work() -> None:
+        _local.task = task
+        try:
+            outcome["result"] = run()
+        except Cancelled:
+            outcome["cancelled"] = True
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            _local.task = None
+            finished.set()
+
+    worker: threading.Thread = threading.Thread(
+        target=work, name="T command", daemon=True
+    )
+
+    reason: Optional[str] = None
+    line: StatusLine = StatusLine(sys.stdout, sys.stderr)
+    with contextlib.redirect_stdout(line):  # Clear the status before the command prints
+        worker.start()
+
+        # NOTE - Not worker.join(), which Ctrl-C can interrupt so the worker looks finished
+        while not finished.is_set():
+            try:
+                finished.wait(PROGRESS_INTERVAL)
+
+                elapsed: float = time.perf_counter() - task.start
+                if timeout is not None and elapsed > timeout and reason is None:
+                    reason = f"Timed out after {timeout:g}s"
+                    task.cancel()
+                if show and elapsed >= PROGRESS_DELAY and not finished.is_set():
+                    line.show(
+                        task.status() if reason is None else f"Cancelling {command} ..."
+                    )
+
+            except KeyboardInterrupt:
+                if reason is None:
+                    reason = "Cancelled"
+                task.cancel()  # Wait for it to stop
+
+        line.clear()
+
+    worker.join()
+
+    if "error" in outcome:
+        raise outcome["error"]
+
+    if outcome.get("cancelled"):
+        from .session import restore  # session imports this module, via datamodel
+
+        restore(env, *saved)  # Undo whatever the command did
+        print(f"{reason or 'Cancelled'}: {command}. The stack is unchanged.")
+        return None
+
+    return outcome.get("result")
+
+
+### HELPERS ###
+
+
+class StatusLine:
+    """Stdout for a command, with a status line below what it's printed, on stderr"""
+
+    _out: TextIO
+    _err: TextIO
+    _lock: threading.Lock
+    _shown: bool  # the status line
+    _at_bol: bool  # stdout is at the beginning of a line
+
+    def __init__(self, out: TextIO, err: TextIO) -> None:
+        self._out = out
+        self._err = err
+        self._lock = threading.Lock()
+        self._shown = False
+        self._at_bol = True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._clear()
+            if text:
+                self._at_bol = text.endswith("\n")
+
+            return self._out.write(text)
+
+    def flush(self) -> None:
+        self._out.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._out, name)  # e.g., isatty()
+
+    def show(self, status: str) -> None:
+        with self._lock:
+            if not self._at_bol:
+                return  # Don't overwrite a partial line
+
+            self._out.flush()
+            print(f"\r\033[K{status}", end="", file=self._err, flush=True)
+            self._shown = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        if self._shown:
+            print("\r\033[K", end="", file=self._err, flush=True)
+            self._shown = False
+
+
+def snapshot(env: Any) -> Snapshot:
+    """Snapshot the stacks of a program. Tables aren't modified, so they're shared."""
+
+    tables: list[Any] = list(reversed(env.table_stack._queue_))
+    namespaces: list[Any] = list(reversed(env.call_stack._queue_))
+
+    return tables, namespaces
+
+
+### END ###
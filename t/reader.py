@@ -7,7 +7,6 @@ REPL INPUT WITH AUTOCOMPLETE
 Patterned after https://sites.google.com/site/xiangyangsite/home/technical-tips/software-development/python/python-readline-completions
 """
 
-import readline
 import re
 import string  # for string.whitespace
 from enum import Enum
@@ -18,13 +17,15 @@ from .constants import BEG, END
 
 TOK_DELIM_SPEC: str = "[\\s\\(\\)=]"
 
-readline.parse_and_bind("bind ^I rl_complete")  # Mac HACK
-# readline.parse_and_bind("tab: complete")
-
 
 def make_input_fn(is_session_rooted, cols: list[str]) -> Callable[..., str]:
     """Autocomplete function for the REPL."""
 
+    import readline  # Only the REPL needs it
+
+    readline.parse_and_bind("bind ^I rl_complete")  # Mac HACK
+    # readline.parse_and_bind("tab: complete")
+
     def complete(text: str, state: int) -> str | None:
         try:
             tokens: list[str] = re.split(TOK_DELIM_SPEC, readline.get_line_buffer())
@@ -56,14 +57,17 @@ def make_input_fn(is_session_rooted, cols: list[str]) -> Callable[..., str]:
 
 # NOTE - See docs/verbs.md for a description of each verb
 
-FILE_IN_VERBS: list[str] = ["from"]
-FILE_OUT_VERBS: list[str] = ["write"]
-DISPLAY_VERBS: list[str] = ["write", "show", "inspect"]
+FILE_IN_VERBS: list[str] = ["from", "load_session"]
+FILE_OUT_VERBS: list[str] = ["write", "save_session"]
+DISPLAY_VERBS: list[str] = ["write", "save_session", "show", "inspect", "stack"]
 STACK_VERBS: list[str] = ["clear", "pop", "swap", "reverse", "rotate"]
 COLUMN_REFERENCING_VERBS: list[str] = [
     "sort",
     "join",
     "groupby",
+    "top",
+    "tally",
+    "distinct",
     "keep",
     "drop",
     "rename",
@@ -79,6 +83,8 @@ OTHER_VERBS: list[str] = [
     "last",
     "sample",
     "history",
+    "explain",
+    "materialize",
 ]
 
 VERBS: list[str] = (
@@ -7,9 +7,12 @@ READ/WRITE
 
 import os
 import sys
+import glob
+import threading
 import ast
-import dateutil.parser
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_integer_dtype, is_float_dtype
 from importlib.machinery import SourceFileLoader
 import inspect
 import contextlib
@@ -18,8 +21,20 @@ from types import ModuleType
 from typing import Any, Type, Optional, Generator, TextIO
 
 from .excel import first_n_excel_column_names
+from .progress import ProgressFile, current, report
 
 PREREAD_LINES: int = 1000
+DISTINCT_CHUNK_ROWS: int = 100000
+SAMPLE_CHUNK_ROWS: int = 100000
+# Dictionary-encode string columns with at most this ratio of distinct values to values
+CATEGORY_RATIO: float = 0.1
+# Key columns -- e.g., GEOIDs -- are fixed-width strings of digits, stored as int64s
+KEY_DIGITS: int = 18  # The most digits an int64 always holds
+# Store numeric columns with at least this fraction of zeroes sparsely
+SPARSE_RATIO: float = 0.75
+# Compact integer types, smallest first
+UNSIGNED_TYPES: list[str] = ["uint8", "uint16", "uint32"]
+SIGNED_TYPES: list[str] = ["int8", "int16", "int32"]
 
 
 ### PATHS ###
@@ -42,6 +57,22 @@ class FileSpec:
         self.extension = file_extension
 
 
+def is_glob(path: str) -> bool:
+    """Does a path contain shell-style wildcards, e.g., precincts_*.csv?"""
+
+    return any(c in path for c in "*?[")
+
+
+def glob_paths(pattern: str) -> list[str]:
+    """The paths that match a shell-style pattern, in sorted order"""
+
+    paths: list[str] = sorted(glob.glob(pattern))
+    if not paths:
+        raise Exception(f"No files match {pattern}.")
+
+    return paths
+
+
 StandardDelimiters: dict[str, str] = {
     "tab": "\t",
     "semicolon": ";",
@@ -65,11 +96,34 @@ class DelimitedFileReader:
         delimiter (str, optional): Delimiter. Defaults to "comma."
         header (bool, optional): Header? Defaults to True.
         col_types (list, optional): List of column types. Defaults to None.
+        distinct (bool, optional): Drop duplicate rows while reading? Defaults to False.
+        on (list, optional): The columns that identify duplicates. Defaults to all.
+        keep (str, optional): Keep the "first" or "last" duplicate. Defaults to "first".
+        nrows (int, optional): Read just this many rows, to preview the file. Defaults to all.
+        sample (bool, optional): Preview a random sample of rows, not the first ones. Defaults to False.
+        categorize (bool | list, optional): Dictionary-encode these string columns -- or, if True,
+            those with few distinct values -- as categories. Defaults to False.
+        compact (bool | list, optional): Downcast these numeric columns -- or, if True, all
+            of them -- to the smallest types that hold their values. Defaults to False.
+        keys (bool | list, optional): Encode these fixed-width strings of digits -- or, if True,
+            all such columns -- as integers, e.g., GEOIDs. Defaults to False.
+        sparse (bool | list, optional): Store these numeric columns -- or, if True, those that
+            are mostly zeroes -- sparsely. Defaults to False.
     """
 
     file: str
     delimiter: str
     header: int | None
+    distinct: bool
+    on: Optional[list[str]]
+    keep: str
+    nrows: Optional[int]
+    sample: bool
+    categorize: bool | list[str]
+    compact: bool | list[str]
+    keys: bool | list[str]
+    key_widths: dict[str, int]  # the key columns read & their widths
+    sparse: bool | list[str]
 
     def __init__(
         self,
@@ -77,23 +131,118 @@ class DelimitedFileReader:
         *,
         delimiter="comma",
         header=True,
+        distinct=False,
+        on=None,
+        keep="first",
+        nrows=None,
+        sample=False,
+        categorize=False,
+        compact=False,
+        keys=False,
+        sparse=False,
     ) -> None:
         self.file = FileSpec(rel_path).abs_path
         self.delimiter = StandardDelimiters[delimiter]
         # Translate to Pandas' header parameter
         self.header = 0 if header else None
+        self.distinct = distinct
+        self.on = on
+        self.keep = keep
+        self.nrows = nrows
+        self.sample = sample
+        self.categorize = categorize
+        self.compact = compact
+        self.keys = keys
+        self.key_widths = dict()
+        self.sparse = sparse
 
     def read(self) -> pd.DataFrame:
-        return read_delimited_file(
-            self.file, delimiter=self.delimiter, header=self.header
-        )
+        df: pd.DataFrame
+        if self.nrows is not None:
+            # A preview: the distinct rows of the preview, not the file
+            df = read_delimited_file(
+                self.file,
+                delimiter=self.delimiter,
+                header=self.header,
+                nrows=self.nrows,
+                sample=self.sample,
+                categorize=self.categorize,
+            )
+            if self.distinct:
+                df = df.drop_duplicates(subset=self.on, keep=self.keep)
+                df = df.reset_index(drop=True)
+
+        elif self.distinct:
+            df = read_distinct_rows(
+                self.file,
+                delimiter=self.delimiter,
+                header=self.header,
+                on=self.on,
+                keep=self.keep,
+                categorize=self.categorize,
+            )
+
+        else:
+            df = read_delimited_file(
+                self.file,
+                delimiter=self.delimiter,
+                header=self.header,
+                categorize=self.categorize,
+            )
+
+        if self.compact:
+            # Downcast, now that the range of each column is known
+            names: Optional[list[str]] = (
+                self.compact if isinstance(self.compact, list) else None
+            )
+            missing: list[str] = [c for c in names or [] if c not in df.columns]
+            if missing:
+                raise Exception(f"Invalid column(s): {', '.join(missing)}")
+            df = compact_columns(df, names)
+
+        self.key_widths = dict()
+        if self.keys:
+            # Encode fixed-width strings of digits as integers
+            listed: bool = isinstance(self.keys, list)
+            for name in self.keys if isinstance(self.keys, list) else list(df.columns):
+                if name not in df.columns:
+                    raise Exception(f"Invalid column: {name}")
+
+                encoded: Optional[pd.Series] = encode_key(df[name])
+                if encoded is None:
+                    if listed:
+                        raise Exception(
+                            f"{name} isn't a fixed-width string of at most {KEY_DIGITS} digits."
+                        )
+                    continue
+
+                self.key_widths[name] = len(str(df[name].iloc[0]))
+                df[name] = encoded
+
+        if self.sparse:
+            # Now that the zeroes in each column can be counted
+            named: Optional[list[str]] = (
+                self.sparse if isinstance(self.sparse, list) else None
+            )
+            absent: list[str] = [c for c in named or [] if c not in df.columns]
+            if absent:
+                raise Exception(f"Invalid column(s): {', '.join(absent)}")
+            df = sparsify_columns(df, named)
+
+        return df
 
 
 ### READ CSV USING PANDAS ###
 
 
 def read_delimited_file(
-    file: str, *, delimiter=StandardDelimiters["comma"], header: Optional[int] = None
+    file: str,
+    *,
+    delimiter=StandardDelimiters["comma"],
+    header: Optional[int] = None,
+    nrows: Optional[int] = None,
+    sample: bool = False,
+    categorize: bool | list[str] = False,
 ) -> pd.DataFrame:
     """Read a delimited text file, e.g., CSV
 
@@ -109,6 +258,97 @@ def read_delimited_file(
         file (str): Absolute file path
         delimiter (str, optional): Delimiter. Defaults to ','.
         header (int, optional): Header row. Defaults to None.
+        nrows (int, optional): Read just the first this many rows. Defaults to all.
+        sample (bool, optional): Read a random sample of nrows rows instead. Defaults to False.
+        categorize (bool | list, optional): Dictionary-encode these string columns -- or,
+            if True, those with few distinct values. Defaults to False.
+    """
+
+    str_cols: dict[Any, Any]
+    dt_cols: list
+    str_cols, dt_cols = infer_column_types(
+        file, delimiter=delimiter, header=header, categorize=categorize
+    )
+
+    read_args: dict[str, Any] = dict(
+        header=header,
+        sep=delimiter,
+        dtype=str_cols,  # Read strings as strings
+        parse_dates=dt_cols,  # Read dates as dates
+        engine="python",
+    )
+    df: pd.DataFrame
+    if nrows is not None and sample:
+        df = sample_rows(file, nrows, **read_args)
+    elif nrows is None and current() is not None:
+        # Running in the REPL's worker thread, so report the progress of reading the file
+        label: str = f"Reading {os.path.basename(file)}"
+        with ProgressFile(file, label, os.path.getsize(file)) as f:
+            df = pd.read_csv(f, **read_args)
+    else:
+        df = pd.read_csv(file, nrows=nrows, **read_args)
+    df = categorize_columns(df, str_cols)
+
+    # NOTE - If a column's contents contain the delimiter -- e.g., a comma in a
+    # lists, tuples, dicts, or sets -- then Pandas will split the column which
+    # will results in a multiindex.
+
+    if isinstance(df.index, pd.MultiIndex):
+        raise Exception("Make sure the delimiter is not in any column values!")
+
+    # Use Excel names, if there wasn't a header
+    if header is None:
+        offsets: list = list(df.columns)
+        fieldnames: list[str] = first_n_excel_column_names(len(offsets))
+        rename_dict: dict = dict(zip(offsets, fieldnames))
+        df.rename(columns=rename_dict, inplace=True)
+
+    return df
+
+
+def sample_rows(file: str, n: int, **read_args: Any) -> pd.DataFrame:
+    """Read a uniform random sample of n rows of a file, a chunk at a time, in file order
+
+    Each row gets a random key, & the rows with the n smallest keys are kept, so
+    only n rows & a chunk are held in memory.
+    """
+
+    rng: np.random.Generator = np.random.default_rng()
+
+    kept: Optional[pd.DataFrame] = None
+    keys: np.ndarray = np.empty(0)
+    n_read: int = 0
+    for chunk in pd.read_csv(file, chunksize=SAMPLE_CHUNK_ROWS, **read_args):
+        n_read += len(chunk)
+        report(f"Sampling {os.path.basename(file)}", n_read)
+
+        kept = chunk if kept is None else pd.concat([kept, chunk])
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+
+        if len(kept) > n:
+            smallest: np.ndarray = np.sort(np.argpartition(keys, n)[:n])
+            kept = kept.iloc[smallest]
+            keys = keys[smallest]
+
+    if kept is None:  # No rows
+        return pd.read_csv(file, nrows=0, **read_args)
+
+    return kept.reset_index(drop=True)
+
+
+def infer_column_types(
+    file: str,
+    *,
+    delimiter=StandardDelimiters["comma"],
+    header: Optional[int] = None,
+    categorize: bool | list[str] = False,
+) -> tuple[dict[Any, Any], list]:
+    """The first pass of reading a delimited file: infer column types from a sample of rows
+
+    Returns the string columns (as a dtype dict for read_csv()) and the date/time columns.
+
+    Optionally, dictionary-encode string columns as categories: the columns listed,
+    or -- if categorize is True -- those with few distinct values in the sample.
     """
 
     df: pd.DataFrame = pd.read_csv(
@@ -135,32 +375,428 @@ def read_delimited_file(
         elif inferred_types[i] == "pd.datetime":
             dt_cols.append(col)
 
-    df = pd.read_csv(
-        file,
-        header=header,
-        sep=delimiter,
-        dtype=str_cols,  # Read strings as strings
-        parse_dates=dt_cols,  # Read dates as dates
-        engine="python",
-    )
+    if isinstance(categorize, list):
+        missing: list[str] = [c for c in categorize if c not in df.columns]
+        if missing:
+            raise Exception(f"Invalid column(s): {', '.join(missing)}")
+        not_str: list[str] = [c for c in categorize if c not in str_cols]
+        if not_str:
+            raise Exception(
+                f"Only string columns can be categorized: {', '.join(not_str)}"
+            )
+        for col in categorize:
+            str_cols[col] = "category"
+    elif categorize:
+        for col in str_cols:
+            values: pd.Series = df[col].dropna()
+            if len(values) > 0 and values.nunique() <= CATEGORY_RATIO * len(values):
+                str_cols[col] = "category"
+
+    return str_cols, dt_cols
+
+
+def categorize_columns(df: pd.DataFrame, str_cols: dict[Any, Any]) -> pd.DataFrame:
+    """Make sure the columns read as categories still are
+
+    Concatenating chunks with different categories makes object columns.
+    """
 
-    # NOTE - If a column's contents contain the delimiter -- e.g., a comma in a
-    # lists, tuples, dicts, or sets -- then Pandas will split the column which
-    # will results in a multiindex.
+    recast: dict[Any, str] = {
+        col: "category"
+        for col, dtype in str_cols.items()
+        if dtype == "category" and df[col].dtype.name != "category"
+    }
 
-    if isinstance(df.index, pd.MultiIndex):
-        raise Exception("Make sure the delimiter is not in any column values!")
+    return df.astype(recast) if recast else df
+
+
+def compact_types(
+    df: pd.DataFrame, names: Optional[list[str]] = None
+) -> dict[str, str]:
+    """The smallest types that hold the values of numeric columns exactly
+
+    Integers get the smallest unsigned type -- or, if some are negative, signed
+    type -- that their range fits in. Floats get float32, if every value survives
+    the round trip. With names, those columns must be numeric.
+    """
+
+    types: dict[str, str] = dict()
+    for name in names if names is not None else list(df.columns):
+        series: pd.Series = df[name]
+        numeric: bool = isinstance(series.dtype, np.dtype) and (
+            is_integer_dtype(series.dtype) or is_float_dtype(series.dtype)
+        )
+        if not numeric:
+            if names is not None:
+                raise Exception(f"Only numeric columns can be compacted: {name}")
+            continue
+        if series.empty:
+            continue
+
+        if is_integer_dtype(series.dtype):
+            lo: int = int(series.min())
+            hi: int = int(series.max())
+            for t in UNSIGNED_TYPES if lo >= 0 else SIGNED_TYPES:
+                info: np.iinfo = np.iinfo(t)
+                if info.min <= lo and hi <= info.max:
+                    if np.dtype(t).itemsize < series.dtype.itemsize:
+                        types[name] = t
+                    break
+
+        elif series.dtype.itemsize > 4:
+            values: np.ndarray = series.to_numpy()
+            narrow: np.ndarray = values.astype("float32")
+            if ((narrow == values) | np.isnan(values)).all():
+                types[name] = "float32"
+
+    return types
+
+
+def encode_key(series: pd.Series, width: Optional[int] = None) -> Optional[pd.Series]:
+    """Encode a column of fixed-width strings of digits -- e.g., GEOIDs -- as int64s
+
+    Return None if the values aren't all strings of the same number of digits
+    (or the width given), or there are too many digits for an int64.
+    """
+
+    if is_integer_dtype(series.dtype) or is_float_dtype(series.dtype):
+        return None  # Already numbers, so any leading zeroes are gone
+
+    strings: pd.Series = series.astype("string")
+    if len(strings) == 0 or strings.isna().any():
+        return None
+
+    lengths: pd.Series = strings.str.len()
+    width = width if width is not None else int(lengths.iloc[0])
+    if width > KEY_DIGITS or not (lengths == width).all():
+        return None
+    if not strings.str.fullmatch("[0-9]+").all():
+        return None
+
+    return strings.astype("int64")
 
-    # Use Excel names, if there wasn't a header
-    if header is None:
-        offsets: list = list(df.columns)
-        fieldnames: list[str] = first_n_excel_column_names(len(offsets))
-        rename_dict: dict = dict(zip(offsets, fieldnames))
-        df.rename(columns=rename_dict, inplace=True)
+
+def decode_key(series: pd.Series, width: int) -> pd.Series:
+    """Decode a key column into the zero-padded strings it encodes"""
+
+    return series.astype("Int64").astype("string").str.zfill(width)
+
+
+def compact_columns(
+    df: pd.DataFrame, names: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """Downcast numeric columns to the smallest types that hold their values exactly
+
+    The columns are replaced one at a time, so the whole table isn't copied at once.
+    """
+
+    for name, t in compact_types(df, names).items():
+        df[name] = df[name].astype(t)
 
     return df
 
 
+def sparse_names(df: pd.DataFrame, names: Optional[list[str]] = None) -> list[str]:
+    """The numeric columns that are mostly zeroes, e.g., counts of small populations
+
+    With names, those columns must be numeric, and they're all returned.
+    """
+
+    sparse: list[str] = list()
+    for name in names if names is not None else list(df.columns):
+        series: pd.Series = df[name]
+        numeric: bool = isinstance(series.dtype, np.dtype) and (
+            is_integer_dtype(series.dtype) or is_float_dtype(series.dtype)
+        )
+        if not numeric:
+            if names is not None:
+                raise Exception(f"Only numeric columns can be sparse: {name}")
+            continue
+
+        if names is not None or (
+            not series.empty and (series == 0).mean() >= SPARSE_RATIO
+        ):
+            sparse.append(name)
+
+    return sparse
+
+
+def sparsify_columns(
+    df: pd.DataFrame, names: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """Store mostly-zero numeric columns -- or those named -- sparsely
+
+    Just the values that aren't zero are stored, with their positions.
+    """
+
+    for name in sparse_names(df, names):
+        df[name] = df[name].astype(pd.SparseDtype(df[name].dtype, 0))
+
+    return df
+
+
+def densify(series: pd.Series) -> pd.Series:
+    """A column with all its values stored, if it's sparse"""
+
+    if isinstance(series.dtype, pd.SparseDtype):
+        return series.sparse.to_dense()
+
+    return series
+
+
+class KeyIndex:
+    """The distinct keys of a file read a chunk at a time, by 64-bit hash
+
+    The hashes are kept in sorted runs, so a chunk's rows are looked up with
+    binary searches. The new hashes in each chunk are a new run, and the last
+    two runs are merged while the older one is no more than twice as long, like
+    the digits of a binary counter. So there are O(log n) runs, each hash is
+    merged O(log n) times, and the index takes O(n log n) time in all, however
+    many chunks the file is read in.
+
+    The first row with each key is kept too, and the keys of the rows with the
+    same hash are compared to it, so a hash collision is an error rather than a
+    distinct row silently dropped.
+    """
+
+    file: str
+    runs: list[
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+    ]  # hashes (sorted), first, last
+    n_kept: int
+    rows: list[pd.DataFrame]  # the first row with each hash, a chunk at a time
+    starts: list[int]  # the index of each chunk's first row
+
+    # In each run, 'first' is the index of the first row with each hash, in rows,
+    # and 'last' is the position in the file of the last row with each hash.
+
+    def __init__(self, file: str) -> None:
+        self.file = file
+        self.runs = list()
+        self.n_kept = 0
+        self.rows = list()
+        self.starts = list()
+
+    def find(self, hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The run of each hash -- or -1, if it's not in the index -- & its position there"""
+
+        run: np.ndarray = np.full(len(hashes), -1)
+        pos: np.ndarray = np.zeros(len(hashes), np.int64)
+        for r, (sorted_hashes, _, _) in enumerate(self.runs):
+            i: np.ndarray = np.minimum(
+                np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1
+            )
+            hit: np.ndarray = sorted_hashes[i] == hashes
+            run[hit] = r
+            pos[hit] = i[hit]
+
+        return run, pos
+
+    def last(self, hashes: np.ndarray) -> np.ndarray:
+        """The position in the file of the last row with each hash, which must be in the index"""
+
+        return self._values(hashes, 2)
+
+    def add(
+        self,
+        keys: pd.DataFrame,
+        hashes: np.ndarray,
+        offset: int,
+        rows: Optional[pd.DataFrame] = None,
+    ) -> np.ndarray:
+        """Add the keys of a chunk. Return a mask of the rows with new keys.
+
+        Keep the rows -- or, by default, just the keys -- with new keys.
+        """
+
+        run: np.ndarray
+        run, _ = self.find(hashes)
+        new: np.ndarray = (run < 0) & ~pd.Index(hashes).duplicated(keep="first")
+
+        self.starts.append(self.n_kept)
+        self.rows.append((keys if rows is None else rows)[new])
+
+        added: np.ndarray = hashes[new]
+        if len(added):
+            order: np.ndarray = np.argsort(added, kind="stable")
+            first: np.ndarray = np.arange(self.n_kept, self.n_kept + len(added))
+            self.runs.append(
+                (added[order], first[order], np.zeros(len(added), np.int64))
+            )
+            self.n_kept += len(added)
+            self._merge()
+
+        # Later rows overwrite earlier ones, leaving the position of the last row with each key
+        run, pos = self.find(hashes)
+        final: np.ndarray = ~pd.Index(hashes).duplicated(keep="last")
+        for r, (_, _, last) in enumerate(self.runs):
+            here: np.ndarray = final & (run == r)
+            last[pos[here]] = offset + np.flatnonzero(here)
+
+        self._check(keys[~new], self._values(hashes[~new], 1))
+
+        return new
+
+    def _values(self, hashes: np.ndarray, field: int) -> np.ndarray:
+        """The first rows (1) -- or last positions (2) -- of hashes in the index"""
+
+        run: np.ndarray
+        pos: np.ndarray
+        run, pos = self.find(hashes)
+
+        values: np.ndarray = np.zeros(len(hashes), np.int64)
+        for r, entries in enumerate(self.runs):
+            here: np.ndarray = run == r
+            values[here] = entries[field][pos[here]]
+
+        return values
+
+    def _merge(self) -> None:
+        """Merge the last two runs, while the older one isn't much longer"""
+
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            newer: tuple[np.ndarray, np.ndarray, np.ndarray] = self.runs.pop()
+            older: tuple[np.ndarray, np.ndarray, np.ndarray] = self.runs.pop()
+
+            merged: list[np.ndarray] = [np.concatenate(x) for x in zip(older, newer)]
+            order: np.ndarray = np.argsort(merged[0], kind="stable")
+            self.runs.append((merged[0][order], merged[1][order], merged[2][order]))
+
+    def _check(self, keys: pd.DataFrame, first: np.ndarray) -> None:
+        """Make sure rows have the same keys as the first rows with their hashes"""
+
+        starts: np.ndarray = np.array(self.starts)
+        chunk: np.ndarray = np.searchsorted(starts, first, side="right") - 1
+        order: np.ndarray = np.argsort(chunk, kind="stable")
+        chunk = chunk[order]
+
+        # Just the chunks that have first rows to compare to
+        expected: list[pd.DataFrame] = list()
+        for c in np.unique(chunk):
+            lo: int
+            hi: int
+            lo, hi = np.searchsorted(chunk, [c, c + 1])
+            expected.append(self.rows[c].iloc[first[order[lo:hi]] - starts[c]])
+
+        if not same_keys(
+            keys.iloc[order], pd.concat(expected or [keys.iloc[:0]])[keys.columns]
+        ):
+            raise Exception(
+                f"Hash collision reading distinct rows of {self.file}. "
+                "Read it all, and then use distinct()."
+            )
+
+
+def same_keys(x: pd.DataFrame, y: pd.DataFrame) -> bool:
+    """Are the rows of two frames the same, treating missing values as equal?"""
+
+    for c in x.columns:
+        a: pd.Series = x[c].reset_index(drop=True)
+        b: pd.Series = y[c].reset_index(drop=True)
+        if not ((a == b).fillna(False) | (a.isna() & b.isna())).all():
+            return False
+
+    return True
+
+
+def read_distinct_rows(
+    file: str,
+    *,
+    delimiter=StandardDelimiters["comma"],
+    header: Optional[int] = None,
+    on: Optional[list[str]] = None,
+    keep: str = "first",
+    chunksize: int = DISTINCT_CHUNK_ROWS,
+    categorize: bool | list[str] = False,
+) -> pd.DataFrame:
+    """Read the distinct rows of a delimited file, a chunk at a time
+
+    Only the rows that are kept, a 64-bit hash of each distinct key, & the first
+    row with each key are held in memory, so a file with many duplicate rows can
+    be bigger than memory.
+
+    Rows are duplicates if they have the same values in the 'on' columns (all
+    columns by default). To keep the *last* of each set of duplicates, the file
+    is read twice: once to find the position of the last row with each key, and
+    once to keep just those rows.
+    """
+
+    if keep not in ["first", "last"]:
+        raise ValueError(f"Invalid keep option: {keep}")
+
+    str_cols: dict[Any, Any]
+    dt_cols: list
+    str_cols, dt_cols = infer_column_types(
+        file, delimiter=delimiter, header=header, categorize=categorize
+    )
+
+    def chunks() -> Generator[pd.DataFrame, None, None]:
+        reader = pd.read_csv(
+            file,
+            header=header,
+            sep=delimiter,
+            dtype=str_cols,
+            parse_dates=dt_cols,
+            engine="python",
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            if isinstance(chunk.index, pd.MultiIndex):
+                raise Exception("Make sure the delimiter is not in any column values!")
+
+            if header is None:
+                offsets: list = list(chunk.columns)
+                fieldnames: list[str] = first_n_excel_column_names(len(offsets))
+                chunk.rename(columns=dict(zip(offsets, fieldnames)), inplace=True)
+
+            missing: list[str] = [c for c in on or [] if c not in chunk.columns]
+            if missing:
+                raise Exception(f"Invalid column(s): {', '.join(missing)}")
+
+            yield chunk
+
+    def key_hashes(keys: pd.DataFrame) -> np.ndarray:
+        # A chunk with a missing value reads an integer column as float, so hash all numbers as floats
+        keys = keys.astype(
+            {c: "float64" for c in keys.columns if is_integer_dtype(keys[c])}
+        )
+
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+    offset: int
+    label: str = f"Reading distinct rows of {os.path.basename(file)}"
+    index: KeyIndex = KeyIndex(file)
+
+    # The position of the last row with each key
+    if keep == "last":
+        offset = 0
+        for chunk in chunks():
+            keys: pd.DataFrame = chunk[on] if on else chunk
+            index.add(keys, key_hashes(keys), offset)
+            offset += len(chunk)
+            report(label + " (pass 1)", offset)
+
+    kept: list[pd.DataFrame] = list()
+    offset = 0
+    for chunk in chunks():
+        keys = chunk[on] if on else chunk
+        hashes: np.ndarray = key_hashes(keys)
+
+        if keep == "first":
+            index.add(keys, hashes, offset, rows=chunk)  # Keeps the first rows
+        else:
+            rows: np.ndarray = np.arange(offset, offset + len(chunk))
+            kept.append(chunk[index.last(hashes) == rows])
+
+        offset += len(chunk)
+        report(label, offset)
+
+    if keep == "first":
+        kept = index.rows
+
+    return categorize_columns(pd.concat(kept, ignore_index=True), str_cols)
+
+
 ### INFER COLUMN TYPES ###
 
 
@@ -283,6 +919,8 @@ def isdate_time(s: str) -> bool:
     https://stackoverflow.com/questions/9507648/datetime-from-string-in-python-best-guessing-string-format
     """
 
+    import dateutil.parser  # Loaded on first use
+
     try:
         dt: Any = dateutil.parser.parse(s)
         return True
@@ -317,14 +955,22 @@ def smart_open(
 ### IMPORTING FUNCTIONS ###
 
 
+# Loaded user-defined functions, by path & modification time
+_user_fns: dict[tuple[str, int], dict[str, Any]] = dict()
+_user_fns_lock: threading.Lock = threading.Lock()
+
+
 def fns_from_path(rel_path: str) -> dict[str, ModuleType]:
     abs_path: str = FileSpec(rel_path).abs_path
+    key: tuple[str, int] = (abs_path, os.stat(abs_path).st_mtime_ns)
 
-    mod: ModuleType = SourceFileLoader("module.name", abs_path).load_module()
-    pairs: list[tuple[str, Any]] = inspect.getmembers(mod, inspect.isfunction)
-    fns_dict: dict[str, Any] = {k: v for k, v in pairs}
+    with _user_fns_lock:
+        if key not in _user_fns:
+            mod: ModuleType = SourceFileLoader("module.name", abs_path).load_module()
+            pairs: list[tuple[str, Any]] = inspect.getmembers(mod, inspect.isfunction)
+            _user_fns[key] = {k: v for k, v in pairs}
 
-    return fns_dict
+        return _user_fns[key]
 
 
 ### END ###
@@ -5,12 +5,28 @@
 RUN A SCRIPT OR REPL
 """
 
-from typing import Any
+import io
+import os
+import sys
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Optional
+
+from tabulate import tabulate
 
 from .program import Tables
 from .commands import Namespace
 from .lang import run_mode, repl_mode
 from .reader import DISPLAY_VERBS
+from .readwrite import FileSpec
+from .trace import Tracer
+from .memory import MemoryMonitor
+from .spill import StackSpiller, parse_bytes
+from .cache import ResultCache, CACHE_BYTES
+from .preview import Preview
 
 
 def run_script(
@@ -18,6 +34,10 @@ def run_script(
 ) -> None:
     """Execute a 'T' script file."""
 
+    if kwargs.get("batch"):
+        run_batch(user, file, src, data, output, log, verbose, **kwargs)
+        return
+
     scriptargs: dict = fixup_quotes(kwargs.get("scriptargs", {}))
 
     with Tables(user=user, src=src, data=data, output=output, log=log, repl=False) as T:
@@ -30,12 +50,40 @@ def run_script(
                 T.call_stack.push(Namespace(scriptargs))
             if verbose:
                 T.debug = True
+            if kwargs.get("lazy", False):
+                T.lazy = True
+            if kwargs.get("cache"):
+                T.memo.dir = kwargs["cache"]
+            if kwargs.get("jobs"):
+                T.jobs = kwargs["jobs"]
+            if kwargs.get("timeout"):
+                T.timeout = kwargs["timeout"]
+            if kwargs.get("trace"):
+                T.tracer = Tracer()
+            if kwargs.get("memory"):
+                T.monitor = MemoryMonitor(kwargs["memory"])
+            if kwargs.get("stack_budget"):
+                T.spiller = StackSpiller(
+                    parse_bytes(kwargs["stack_budget"]),
+                    dir=kwargs.get("scratch"),
+                    verbose=verbose,
+                )
 
-            if file:
+            if file and kwargs.get("explain", False):
+                T.explain(file, scriptargs)
+            elif file:
                 last_verb = None
                 exit = False
 
-                exit, last_verb = run_mode(file, T)
+                try:
+                    exit, last_verb = run_mode(file, T, kwargs.get("checkpoint"))
+                finally:
+                    if T.tracer:
+                        T.tracer.write(kwargs["trace"])
+                    if T.monitor:
+                        T.monitor.close()
+                    if T.spiller and verbose:
+                        print(T.spiller.stats.summary())
 
                 if (not exit) and last_verb and (last_verb not in DISPLAY_VERBS):
                     T.write()
@@ -71,12 +119,47 @@ def run_repl(
                 T.call_stack.push(Namespace(scriptargs))
             if verbose:
                 T.debug = True
+            if kwargs.get("cache"):
+                T.memo.dir = kwargs["cache"]
+            if kwargs.get("trace"):
+                T.tracer = Tracer()
+            if kwargs.get("memory"):
+                T.monitor = MemoryMonitor(kwargs["memory"])
+            if kwargs.get("stack_budget"):
+                T.spiller = StackSpiller(
+                    parse_bytes(kwargs["stack_budget"]),
+                    dir=kwargs.get("scratch"),
+                    verbose=verbose,
+                )
+
+            # Cache the results of commands, unless the cap is 0
+            max_bytes: int = (
+                parse_bytes(kwargs["result_cache"])
+                if kwargs.get("result_cache")
+                else CACHE_BYTES
+            )
+            if max_bytes > 0:
+                T.cache = ResultCache(max_bytes)
+            if kwargs.get("timeout"):
+                T.timeout = kwargs["timeout"]
+            if kwargs.get("preview"):
+                T.preview = Preview(
+                    kwargs["preview"],
+                    sample=kwargs.get("preview_sample", False),
+                    depth=T.call_stack.len(),
+                )
 
             print()
             print("Welcome to T:")
             print()
 
-            repl_mode(T)
+            try:
+                repl_mode(T)
+            finally:
+                if T.tracer:
+                    T.tracer.write(kwargs["trace"])
+                if T.monitor:
+                    T.monitor.close()
 
             print()
             print("Bye!")
@@ -86,6 +169,171 @@ def run_repl(
             print("Exception executing program: ", e)
 
 
+def run_batch(
+    user, file: str, src: str, data: str, output: str, log: str, verbose: bool, **kwargs
+) -> None:
+    """Execute a 'T' script once for each set of script args in a manifest.
+
+    The manifest is a JSON list of jobs (or an object with a "jobs" list). Each job
+    has "scriptargs" and, optionally, the "output" path to write its result to.
+    For example:
+
+    [
+        {"scriptargs": {"paf": "2020_alt_assignments_NC.csv"}, "output": "alt.csv"},
+        {"scriptargs": {"paf": "2020_precinct_assignments_NC.csv"}}
+    ]
+
+    With more than one job (-j), the first job runs first, and then the rest run in
+    a pool of worker processes. Where the workers are forked, they start with the
+    results of the scripts the first job ran -- e.g., reading the census & election
+    data -- already in memory, so the shared input tables are read once. Elsewhere,
+    e.g., on Windows & macOS, they share them only through the cache directory.
+    """
+
+    with open(kwargs["batch"], "r") as f:
+        manifest: Any = json.load(f)
+    jobs: list[dict] = manifest["jobs"] if isinstance(manifest, dict) else manifest
+
+    settings: dict[str, Any] = dict(
+        user=user,
+        src=src,
+        data=data,
+        output=output,
+        log=log,
+        verbose=verbose,
+        lazy=kwargs.get("lazy", False),
+        cache=kwargs.get("cache"),
+    )
+    name: str = FileSpec(file).name
+    specs: list[tuple[dict, str]] = [
+        (job.get("scriptargs", {}), job.get("output", f"{name}_{i + 1}.csv"))
+        for i, job in enumerate(jobs)
+    ]
+
+    start: float = time.perf_counter()
+    results: list[dict] = list()
+
+    n_workers: int = min(kwargs.get("jobs") or 1, len(specs))
+    if n_workers > 1:
+        # Warm the memoized script results, so the workers share them
+        results.append(run_job(file, *specs[0], **settings))
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=pool_context()
+        ) as pool:
+            futures: list = [
+                pool.submit(run_job, file, *spec, **settings) for spec in specs[1:]
+            ]
+            results.extend(future.result() for future in futures)
+    else:
+        results = [run_job(file, *spec, **settings) for spec in specs]
+
+    elapsed: float = time.perf_counter() - start
+
+    rows: list[list[Any]] = list()
+    for i, result in enumerate(results):
+        rows.append(
+            [
+                i + 1,
+                json.dumps(result["scriptargs"]),
+                result["output"],
+                result["rows"] if result["ok"] else "",
+                f"{result['seconds']:.2f}",
+                "ok" if result["ok"] else "FAILED",
+            ]
+        )
+        if not result["ok"]:
+            print(f"Job {i + 1} failed:")
+            print(result["log"])
+
+    print(
+        tabulate(
+            rows,
+            headers=["#", "SCRIPTARGS", "OUTPUT", "ROWS", "SECONDS", "STATUS"],
+            disable_numparse=True,
+        )
+    )
+    print()
+    print(
+        f"{len(results)} jobs in {elapsed:.2f} seconds "
+        f"({sum(r['seconds'] for r in results):.2f} seconds of work, {n_workers} workers)"
+    )
+    print()
+
+
+def run_job(
+    file: str,
+    scriptargs: dict,
+    out_path: str,
+    *,
+    user: Optional[str],
+    src: str,
+    data: str,
+    output: str,
+    log: str,
+    verbose: bool,
+    lazy: bool,
+    cache: Optional[str],
+) -> dict[str, Any]:
+    """Run one job of a batch & write its result. Capture what it prints."""
+
+    start: float = time.perf_counter()
+    ok: bool = False
+    n_rows: Optional[int] = None
+    buffer: io.StringIO = io.StringIO()
+
+    with redirect_stdout(buffer):
+        with Tables(
+            user=user, src=src, data=data, output=output, log=log, silent=True
+        ) as T:
+            try:
+                if scriptargs:
+                    T.call_stack.push(Namespace(fixup_quotes(scriptargs)))
+                T.debug = verbose
+                T.lazy = lazy
+                T.memo.dir = cache
+
+                exit: bool
+                exit, _ = run_mode(file, T)
+
+                if not exit and not T.table_stack.isempty():
+                    path: str = T.output + out_path if T.output else out_path
+                    if os.path.dirname(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+                    # write() reports errors, rather than raising them
+                    format: str = "JSON" if out_path.endswith(".json") else "CSV"
+                    n_written: int = len(T.written)
+                    T.write(out_path, format)
+                    n_rows = T.n_rows
+                    ok = FileSpec(path).abs_path in T.written[n_written:]
+
+            except Exception as e:
+                print("Exception executing program: ", e)
+
+    return dict(
+        scriptargs=scriptargs,
+        output=out_path,
+        rows=n_rows,
+        seconds=time.perf_counter() - start,
+        ok=ok,
+        log=buffer.getvalue(),
+    )
+
+
+def pool_context() -> Any:
+    """Fork the workers of a batch, where that's safe, so they inherit the memoized results
+
+    Forking isn't available on Windows, and isn't safe on macOS, so use the
+    default there.
+    """
+
+    if "fork" in multiprocessing.get_all_start_methods() and sys.platform != "darwin":
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
 # Helper for script args
 
 
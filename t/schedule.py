@@ -0,0 +1,201 @@
+# schedule.py
+#!/usr/bin/env python3
+
+"""
+SCHEDULE - Run independent reads & scripts concurrently
+
+A 'from' command that reads a CSV file or runs a script doesn't depend on
+the tables on the stack, only on files. So the 'from' commands in a script
+can run ahead of time, at the same time, in a pool of processes. When the
+script gets to each of them, it's interpreted as usual -- so it's traced,
+memoized, & checkpointed the same way -- but its tables are the ones that were
+read ahead, instead of reading them then.
+
+A 'from' command depends on the files that earlier commands write, so only
+the 'from' commands before the first 'write' or 'save_session' -- or the first
+script that isn't run ahead, since it might write files -- run ahead. Scripts
+that write or display anything -- or that turn out to use tables already on the
+stack -- aren't run ahead; they run in order, as usual. Nor is anything run ahead
+when previewing, since previews read just some of the rows.
+"""
+
+import io
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import Any, Optional
+
+from .commands import Command, Namespace
+from .datamodel import Table
+from .memo import ispure
+from .readwrite import FileSpec, is_glob
+
+# The tables a 'from' command pushed (bottom first), & the files & globs it read
+Prefetched = tuple[list[Table], list[str], list[str]]
+
+
+class Prefetcher:
+    """Run the independent 'from' commands in a script concurrently"""
+
+    env: Any  # Program
+    futures: dict[int, Future]
+    executor: Optional[ProcessPoolExecutor]
+
+    def __init__(self, commands: list[str], env: Any, start: int = 0) -> None:
+        self.env = env
+        self.futures = dict()
+        self.executor = None
+
+        if env.preview is not None:
+            return
+
+        independent: dict[int, str] = dict()
+        for i, command in enumerate(commands[start:], start):
+            try:
+                cmd: Command = Command(command, env.call_stack.first())
+                bound: str = cmd.bind()
+                cmd.parse()
+            except:
+                break
+
+            if cmd.verb in ["write", "save_session"]:
+                break
+            if cmd.verb == "from_":
+                if self._isindependent(cmd, env):
+                    independent[i] = bound
+                elif self._isscript(cmd):
+                    break  # It might write files that later commands read
+
+        if len(independent) < 2:
+            return
+
+        self.executor = ProcessPoolExecutor(max_workers=env.jobs)
+        for i, command in independent.items():
+            self.futures[i] = self.executor.submit(
+                run_ahead,
+                command,
+                user=env.user,
+                src=env.src,
+                data=env.data,
+                cache=env.memo.dir,
+                lazy=env.lazy,
+            )
+
+    def take(self, i: int) -> Optional[Prefetched]:
+        """The result of command #i, if it ran ahead. Otherwise, run it in order."""
+
+        future: Optional[Future] = self.futures.pop(i, None)
+        if future is None:
+            return None
+
+        try:
+            return future.result()
+        except:
+            return None
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _isscript(self, cmd: Command) -> bool:
+        return bool(cmd.positional_args) and (
+            FileSpec(cmd.positional_args[0].strip("'")).extension == ".t"
+        )
+
+    def _isindependent(self, cmd: Command, env: Any) -> bool:
+        if cmd.n_pos != 1:
+            return False
+
+        name: str = cmd.positional_args[0].strip("'")
+        match FileSpec(name).extension:
+            case ".t":
+                return ispure_script(name, cmd.keyword_args, env.src)
+            case _:
+                return not is_glob(name)  # Globs are already read concurrently
+
+
+def run_ahead(
+    command: str,
+    *,
+    user: Optional[str],
+    src: Optional[str],
+    data: Optional[str],
+    cache: Optional[str],
+    lazy: bool,
+) -> Optional[Prefetched]:
+    """Run a 'from' command in a new program, in a worker process
+
+    Return the tables it pushed (bottom first), the files it read, & the globs
+    it read, or None if it failed or it used tables on the stack.
+    """
+
+    from .lang import interpret, ERROR  # lang imports this module
+    from .program import Program
+
+    env = Program(user=user, src=src, data=data, repl=False, silent=True)
+    env.memo.dir = cache
+    env.lazy = lazy
+
+    # Stand in for the tables on the stack of the program that called
+    floor: Table = Table()
+    env.table_stack.push(floor)
+
+    with redirect_stdout(io.StringIO()):
+        with env.memo.recording(1) as recording:
+            result: str = interpret(command, env)
+
+    if result == ERROR or not recording.memoizable:
+        return None
+
+    tables: list[Table] = env.table_stack.top_n(env.table_stack.len())
+    tables.reverse()  # Bottom first
+    if not tables or tables[0] is not floor:
+        return None
+
+    return tables[1:], sorted(recording.paths), sorted(recording.patterns)
+
+
+def push_prefetched(prefetched: Prefetched, env: Any) -> bool:
+    """Push the tables a script pushed when it ran ahead. Return whether it exited with errors."""
+
+    tables, paths, patterns = prefetched
+    for table in tables:
+        env.table_stack.push(table)
+    env.memo.record(*paths)
+    for pattern in patterns:
+        env.memo.record_glob(pattern, [])
+    env._update_table_shortcuts()
+
+    return False
+
+
+def ispure_script(rel_path: str, call_args: dict, src: Optional[str]) -> bool:
+    """Does a script -- and the scripts it runs -- only push tables on the stack?"""
+
+    from .lang import read_script  # lang imports this module
+
+    try:
+        commands: list[str]
+        commands, _ = read_script(src + rel_path if src else rel_path)
+
+        for command in commands:
+            if not ispure(command):
+                return False
+
+            cmd: Command = Command(command, Namespace(call_args))
+            cmd.bind()
+            cmd.parse()
+
+            if cmd.verb == "from_":
+                name: str = cmd.positional_args[0].strip("'")
+                if FileSpec(name).extension == ".t" and not ispure_script(
+                    name, cmd.keyword_args, src
+                ):
+                    return False
+    except:
+        return False
+
+    return True
+
+
+### END ###
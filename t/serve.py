@@ -0,0 +1,231 @@
+# serve.py
+#!/usr/bin/env python3
+
+"""
+SERVE - Run T scripts in a long-lived server, over a Unix domain socket
+
+Starting T -- Python, importing pandas, reading the same data files -- takes
+longer than running many scripts. A server starts once and stays warm: the
+memoized results of scripts (e.g., reading the census & election data) and
+the user-defined functions stay loaded between requests.
+
+Each request runs in its own thread, with its own program & table stack. What
+the script prints is streamed back to the client, followed by a summary: did
+it succeed, how long did it take, and what files did it write.
+
+The protocol is JSON, one object per line. A request:
+
+    {"file": "districts.t", "scriptargs": {"paf": "2020_alt_assignments_NC.csv"}}
+
+Responses:
+
+    {"out": "<a line of output>"}
+    ...
+    {"done": true, "ok": true, "seconds": 0.42, "written": ["/abs/path.csv"]}
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import socketserver
+from typing import Any, Optional, TextIO
+
+
+class ThreadStdout:
+    """Stand in for sys.stdout, sending each thread's output where it says"""
+
+    _default: TextIO
+    _local: threading.local
+
+    def __init__(self, default: TextIO) -> None:
+        self._default = default
+        self._local = threading.local()
+
+    def redirect(self, stream: Optional[Any]) -> None:
+        self._local.stream = stream
+
+    def _stream(self) -> Any:
+        return getattr(self._local, "stream", None) or self._default
+
+    def write(self, text: str) -> int:
+        return self._stream().write(text)
+
+    def flush(self) -> None:
+        self._stream().flush()
+
+
+class LineSender:
+    """A file-like object that sends what's written to a client, a line at a time"""
+
+    _wfile: Any
+    _buffer: str
+
+    def __init__(self, wfile: Any) -> None:
+        self._wfile = wfile
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            send(self._wfile, {"out": line})
+
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            send(self._wfile, {"out": self._buffer})
+            self._buffer = ""
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Run the script a client requests"""
+
+    server: "Server"
+
+    def handle(self) -> None:
+        try:
+            request: dict[str, Any] = json.loads(self.rfile.readline())
+        except Exception as e:
+            send(self.wfile, {"done": True, "ok": False, "error": str(e)})
+            return
+
+        sender: LineSender = LineSender(self.wfile)
+        self.server.stdout.redirect(sender)
+        try:
+            summary: dict[str, Any] = run_request(request, **self.server.settings)
+        finally:
+            sender.flush()
+            self.server.stdout.redirect(None)
+
+        send(self.wfile, {"done": True, **summary})
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    settings: dict[str, Any]
+    stdout: ThreadStdout
+
+
+def run_request(
+    request: dict[str, Any],
+    *,
+    user: Optional[str],
+    src: Optional[str],
+    data: Optional[str],
+    output: Optional[str],
+    cache: Optional[str],
+) -> dict[str, Any]:
+    """Run a script for a client, as run_script() does, in a new program"""
+
+    # Clients only need connect(), so the rest of T (& pandas) loads here
+    from .commands import Namespace
+    from .program import Tables
+    from .lang import run_mode
+    from .reader import DISPLAY_VERBS
+    from .run import fixup_quotes
+
+    start: float = time.perf_counter()
+    ok: bool = False
+    written: list[str] = list()
+
+    with Tables(user=user, src=src, data=data, output=output, silent=True) as T:
+        try:
+            scriptargs: dict = fixup_quotes(request.get("scriptargs", {}))
+            if scriptargs:
+                T.call_stack.push(Namespace(scriptargs))
+            T.lazy = request.get("lazy", False)
+            T.memo.dir = cache
+
+            exit: bool
+            last_verb: Optional[str]
+            exit, last_verb = run_mode(request["file"], T)
+
+            if (not exit) and last_verb and (last_verb not in DISPLAY_VERBS):
+                T.write()
+
+            print()
+            ok = not exit
+
+        except Exception as e:
+            print("Exception executing program: ", e)
+
+        written = T.written
+
+    return dict(ok=ok, seconds=round(time.perf_counter() - start, 3), written=written)
+
+
+def serve(
+    path: str,
+    *,
+    user: Optional[str] = None,
+    src: Optional[str] = None,
+    data: Optional[str] = None,
+    output: Optional[str] = None,
+    cache: Optional[str] = None,
+) -> None:
+    """Serve requests to run T scripts on a Unix domain socket, until interrupted"""
+
+    if os.path.exists(path):
+        os.remove(path)  # Left over from a server that didn't shut down cleanly
+
+    stdout: ThreadStdout = ThreadStdout(sys.stdout)
+    sys.stdout = stdout  # type: ignore
+
+    with Server(path, Handler) as server:
+        server.settings = dict(
+            user=user, src=src, data=data, output=output, cache=cache
+        )
+        server.stdout = stdout
+
+        print(f"Serving T on {path} ...")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sys.stdout = stdout._default
+            os.remove(path)
+
+
+def connect(
+    path: str, file: str, scriptargs: Optional[dict] = None, lazy: bool = False
+) -> bool:
+    """Ask a server to run a script. Print what it prints. Return whether it succeeded."""
+
+    request: dict[str, Any] = dict(file=file, scriptargs=scriptargs or {}, lazy=lazy)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode())
+
+        with sock.makefile("r") as responses:
+            for line in responses:
+                response: dict[str, Any] = json.loads(line)
+
+                if "out" in response:
+                    print(response["out"])
+                if response.get("done"):
+                    for written in response.get("written", []):
+                        print(f"Wrote {written}")
+                    if "error" in response:
+                        print("Bad request:", response["error"])
+
+                    return response.get("ok", False)
+
+    return False
+
+
+### HELPERS ###
+
+
+def send(wfile: Any, message: dict[str, Any]) -> None:
+    wfile.write((json.dumps(message) + "\n").encode())
+    wfile.flush()
+
+
+### END ###
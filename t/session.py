@@ -0,0 +1,283 @@
+# session.py
+#!/usr/bin/env python3
+
+"""
+SESSION - Save & restore the state of a program: its stacks of tables & namespaces
+
+A session file holds the tables on the stack -- with their column metadata &
+stats -- and the namespaces of script arguments, pickled (the DataFrames'
+arrays are written as raw buffers, so this is fast). Files are written to a
+temporary file and then renamed, so a crash never leaves half a session.
+
+Checkpoints use sessions to resume a script that failed: as the script runs,
+the session is saved with the commands done. When the same script is run again
+with the same args -- and those commands haven't changed, though the rest of the
+script may have been fixed, nor have the files they read -- the checkpoint is
+loaded, and the script picks up where it left off.
+
+Tables on the stack aren't modified, so a checkpoint pickles each table once,
+to a file of its own, and a save just writes the tables that are new since the
+last one & a small file listing them.
+"""
+
+import os
+import time
+import uuid
+import pickle
+import shutil
+import hashlib
+import weakref
+from typing import Any, Optional
+
+from .commands import Namespace
+from .datamodel import Table
+from .memo import Fingerprint, Recording, fingerprint, matches
+
+SESSION_VERSION: int = 3  # Bump when what's saved changes
+CHECKPOINT_SECONDS: float = 1.0  # Only checkpoint after this much work
+CHECKPOINT_RATIO: float = 10.0  # & this many times as long as the last save took
+
+
+def save_session(
+    env: Any, path: str, tables: Optional[list[Table]] = None, **extra: Any
+) -> None:
+    """Save the stacks of a program (& any extra info) to a file.
+
+    By default, save the tables on the stack (top first), else the ones given.
+    """
+
+    if tables is None:
+        tables = env.table_stack.top_n(env.table_stack.len())
+    else:
+        tables = list(tables)
+    namespaces: list[Namespace] = list(env.call_stack._queue_)
+    tables.reverse()  # Bottom first
+    namespaces.reverse()
+
+    session: dict[str, Any] = dict(
+        version=SESSION_VERSION, tables=tables, namespaces=namespaces, **extra
+    )
+
+    dump(session, path)
+
+
+def load_session(env: Any, path: str, namespaces: bool = True) -> dict[str, Any]:
+    """Replace the table stack of a program -- & optionally its namespaces -- with a saved session"""
+
+    with open(path, "rb") as f:
+        session: dict[str, Any] = pickle.load(f)
+
+    if not isinstance(session, dict) or session.get("version") != SESSION_VERSION:
+        raise Exception(f"{path} isn't a session saved by this version of T.")
+
+    restore(env, session["tables"], session["namespaces"] if namespaces else None)
+
+    return session
+
+
+def restore(
+    env: Any, tables: list[Table], namespaces: Optional[list[Namespace]] = None
+) -> None:
+    """Replace the table stack of a program -- & optionally its namespaces -- bottom first"""
+
+    env.table_stack.clear()
+    for table in tables:
+        env.table_stack.push(table)
+
+    if namespaces is not None:
+        env.call_stack.clear()
+        for namespace in namespaces:
+            env.call_stack.push(namespace)
+
+    if env.table_stack.isempty():
+        env._reset_cached_props()
+    else:
+        env._update_table_shortcuts()
+
+
+def dump(obj: Any, path: str) -> None:
+    """Pickle to a temporary file & rename it, so a crash never leaves half a file"""
+
+    dir: str = os.path.dirname(path)
+    if dir:
+        os.makedirs(dir, exist_ok=True)
+
+    temp: str = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+
+
+class Checkpoint:
+    """Save a script's progress, so it can resume where it left off if it fails.
+
+    After each command that completes, mark the point: the number of commands
+    done & the tables on the stack. Save it if enough time has passed since the
+    last save -- at least CHECKPOINT_SECONDS, and CHECKPOINT_RATIO times as long
+    as that save took, so saving big tables doesn't take longer than the script.
+    If a command fails, save the last point marked, so the script resumes with
+    the command that failed.
+
+    The checkpoint file lists the files the tables are pickled to, in a
+    directory beside it, <path>.tables. And it lists the files the commands
+    read, like a memoized result, so it isn't resumed if they've changed.
+    """
+
+    path: str
+    dir: str  # for the tables
+    key: str
+    commands: list[str]
+    saved: int  # the number of commands done, as of the last save
+    last: float  # when it was saved
+    wait: float  # seconds to wait before saving again
+    done: int  # the number of commands done, as of the last mark
+    tables: list[weakref.ref]  # the stack then, top first
+    files: weakref.WeakKeyDictionary  # table -> the file it's saved in
+    reads: Recording  # the files -- & globs -- the commands read
+
+    def __init__(
+        self, path: str, script_path: str, commands: list[str], env: Any
+    ) -> None:
+        self.path = path
+        self.dir = path + ".tables"
+        self.key = checkpoint_key(script_path, env)
+        self.commands = commands
+        self.saved = 0
+        self.last = time.perf_counter()
+        self.wait = CHECKPOINT_SECONDS
+        self.done = 0
+        self.tables = list()
+        self.files = weakref.WeakKeyDictionary()
+        self.reads = Recording(0)
+
+    def resume(self, env: Any) -> int:
+        """Load the checkpoint for this script, if any. Return the commands to skip."""
+
+        if not os.path.exists(self.path):
+            return 0
+
+        try:
+            with open(self.path, "rb") as f:
+                session: dict[str, Any] = pickle.load(f)
+            if (
+                session.get("version") != SESSION_VERSION
+                or "files" not in session  # A session, not a checkpoint
+                or session.get("key") != self.key
+                or "deps" not in session  # From before files were fingerprinted
+                or session["commands"] != self.commands[: session["done"]]
+            ):
+                return 0  # For another script or args, or the commands changed
+
+            deps: dict[str, Fingerprint] = session["deps"]
+            globs: dict[str, list[str]] = session["globs"]
+            if any(fingerprint(path) != fp for path, fp in deps.items()) or any(
+                matches(pattern) != paths for pattern, paths in globs.items()
+            ):
+                print(f"Not resuming from {self.path}: the files read have changed")
+                return 0
+
+            # A table can be on the stack more than once, e.g., after duplicate()
+            loaded: dict[str, Table] = dict()
+            for file in session["files"]:
+                if file not in loaded:
+                    with open(os.path.join(self.dir, file), "rb") as f:
+                        loaded[file] = pickle.load(f)
+                    self.files[loaded[file]] = file  # Already saved
+            restore(
+                env, [loaded[file] for file in session["files"]], session["namespaces"]
+            )
+            self.reads.paths.update(deps.keys())
+            self.reads.patterns.update(globs.keys())
+        except Exception as e:
+            print(f"Not resuming from {self.path}: {e}")
+            return 0
+
+        self.saved = self.done = session["done"]
+        self.mark(env, self.done)
+        print(f"Resuming after command {self.done}, from {self.path}")
+
+        return self.done
+
+    def mark(self, env: Any, done: int) -> None:
+        """The first 'done' commands are done. Save them, if it's been a while."""
+
+        self.done = done
+        self.tables = [weakref.ref(t) for t in env.table_stack._queue_]
+
+        if time.perf_counter() - self.last >= self.wait:
+            self._save(env, env.table_stack.top_n(env.table_stack.len()))
+
+    def save_last(self, env: Any) -> None:
+        """A command failed. Save the last point marked, if it hasn't been."""
+
+        if self.done <= self.saved:
+            return
+
+        tables: list[Optional[Table]] = [ref() for ref in self.tables]
+        if any(t is None for t in tables):
+            return  # The command dropped them
+
+        self._save(env, tables)
+
+    def remove(self) -> None:
+        """The script finished, so it won't be resumed"""
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _save(self, env: Any, tables: list[Any]) -> None:
+        start: float = time.perf_counter()
+        os.makedirs(self.dir, exist_ok=True)
+
+        # Just pickle the tables that weren't on the stack the last time
+        files: list[str] = list()
+        for table in reversed(tables):  # Bottom first
+            if table not in self.files:
+                file: str = uuid.uuid4().hex + ".pickle"
+                dump(table, os.path.join(self.dir, file))
+                self.files[table] = file
+            files.append(self.files[table])
+
+        namespaces: list[Namespace] = list(env.call_stack._queue_)
+        namespaces.reverse()
+        session: dict[str, Any] = dict(
+            version=SESSION_VERSION,
+            key=self.key,
+            done=self.done,
+            commands=self.commands[: self.done],
+            files=files,
+            namespaces=namespaces,
+            deps={path: fingerprint(path) for path in sorted(self.reads.paths)},
+            globs={
+                pattern: matches(pattern) for pattern in sorted(self.reads.patterns)
+            },
+        )
+        dump(session, self.path)
+
+        # Then remove the tables that aren't on the stack any more
+        for file in set(os.listdir(self.dir)) - set(files):
+            os.remove(os.path.join(self.dir, file))
+
+        self.saved = self.done
+        self.last = time.perf_counter()
+        self.wait = max(CHECKPOINT_SECONDS, CHECKPOINT_RATIO * (self.last - start))
+
+
+def checkpoint_key(script_path: str, env: Any) -> str:
+    """Key a checkpoint by the script, its args, & where it looks for files"""
+
+    args: dict[str, str] = env.call_stack.first()._args
+    parts: list[Any] = [
+        SESSION_VERSION,
+        os.path.abspath(script_path),
+        sorted((str(k), str(v)) for k, v in args.items()),
+        env.user,
+        env.src,
+        env.data,
+    ]
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+### END ###
@@ -0,0 +1,227 @@
+# spill.py
+#!/usr/bin/env python3
+
+"""
+SPILL - Keep the table stack within a memory budget
+
+Every table on the stack is kept in memory, but usually only the top one or
+two are used by the next command. When the tables on the stack use more memory
+than the budget, spill the lowest ones to scratch files, until they fit. The
+top table is never spilled.
+
+A spilled table keeps its columns & shape, but not its data. When something
+uses its data -- e.g., swap, rotate, join, or union brings it into play -- it
+is reloaded, transparently.
+
+Numeric, boolean, & datetime columns are saved as .npy files, which are
+memory-mapped to reload them. Other columns (strings, categories, etc.) and the
+index are pickled.
+"""
+
+import os
+import time
+import pickle
+import shutil
+import tempfile
+import weakref
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .utils import format_bytes
+
+NPY_KINDS: str = "biufcmM"  # numpy dtype kinds saved as .npy
+
+UNITS: dict[str, int] = {
+    "B": 1,
+    "KB": 1024,
+    "MB": 1024**2,
+    "GB": 1024**3,
+    "TB": 1024**4,
+}
+
+
+class SpillStats:
+    """Counts of what was spilled & reloaded, and how long it took"""
+
+    spills: int
+    reloads: int
+    bytes_spilled: int
+    bytes_reloaded: int
+    seconds: float
+    verbose: bool
+
+    def __init__(self, verbose: bool = False) -> None:
+        self.spills = 0
+        self.reloads = 0
+        self.bytes_spilled = 0
+        self.bytes_reloaded = 0
+        self.seconds = 0.0
+        self.verbose = verbose
+
+    def note(self, what: str, n_bytes: int, seconds: float, command: str) -> None:
+        if what == "spill":
+            self.spills += 1
+            self.bytes_spilled += n_bytes
+        else:
+            self.reloads += 1
+            self.bytes_reloaded += n_bytes
+        self.seconds += seconds
+
+        if self.verbose:
+            print(
+                f"{what.capitalize()}ed {format_bytes(n_bytes)} in {seconds:.3f}s: {command}"
+            )
+
+    def summary(self) -> str:
+        return (
+            f"Spilled {self.spills} table(s), {format_bytes(self.bytes_spilled)}; "
+            f"reloaded {self.reloads}, {format_bytes(self.bytes_reloaded)}; "
+            f"in {self.seconds:.3f}s"
+        )
+
+
+class SpilledData:
+    """A DataFrame saved in a scratch directory"""
+
+    path: str
+    columns: list[Any]
+    npy: dict[int, str]  # column position -> file
+    shape: tuple[int, int]
+    n_bytes: int  # in memory, before it was spilled
+    stats: SpillStats
+
+    def __init__(
+        self, df: pd.DataFrame, dir: str, n_bytes: int, stats: SpillStats, command: str
+    ) -> None:
+        start: float = time.perf_counter()
+
+        self.path = tempfile.mkdtemp(prefix="table-", dir=dir)
+        self.columns = list(df.columns)
+        self.npy = dict()
+        self.shape = df.shape
+        self.n_bytes = n_bytes
+        self.stats = stats
+
+        # Delete the files when they're no longer needed
+        weakref.finalize(self, shutil.rmtree, self.path, True)
+
+        others: list[int] = list()
+        for i in range(df.shape[1]):
+            series: pd.Series = df.iloc[:, i]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in NPY_KINDS:
+                file: str = os.path.join(self.path, f"{i}.npy")
+                np.save(file, series.to_numpy(), allow_pickle=False)
+                self.npy[i] = file
+            else:
+                others.append(i)
+
+        with open(os.path.join(self.path, "other.pickle"), "wb") as f:
+            pickle.dump((df.index, df.iloc[:, others]), f)
+
+        stats.note("spill", n_bytes, time.perf_counter() - start, command)
+
+    def load(self, command: str) -> pd.DataFrame:
+        """Reload the DataFrame. The files are kept until this is deleted."""
+
+        start: float = time.perf_counter()
+
+        with open(os.path.join(self.path, "other.pickle"), "rb") as f:
+            index: pd.Index
+            others: pd.DataFrame
+            index, others = pickle.load(f)
+
+        # Memory-map the arrays copy-on-write, rather than reading them into
+        # buffers of their own first: pandas copies them into its blocks
+        data: dict[int, Any] = dict()
+        k: int = 0
+        for i in range(len(self.columns)):
+            if i in self.npy:
+                data[i] = np.load(self.npy[i], mmap_mode="c")
+            else:
+                data[i] = others.iloc[:, k].array
+                k += 1
+
+        df: pd.DataFrame = pd.DataFrame(data, index=index)
+        df.columns = self.columns
+
+        self.stats.note("reload", self.n_bytes, time.perf_counter() - start, command)
+
+        return df
+
+
+class StackSpiller:
+    """Spill the lowest tables on the stack, to keep it within a memory budget"""
+
+    budget: int  # bytes
+    dir: Optional[str]  # scratch, created when needed
+    stats: SpillStats
+    _sizes: weakref.WeakKeyDictionary  # table -> bytes in memory
+
+    def __init__(
+        self, budget: int, dir: Optional[str] = None, verbose: bool = False
+    ) -> None:
+        self.budget = budget
+        self.dir = dir
+        self.stats = SpillStats(verbose)
+        self._sizes = weakref.WeakKeyDictionary()
+
+    def enforce(self, tables: list[Any]) -> int:
+        """Spill tables -- bottom first, never the top -- until the rest fit in the budget
+
+        Return how many were spilled.
+        """
+
+        if tables:
+            tables[0].unspill()  # It's next to be used, e.g., after swap() or rotate()
+
+        in_memory: list[Any] = [t for t in tables if not t.isspilled()]
+        total: int = sum(self._size(t) for t in in_memory)
+        spilled: int = 0
+
+        for table in reversed(tables[1:]):
+            if total <= self.budget:
+                break
+            if table.isspilled():
+                continue
+
+            n_bytes: int = self._size(table)
+            table.spill(self._scratch(), n_bytes, self.stats)
+            total -= n_bytes
+            spilled += 1
+
+        return spilled
+
+    def _size(self, table: Any) -> int:
+        # Tables on the stack aren't modified, so their sizes are cached
+        if table not in self._sizes:
+            self._sizes[table] = table.n_bytes()
+
+        return self._sizes[table]
+
+    def _scratch(self) -> str:
+        if self.dir is None:
+            self.dir = tempfile.mkdtemp(prefix="t-spill-")
+            weakref.finalize(self, shutil.rmtree, self.dir, True)
+        else:
+            os.makedirs(self.dir, exist_ok=True)
+
+        return self.dir
+
+
+### HELPERS ###
+
+
+def parse_bytes(text: str) -> int:
+    """Parse a size like '2GB', '512 MB', or '1000000'"""
+
+    text = text.strip().upper()
+    for unit in sorted(UNITS.keys(), key=len, reverse=True):
+        if text.endswith(unit):
+            return int(float(text[: -len(unit)].strip()) * UNITS[unit])
+
+    return int(float(text))
+
+
+### END ###
@@ -37,6 +37,9 @@ class Stack:
     def second(self) -> Any:
         return self._queue_[1]
 
+    def top_n(self, n: int) -> list[Any]:
+        return [self._queue_[i] for i in range(n)]
+
     def replace_top(self, item) -> None:
         self._queue_[0] = item
 
@@ -0,0 +1,253 @@
+# trace.py
+#!/usr/bin/env python3
+
+"""
+TRACE - Record where the time goes when running a script
+
+For each command, record the wall time, split into phases:
+
+- parse: binding args & parsing the command
+- validate: validating the args -- making the verb -- & the rest of the
+  command handler, less the commands in the scripts it runs
+- op: the operation on the data, i.e., applying the verb, or reading or
+  writing a file
+- stats: recomputing the column stats of the new top table
+- display: showing the new top table (in the REPL)
+
+Phases don't nest: time in a phase that starts within another one, e.g.,
+showing the table in the REPL, counts toward the outer one.
+
+With the rows, columns, & bytes of the top table before & after. The bytes
+are shallow -- strings count just their pointers -- so measuring them doesn't
+scan the data and skew the times.
+
+The trace is written in the Chrome trace event format, so it loads in trace
+viewers like chrome://tracing or https://ui.perfetto.dev. Commands in scripts
+run with from(script.t, ...) nest within it. report() aggregates a trace by verb.
+"""
+
+import os
+import json
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Generator, Optional
+
+PHASES: list[str] = ["parse", "validate", "op", "stats", "display"]
+
+
+class CommandRecord:
+    """The measurements for a command that's running"""
+
+    command: str
+    start: float
+    phases: dict[str, float]  # seconds
+    active: list[str]  # the phases that are running, innermost last
+    nested: float  # seconds in the commands of scripts this command runs
+    args: dict[str, Any]  # other measurements to record, e.g., memory
+
+    def __init__(self, command: str) -> None:
+        self.command = command
+        self.start = time.perf_counter()
+        self.phases = {phase: 0.0 for phase in PHASES}
+        self.active = list()
+        self.nested = 0.0
+        self.args = dict()
+
+
+class Tracer:
+    """Record a trace of the commands a program runs"""
+
+    events: list[dict[str, Any]]
+    records: list[CommandRecord]  # the commands that are running, innermost last
+    origin: float
+
+    def __init__(self) -> None:
+        self.events = list()
+        self.records = list()
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def command(self, command: str, env: Any) -> Generator[None, None, None]:
+        """Trace a command"""
+
+        before: dict[str, int] = table_shape(env, "in")
+
+        record: CommandRecord = CommandRecord(command)
+        self.records.append(record)
+        outer: Optional[Tracer] = current()
+        _local.tracer = self
+        try:
+            yield
+        finally:
+            _local.tracer = outer
+            self.records.pop()
+            end: float = time.perf_counter()
+
+            total: float = end - record.start
+            if self.records:
+                self.records[-1].nested += total
+            record.phases["validate"] += max(
+                total - record.nested - sum(record.phases.values()), 0.0
+            )
+
+            args: dict[str, Any] = dict(command=command)
+            args.update(before)
+            args.update(table_shape(env, "out"))
+            args.update(
+                {f"{p}_ms": round(1000 * s, 3) for p, s in record.phases.items()}
+            )
+            args["nested_ms"] = round(1000 * record.nested, 3)
+            args.update(record.args)
+
+            self._add_event(verb_of(command), "command", record.start, end, args)
+
+    def phase(self, name: str) -> ContextManager:
+        """Time a phase of the command that's running"""
+
+        if not self.records or self.records[-1].active:
+            return nullcontext()  # Outside of any command, or within another phase
+
+        return self._phase(self.records[-1], name)
+
+    @contextmanager
+    def _phase(self, record: CommandRecord, name: str) -> Generator[None, None, None]:
+        record.active.append(name)
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            end: float = time.perf_counter()
+            record.active.remove(name)
+            record.phases[name] += end - start
+
+            self._add_event(name, "phase", start, end)
+
+    def write(self, rel_path: str) -> None:
+        """Write the trace as JSON"""
+
+        with open(rel_path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def _add_event(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        args: Optional[dict[str, Any]] = None,
+    ) -> None:
+        event: dict[str, Any] = dict(
+            name=name,
+            cat=category,
+            ph="X",  # A complete event, with a duration
+            ts=round(1e6 * (start - self.origin), 1),
+            dur=round(1e6 * (end - start), 1),
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        if args:
+            event["args"] = args
+
+        self.events.append(event)
+
+
+def report(rel_path: str) -> str:
+    """Summarize a trace by verb: counts, times by phase, & rows
+
+    Times are for the commands themselves, i.e., not including the commands
+    in the scripts they run.
+    """
+
+    from tabulate import tabulate
+
+    with open(rel_path, "r") as f:
+        events: list[dict[str, Any]] = json.load(f)["traceEvents"]
+
+    by_verb: dict[str, dict[str, float]] = dict()
+    for event in events:
+        if event.get("cat") != "command":
+            continue
+
+        args: dict[str, Any] = event.get("args", {})
+        totals: dict[str, float] = by_verb.setdefault(
+            event["name"],
+            dict(count=0, total_ms=0, rows_in=0, rows_out=0, **{p: 0 for p in PHASES}),
+        )
+        totals["count"] += 1
+        totals["total_ms"] += event["dur"] / 1000 - args.get("nested_ms", 0)
+        totals["rows_in"] += args.get("rows_in", 0)
+        totals["rows_out"] += args.get("rows_out", 0)
+        for p in PHASES:
+            totals[p] += args.get(f"{p}_ms", 0)
+
+    rows: list[list[Any]] = [
+        [verb, int(t["count"]), f"{t['total_ms']:.1f}"]
+        + [f"{t[p]:.1f}" for p in PHASES]
+        + [f"{int(t['rows_in']):,}", f"{int(t['rows_out']):,}"]
+        for verb, t in sorted(by_verb.items(), key=lambda x: -x[1]["total_ms"])
+    ]
+    headers: list[str] = (
+        ["VERB", "COUNT", "TOTAL MS"]
+        + [f"{p.upper()} MS" for p in PHASES]
+        + ["ROWS IN", "ROWS OUT"]
+    )
+
+    return tabulate(rows, headers=headers, disable_numparse=True)
+
+
+### HELPERS ###
+
+
+def verb_of(command: str) -> str:
+    verb: str = command.split("(", 1)[0].strip().lower()
+
+    return "from" if verb == "from_" else verb
+
+
+def table_shape(env: Any, suffix: str) -> dict[str, int]:
+    """The rows, cols, & shallow bytes of the top table, if any"""
+
+    if env.table_stack.isempty():
+        return dict()
+
+    top: Any = env.table_stack.first()
+
+    return {
+        f"rows_{suffix}": top.n_rows,
+        f"cols_{suffix}": top.n_cols,
+        f"bytes_{suffix}": top.n_bytes(deep=False),
+    }
+
+
+def phase(tracer: Optional[Tracer], name: str) -> ContextManager:
+    """Time a phase, if tracing"""
+
+    return tracer.phase(name) if tracer is not None else nullcontext()
+
+
+_local: threading.local = threading.local()
+
+
+def current() -> Optional[Tracer]:
+    """The tracer of the command running in this thread, if any"""
+
+    return getattr(_local, "tracer", None)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """A decorator to time a function as a phase of the command running in this thread"""
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            with phase(current(), name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+### END ###
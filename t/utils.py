@@ -241,6 +241,17 @@ def get_builtin_fn(name: str) -> Any:
     return getattr(builtins, name)
 
 
+def format_bytes(n: float) -> str:
+    """Format a number of bytes for people, e.g., 1.5 MB"""
+
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+    return f"{n:.1f} TB"
+
+
 #  TODO - Handle missing?
 # def ismissing(v: Any) -> bool:
 #     """Return True if v is missing, else False."""
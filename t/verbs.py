@@ -14,7 +14,7 @@ from .utils import parse_spec, tokenize, islistofstr
 from .expressions import has_valid_col_refs, has_valid_refs
 from .datamodel import (
     Table,
-    PD_TYPES,
+    CAST_TYPES,
     PD_JOIN_TYPES,
     PD_VALIDATE_TYPES,
     MergeHow,
@@ -25,6 +25,7 @@ from .datamodel import (
     PD_AGG_FNS,
 )
 from .udf import UDF
+from .trace import traced
 
 
 def isaggfn(fn: str) -> bool:
@@ -41,6 +42,9 @@ class Verb:
     1. Copy the input table
     2. Make the change to the table's dataframe
     3. Update the table's column metadata to match (to preserve aliases)
+
+    When tracing, making a verb is timed as its 'validate' phase, and applying
+    it as its 'op' phase.
     """
 
     _x_table: Optional[Table]
@@ -60,6 +64,14 @@ class Verb:
 
         self._new_table = None
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        if "__init__" in cls.__dict__:
+            setattr(cls, "__init__", traced("validate")(cls.__dict__["__init__"]))
+        if "apply" in cls.__dict__:
+            setattr(cls, "apply", traced("op")(cls.__dict__["apply"]))
+
     def apply(self) -> NoReturn:
         raise Exception("Not implemented.")
 
@@ -179,8 +191,9 @@ class DropVerb(Verb):
         self._new_table = self._x_table.copy()
 
         assert self._col_refs is not None
+        drop_cols: set[str] = set(self._col_refs)
         keep_cols: list[str] = [
-            name for name in self._x_table.col_names() if name not in self._col_refs
+            name for name in self._x_table.col_names() if name not in drop_cols
         ]
         self._new_table.do_keep_cols(keep_cols)
 
@@ -353,7 +366,7 @@ class CastVerb(Verb):
 
         self._validate_col_refs()
 
-        if dtype not in PD_TYPES:
+        if dtype not in CAST_TYPES:
             raise ValueError(f"Invalid dtype: {dtype}")
         self._dtype = dtype
 
@@ -438,6 +451,80 @@ class SortVerb(Verb):
         return self._new_table
 
 
+class DistinctVerb(Verb):
+    """DISTINCT rows, optionally on a subset of columns"""
+
+    _keep: str
+
+    def __init__(
+        self, x_table: Table, on: Optional[list[str]] = None, keep: str = "first"
+    ) -> None:
+        super().__init__()
+
+        if keep not in ["first", "last"]:
+            raise Exception(f"Invalid keep option: {keep}")
+
+        self._x_table = x_table
+        self._col_refs = on
+        self._keep = keep
+
+        if on:
+            self._validate_col_refs()
+
+    def apply(self) -> Table:
+        assert self._x_table is not None
+        self._new_table = self._x_table.copy()
+        self._new_table.do_distinct(self._col_refs, self._keep)
+
+        return self._new_table
+
+
+class TopVerb(Verb):
+    """TOP n rows, i.e., SORT and then take the FIRST n rows, optionally within groups
+
+    Only the rows that could make the cut are sorted, so this is faster than a full
+    sort when n is small relative to the number of rows.
+    """
+
+    _take: int
+    _ascending_list: list[bool]
+    _within: Optional[list[str]]
+
+    def __init__(
+        self,
+        x_table: Table,
+        n: int,
+        col_specs: list,
+        within: Optional[list[str]] = None,
+    ) -> None:
+        super().__init__()
+
+        if n < 0:
+            raise Exception(f"Invalid number of rows: {n}")
+
+        self._x_table = x_table
+        self._take = n
+        self._col_specs = col_specs
+        self._within = within
+
+        self._col_refs, self._ascending_list = self._unzip_sort_specs()
+
+        self._validate_col_refs()
+        if within:
+            self._validate_col_refs(within)
+
+    def apply(self) -> Table:
+        assert self._x_table is not None
+        self._new_table = self._x_table.copy()
+
+        assert self._col_refs is not None
+        self._new_table.do_top(
+            self._take, self._col_refs, self._ascending_list, self._within
+        )
+
+        return self._new_table
+
+
 class GroupByVerb(Verb):
     """GROUP BY
 
@@ -447,10 +534,13 @@ class GroupByVerb(Verb):
     * By default, compute all statistics. Optionally take an explicit list of stats to compute.
 
     * For each aggregated column 'x', the resulting rows contain columns of the form x_min, x_max, etc.
+
+    * Optionally take the set of names that later commands use, and only compute those outputs.
     """
 
     _group_cols: list
     _agg_fns: list[str]
+    _agg_specs: Optional[dict[str, list[str]]]
 
     def __init__(
         self,
@@ -459,6 +549,7 @@ class GroupByVerb(Verb):
         *,
         only: Optional[list[str]] = None,
         agg: Optional[list[str]] = None,
+        outputs: Optional[set[str]] = None,
     ) -> None:
         super().__init__()
 
@@ -480,16 +571,17 @@ class GroupByVerb(Verb):
                         f"Column '{name}' cannot be in both 'by' and 'only' lists."
                     )
 
+            group_able: set[str] = set(self._x_table.group_able_col_names())
             for name in self._agg_cols:
-                if name not in self._x_table.group_able_col_names():
+                if name not in group_able:
                     raise ValueError(
                         f"Column '{name}' is not numeric or a datetime and cannot be aggregated."
                     )
         else:
-            self._agg_cols = self._x_table.group_able_col_names()
-            for name in self._group_cols:
-                if name in self._agg_cols:
-                    self._agg_cols.remove(name)
+            group_cols: set[str] = set(self._group_cols)
+            self._agg_cols = [
+                x for x in self._x_table.group_able_col_names() if x not in group_cols
+            ]
 
         # Aggregation functions
         if agg:
@@ -499,11 +591,114 @@ class GroupByVerb(Verb):
         else:
             self._agg_fns = PD_AGG_FNS
 
+        # Only the <col>_<fn> outputs used later, if that's known
+        self._agg_specs = (
+            prune_agg_specs(self._agg_cols, self._agg_fns, outputs) if outputs else None
+        )
+
+    def apply(self) -> Table:
+        assert self._x_table is not None
+        self._new_table = self._x_table.copy()
+
+        if self._agg_specs:
+            self._new_table.do_groupby(
+                self._group_cols, list(self._agg_specs.keys()), self._agg_specs
+            )
+        else:
+            self._new_table.do_groupby(self._group_cols, self._agg_cols, self._agg_fns)
+
+        return self._new_table
+
+
+# Group by helpers
+
+
+def prune_agg_specs(
+    agg_cols: list[str], agg_fns: list[str], outputs: set[str]
+) -> Optional[dict[str, list[str]]]:
+    """Map each aggregated column to just the functions whose outputs are used.
+
+    Return None, if nothing would be computed.
+    """
+
+    specs: dict[str, list[str]] = dict()
+    for col in agg_cols:
+        fns: list[str] = [fn for fn in agg_fns if f"{col}_{fn}" in outputs]
+        if fns:
+            specs[col] = fns
+
+    return specs if specs else None
+
+
+class TallyVerb(Verb):
+    """TALLY
+
+    * Sum numeric columns by district, for many plans at once. Each plan is a column of
+      district assignments, e.g., the District columns of alternative plans joined together.
+    * By default, sum all numeric columns. Optionally take an explicit list of cols to sum.
+    * The result is in long format: a plan column (the name of the assignment column),
+      a district column, and a column of the form x_sum for each summed column 'x'.
+    """
+
+    _plan_cols: list[str]
+    _sum_cols: list[str]
+    _names: tuple[str, str]
+
+    def __init__(
+        self,
+        x_table: Table,
+        by: list[str],
+        *,
+        only: Optional[list[str]] = None,
+        names: tuple[str, str] = ("Plan", "District"),
+    ) -> None:
+        super().__init__()
+
+        self._x_table = x_table
+
+        # Plan (assignment) columns
+        self._plan_cols = [x.strip() for x in by]
+        self._validate_col_refs(self._plan_cols, self._x_table)
+
+        # Columns to sum
+        if only:
+            self._sum_cols = [x.strip() for x in only]
+            self._validate_col_refs(self._sum_cols, self._x_table)
+
+            sum_able: set[str] = set(self._x_table.sum_able_col_names())
+            for name in self._sum_cols:
+                if name in self._plan_cols:
+                    raise ValueError(
+                        f"Column '{name}' cannot be in both 'by' and 'only' lists."
+                    )
+                if name not in sum_able:
+                    raise ValueError(
+                        f"Column '{name}' is not numeric and cannot be summed."
+                    )
+        else:
+            self._sum_cols = [
+                x
+                for x in self._x_table.sum_able_col_names()
+                if x not in self._plan_cols
+            ]
+
+        # Names of the plan & district columns
+        if len(names) != 2:
+            raise ValueError("Names must be a pair: (plan, district).")
+        self._names = (names[0].strip(), names[1].strip())
+
+        out_cols: list[str] = list(self._names) + [x + "_sum" for x in self._sum_cols]
+        for name in out_cols:
+            if not name.isidentifier():
+                raise ValueError(f"Invalid column name: {name}")
+        if len(set(out_cols)) != len(out_cols):
+            raise ValueError("The plan & district names clash with the summed columns.")
+
     def apply(self) -> Table:
         assert self._x_table is not None
         self._new_table = self._x_table.copy()
 
-        self._new_table.do_groupby(self._group_cols, self._agg_cols, self._agg_fns)
+        self._new_table.do_tally(self._plan_cols, self._sum_cols, self._names)
 
         return self._new_table
 
@@ -656,8 +851,9 @@ def infer_join_cols(y_table: Table, x_table: Table) -> list[str]:
             "There are no shared columns to JOIN on. Specify the JOIN columns to use."
         )
 
-    y_col_types: list[str] = [y_table.get_column(x).type for x in shared]
-    x_col_types: list[str] = [x_table.get_column(x).type for x in shared]
+    # Category columns match columns of the type of their values
+    y_col_types: list[str] = [y_table.value_type(x) for x in shared]
+    x_col_types: list[str] = [x_table.value_type(x) for x in shared]
 
     if y_col_types != x_col_types:
         raise ValueError(
@@ -680,7 +876,7 @@ def cols_match(
     for col in x_cols:
         x_table.iscolumn(col)
     for y_col, x_col in zip(y_cols, x_cols):
-        if y_table.get_column(y_col).type != x_table.get_column(x_col).type:
+        if y_table.value_type(y_col) != x_table.value_type(x_col):
             raise ValueError(
                 f"JOIN columns ({y_col}, {x_col}) have different types in the two tables."
             )
@@ -689,21 +885,28 @@ def cols_match(
 
 
 class UnionVerb(Verb):
-    """UNION"""
+    """UNION two or more tables
+
+    The tables are in stack order from the bottom up, e.g., (y_table, x_table).
+    """
+
+    _tables: tuple[Table, ...]
 
-    def __init__(self, y_table: Table, x_table: Table) -> None:
+    def __init__(self, y_table: Table, x_table: Table, *more: Table) -> None:
         super().__init__()
 
         self._y_table = y_table
         self._x_table = x_table
+        self._tables = (y_table, x_table) + more
 
-        if not columns_match(y_table, x_table):
-            raise ValueError("Tables must have identical columns")
+        for table in self._tables[1:]:
+            if not columns_match(y_table, table):
+                raise ValueError("Tables must have identical columns")
 
     def apply(self) -> Table:
         assert self._x_table is not None
         assert self._y_table is not None
-        self._new_table = do_union(self._y_table, self._x_table)
+        self._new_table = do_union(*self._tables)
 
         return self._new_table
 
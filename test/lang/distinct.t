@@ -0,0 +1,3 @@
+from(precincts_with_counties.csv, distinct=[District], keep=last)
+from(precincts_with_counties.csv)
+distinct(on=[District, COUNTY])
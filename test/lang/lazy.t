@@ -0,0 +1,16 @@
+# Exercise the lazy mode rewrites
+
+from(precincts_with_counties.csv)
+keep(GEOID, District, COUNTY, Total, White, D_votes, R_votes)
+from(precincts_with_counties.csv)
+keep(GEOID, Black, Hispanic)
+rename((Black, B))
+rename((B, Blk), (Hispanic, His))
+join(on=GEOID)
+select(Blk > 100)
+derive(Margin, D_votes - R_votes)
+derive(Scratch, White * 2)
+select(Total > 1000)
+drop(Scratch)
+keep(GEOID, District, Total, Margin, Blk, His)
+drop(His)
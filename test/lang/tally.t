@@ -0,0 +1,9 @@
+from(2020_precinct_assignments_NC.csv)
+from(2020_alt_assignments_NC.csv)
+join(on=GEOID20)
+
+from(2020_census_NC.csv)
+keep(GEOID20, Tot_2020_tot, Tot_2020_vap)
+join()
+
+tally(by=[District_y, District_x], names=(Plan, CD))
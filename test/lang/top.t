@@ -0,0 +1,2 @@
+from(precincts_with_counties.csv)
+top(3, by=[(Total, DESC), GEOID], within=[District])
@@ -0,0 +1,5 @@
+from(*_part.csv)
+from(first_part.csv)
+from(second_part.csv)
+union(n=2)
+union(all)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+TEST CACHE
+"""
+
+import os
+
+from T.cache import *
+from T.datamodel import Table
+from T.lang import interpret
+from T.preview import Preview
+from T.program import Program
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def run(env: Program, *commands: str) -> None:
+    for command in commands:
+        assert interpret(command, env) != "_error_"
+
+
+class TestCache:
+    def test_lru(self) -> None:
+        tables: list[Table] = list()
+        for i in range(3):
+            table: Table = Table()
+            table.test({"A": list(range(100))})
+            tables.append(table)
+        n_bytes: int = tables[0].n_bytes()
+
+        cache: ResultCache = ResultCache(2 * n_bytes)
+        cache.store("a", tables[0])
+        cache.store("b", tables[1])
+        assert cache.lookup("a") is tables[0]  # Now "b" is the least recently used
+
+        cache.store("c", tables[2])
+        assert cache.lookup("b") is None
+        assert cache.lookup("a") is tables[0]
+        assert cache.lookup("c") is tables[2]
+        assert cache.n_bytes == 2 * n_bytes
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_repeated_command(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        env.cache = ResultCache()
+
+        run(env, "from_(data.csv)", "duplicate()", "derive(C, A + B)")
+        first: Table = env.table_stack.first()
+        assert first.lineage is not None
+
+        # Pop the result & re-issue the command: the cached result is pushed
+        run(env, "pop()", "duplicate()", "derive(C, A + B)")
+        assert env.table_stack.first() is first
+        assert env.cols == ["A", "B", "C"]
+        assert env.cache.hits == 1
+
+        # A tweaked command isn't
+        run(env, "pop()", "duplicate()", "derive(C, A - B)")
+        assert env.table_stack.first() is not first
+        assert env.table_stack.first().nth_row(1) == [3, 4, -1]
+
+    def test_sample_preview(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A\n" + "".join(f"{i}\n" for i in range(1000)))
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        env.cache = ResultCache()
+        env.preview = Preview(5, sample=True)
+
+        for _ in range(5):
+            run(env, "clear()", "from_(data.csv)", "derive(C, A * 1)")
+            table: Table = env.table_stack.first()
+            assert table.lineage is None
+            assert list(table._data["C"]) == list(table._data["A"])
+
+    def test_changed_file(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        env.cache = ResultCache()
+
+        run(env, "from_(data.csv)", "keep(A)")
+        run(env, "clear()")
+
+        # Reading a changed file makes a table with a different lineage
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n5,6\n")
+        run(env, "from_(data.csv)", "keep(A)")
+        assert env.n_rows == 3
+        assert env.cache.hits == 0
+
+
+### END ###
@@ -70,5 +70,28 @@ class TestDataModel:
         assert not census.could_be_column("123")
         assert census.could_be_column("foo")
 
+    def test_column_catalog(self) -> None:
+        census: Table = Table()
+        census.read("test/formats/sample-01-comma.csv")
+        names: list[str] = census.col_names()
+
+        assert census.n_cols == len(names)
+        assert census.get_column("Total").name == "Total"
+        assert census.has_column("GEOID")
+        total_type: str = census.get_column("Total").type
+
+        census.do_rename_cols({"Total": "Total_Pop"})
+        assert not census.has_column("Total")
+        assert census.get_column("Total_Pop").type == total_type
+        assert census.col_names() == [
+            "Total_Pop" if name == "Total" else name for name in names
+        ]
+
+        col: Column = census.get_column("GEOID")
+        copy: Column = col.copy()
+        copy.name = "GEOID20"
+        assert col.name == "GEOID"
+        assert not hasattr(copy, "__dict__")
+
 
 ### END ###
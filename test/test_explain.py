@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""
+TEST EXPLAIN
+"""
+
+from T.explain import *
+
+
+class TestExplain:
+    def test_profile_csv(self) -> None:
+        table: TableEstimate = profile_csv("test/join/employee.csv")
+
+        assert table.n_rows == 5
+        assert table.col_names() == ["LastName", "DepartmentID"]
+        assert table.get_column("LastName").type == "string"
+        assert table.memory > 0
+
+        # Profiles are cached
+        assert profile_csv("test/join/employee.csv") is table
+
+    def test_explain_join(self) -> None:
+        explainer: Explainer = Explainer(src="test/lang/", data="test/join/")
+        explainer.explain("join.t", Namespace({}))
+
+        assert [step.command for step in explainer.steps] == [
+            "from(employee.csv)",
+            "from(department.csv)",
+            "join()",
+        ]
+
+        join: Step = explainer.steps[-1]
+        assert join.table is not None
+        assert join.table.col_names() == ["LastName", "DepartmentID", "DepartmentName"]
+        assert "hash join" in join.strategy and "DepartmentID" in join.strategy
+
+    def test_explain_groupby(self) -> None:
+        explainer: Explainer = Explainer(src="test/lang/", data="test/files/")
+        explainer.explain("groupby.t", Namespace({}))
+
+        groupby: Step = explainer.steps[-1]
+        assert groupby.table is not None
+        assert groupby.table.col_names()[0] == "county_fips"
+        assert groupby.table.n_rows < explainer.steps[0].table.n_rows  # type: ignore
+        assert "hash groupby on county_fips" in groupby.strategy
+
+    def test_explain_with_stack(self) -> None:
+        table: Table = Table()
+        table.read("test/join/employee.csv")
+
+        explainer: Explainer = Explainer(
+            src="test/lang/", data="test/join/", stack=[table]
+        )
+        explainer.explain("join.t", Namespace({}))
+
+        assert len(explainer.stack) == 2
+        assert explainer.stack[0].n_rows == table.n_rows
+
+    def test_explain_report(self) -> None:
+        report: str = explain_script(
+            "lazy.t", Namespace({}), src="test/lang/", data="test/files/"
+        )
+
+        assert "inner hash join" in report
+        assert "Peak stack memory" in report
+
+    def test_format_bytes(self) -> None:
+        assert format_bytes(100) == "100 B"
+        assert format_bytes(1536) == "1.5 KB"
+        assert format_bytes(3 * 1024**3) == "3.0 GB"
+
+
+### END ###
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+TEST IMPORTS - T starts fast: importing it doesn't load pandas, etc.
+"""
+
+import os
+import sys
+import subprocess
+
+# Modules that load on first use, not when T is imported
+HEAVY_MODULES: list[str] = ["pandas", "numpy", "tabulate", "dateutil", "readline"]
+
+# The budget for importing T & the server client, in microseconds. It's mostly
+# the standard library modules it needs; pandas alone takes ~10x this.
+IMPORT_BUDGET_US: int = 100_000
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    env: dict[str, str] = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+class TestImports:
+    def test_lazy_imports(self) -> None:
+        code: str = (
+            "import sys, T; from T import connect; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        result: subprocess.CompletedProcess = run_python(code)
+
+        assert result.stdout.strip() == ""
+
+    def test_lazy_attributes(self) -> None:
+        code: str = "import T; print(T.Table.__name__, T.lang.__name__)"
+        result: subprocess.CompletedProcess = run_python(code)
+
+        assert result.stdout.split() == ["Table", "T.lang"]
+
+    def test_unknown_attributes(self) -> None:
+        # Probing for names that aren't exported doesn't load everything
+        code: str = (
+            "import sys, T; print(hasattr(T, 'Nonesuch'), hasattr(T, 'read_distinct_rows'), "
+            f"','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        result: subprocess.CompletedProcess = run_python(code)
+
+        assert result.stdout.split() == ["False", "False"]
+
+    def test_import_time(self) -> None:
+        result: subprocess.CompletedProcess = run_python(
+            "import T; from T import connect", "-X", "importtime"
+        )
+
+        # Lines like: "import time: <self us> | <cumulative us> | <module>"
+        total: int = 0
+        for line in result.stderr.splitlines():
+            fields: list[str] = line.split("|")
+            if len(fields) == 3 and fields[2].strip() in ["T", "T.serve"]:
+                total += int(fields[1])
+
+        assert 0 < total < IMPORT_BUDGET_US
+
+
+### END ###
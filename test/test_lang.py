@@ -4,6 +4,8 @@
 TEST LANG
 """
 
+import json
+import os
 from typing import Optional
 
 from T.lang import *
@@ -108,6 +110,110 @@ class TestLangHandlers:
             actual: Optional[str | list[str] | list[list[str]]] = parse_join_on(case)
             assert actual == expected[i]
 
+    def test_lazy(self, capsys) -> None:
+        outputs: list[str] = list()
+        for lazy in [False, True]:
+            run_script(
+                user="user/alec.py",
+                file="lazy.t",
+                src="test/lang",
+                data="test/files",
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+                lazy=lazy,
+            )
+            outputs.append(capsys.readouterr().out)
+
+        assert "Exiting program due to errors" not in outputs[0]
+        assert outputs[0] == outputs[1]
+
+    def test_lazy_invalid(self, tmp_path, capsys) -> None:
+        d: str = str(tmp_path)
+        with open(os.path.join(d, "data.csv"), "w") as f:
+            f.write("A,B\n1,2\n3,4\n")
+        with open(os.path.join(d, "bad.t"), "w") as f:
+            f.write("from(data.csv)\nderive(X, nosuchcol + 1)\ndrop(X)\nshow()\n")
+
+        outputs: list[str] = list()
+        for lazy in [False, True]:
+            run_script(
+                user=None,
+                file="bad.t",
+                src=d,
+                data=d,
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+                lazy=lazy,
+            )
+            outputs.append(capsys.readouterr().out)
+
+        assert "Invalid reference in DERIVE expression: nosuchcol" in outputs[0]
+        assert outputs[0] == outputs[1]
+
+    def test_explain(self, capsys) -> None:
+        run_script(
+            user="user/alec.py",
+            file="lazy.t",
+            src="test/lang",
+            data="test/files",
+            output="",
+            log="",
+            verbose=False,
+            scriptargs=dict(),
+            explain=True,
+        )
+        out: str = capsys.readouterr().out
+
+        assert "Exception" not in out
+        assert "join(on=GEOID)" in out
+        assert "Peak stack memory" in out
+
+    def test_batch(self, tmp_path, capsys) -> None:
+        manifest: str = str(tmp_path / "manifest.json")
+        with open(manifest, "w") as f:
+            json.dump(
+                [
+                    {
+                        "scriptargs": {"census": "2020_census_AZ(PARTIAL).csv"},
+                        "output": "a.csv",
+                    },
+                    {"scriptargs": {"census": "2020_census_AZ(PARTIAL).csv"}},
+                    {"scriptargs": {"census": "missing.csv"}},
+                    {
+                        "scriptargs": {"census": "2020_census_AZ(PARTIAL).csv"},
+                        "output": "taken.csv",
+                    },
+                ],
+                f,
+            )
+
+        for jobs in [1, 2]:
+            # A directory is in the way, so writing the output fails
+            os.makedirs(tmp_path / f"out{jobs}" / "taken.csv")
+
+            run_script(
+                user="user/alec.py",
+                file="scriptargs.t",
+                src="test/lang",
+                data="test/files",
+                output=str(tmp_path / f"out{jobs}") + "/",
+                log="",
+                verbose=False,
+                batch=manifest,
+                jobs=jobs,
+            )
+            out: str = capsys.readouterr().out
+
+            assert (tmp_path / f"out{jobs}" / "a.csv").exists()
+            assert (tmp_path / f"out{jobs}" / "scriptargs_2.csv").exists()
+            assert "Job 3 failed" in out
+            assert "Job 4 failed" in out
+            assert "4 jobs in" in out
+
     def test_union(self) -> None:
         try:
             run_script(
@@ -124,6 +230,22 @@ class TestLangHandlers:
         except:
             assert False
 
+    def test_union_n(self) -> None:
+        try:
+            run_script(
+                user="user/alec.py",
+                file="union_n.t",
+                src="test/lang",
+                data="test/union",
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+            )
+            assert True
+        except:
+            assert False
+
     def test_groupby(self) -> None:
         try:
             run_script(
@@ -155,6 +277,22 @@ class TestLangHandlers:
         except:
             assert False
 
+    def test_tally(self) -> None:
+        try:
+            run_script(
+                user="user/alec.py",
+                file="tally.t",
+                src="test/lang",
+                data="data/rd/NC",
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+            )
+            assert True
+        except:
+            assert False
+
     def test_keep(self) -> None:
         try:
             run_script(
@@ -283,6 +421,38 @@ class TestLangHandlers:
         except:
             assert False
 
+    def test_top(self) -> None:
+        try:
+            run_script(
+                user="user/alec.py",
+                file="top.t",
+                src="test/lang",
+                data="test/files",
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+            )
+            assert True
+        except:
+            assert False
+
+    def test_distinct(self) -> None:
+        try:
+            run_script(
+                user="user/alec.py",
+                file="distinct.t",
+                src="test/lang",
+                data="test/files",
+                output="",
+                log="",
+                verbose=False,
+                scriptargs=dict(),
+            )
+            assert True
+        except:
+            assert False
+
     def test_last(self) -> None:
         try:
             run_script(
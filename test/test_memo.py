@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+TEST MEMO
+"""
+
+import os
+
+from T.memo import *
+from T.lang import run_mode
+from T.program import Program, Namespace
+from T.spill import StackSpiller
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestMemo:
+    def setup_method(self) -> None:
+        clear()
+
+    def run_twice(self, env: Program, script: str) -> int:
+        """Run a script twice. Return how many times it actually ran."""
+
+        runs: list[int] = list()
+
+        for _ in range(2):
+            env.call_stack.push(Namespace({}))
+            run_memoized(script, {}, env, lambda: run_mode_of(env, script, runs.append))
+            env.call_stack.pop()
+
+        return len(runs)
+
+    def test_memoize(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "sub.t", "from(data.csv)\nderive(C, A + B)\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+
+        assert self.run_twice(env, "sub.t") == 1
+        assert env.table_stack.len() == 2
+        first: Any = env.table_stack.first()
+        second: Any = env.table_stack.second()
+        assert first is not second
+        assert first.col_names() == ["A", "B", "C"]
+        assert first.nth_row(1) == second.nth_row(1)
+
+        # Changing an input file invalidates the result
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n5,6\n")
+        env.clear()
+        assert self.run_twice(env, "sub.t") == 1
+        assert env.table_stack.first().n_rows == 3
+
+    def test_not_memoized(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "show.t", "from(data.csv)\nshow()\n")
+        write_file(d + "dup.t", "duplicate()\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+
+        # Scripts that display things
+        assert self.run_twice(env, "show.t") == 2
+
+        # Scripts that use tables already on the stack
+        assert self.run_twice(env, "dup.t") == 2
+
+    def test_disk_cache(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "sub.t", "from(data.csv)\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        env.memo.dir = d + "cache"
+        assert self.run_twice(env, "sub.t") == 1
+        assert len(os.listdir(d + "cache")) == 1
+
+        # A new run, with an empty in-memory cache
+        clear()
+        env = Program(src=d, data=d, repl=False, silent=True)
+        env.memo.dir = d + "cache"
+        assert self.run_twice(env, "sub.t") == 0
+        assert env.table_stack.first().n_rows == 2
+
+    def test_glob(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "part_1.csv", "A,B\n1,2\n")
+        write_file(d + "sub.t", "from(part_*.csv)\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        assert self.run_twice(env, "sub.t") == 1
+
+        # A new file that matches the pattern invalidates the result
+        write_file(d + "part_2.csv", "A,B\n3,4\n")
+        env.clear()
+        assert self.run_twice(env, "sub.t") == 1
+        assert env.table_stack.first().n_rows == 2
+
+    def test_memory_cap(self, tmp_path, monkeypatch) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "sub.t", "from(data.csv)\n")
+
+        # Results bigger than the cap aren't kept
+        monkeypatch.setattr("T.memo.MEMO_BYTES", 1)
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        assert self.run_twice(env, "sub.t") == 2
+
+        # Results are released when the stack spills
+        monkeypatch.undo()
+        env.clear()
+        assert self.run_twice(env, "sub.t") == 1
+        env.spiller = StackSpiller(1)
+        env._update_table_shortcuts()
+        env.clear()
+        assert self.run_twice(env, "sub.t") == 1
+
+
+def run_mode_of(env: Program, script: str, note) -> bool:
+    note(1)
+    exit: bool
+    exit, _ = run_mode(script, env)
+
+    return exit
+
+
+### END ###
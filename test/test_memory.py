@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+TEST MEMORY
+"""
+
+import csv
+
+from T.program import Tables
+from T.lang import run_mode
+from T.memory import *
+
+
+class TestMemory:
+    def test_monitor(self, tmp_path) -> None:
+        rel_path: str = str(tmp_path / "memory.csv")
+
+        with Tables(src="test/lang", data="test/files", repl=False) as T:
+            T.monitor = MemoryMonitor(rel_path)
+            run_mode("groupby.t", T)
+            T.monitor.close()
+            shallow: int = T.table_stack.first().n_bytes(deep=False)
+            assert shallow < T.table_stack.first().n_bytes()
+
+        with open(rel_path, "r", newline="") as f:
+            rows: list[dict] = list(csv.DictReader(f))
+
+        assert list(rows[0].keys()) == FIELDS
+        assert [row["command"].split("(")[0] for row in rows] == [
+            "from_",
+            "derive",
+            "keep",
+            "rename",
+            "groupby",
+        ]
+
+        read: dict = rows[0]
+        assert int(read["peak_allocated"]) >= int(read["allocated"]) > 0
+        assert int(read["stack_tables"]) == 1
+        assert int(read["stack_bytes"]) > 0
+
+        groupby: dict = rows[-1]
+        assert groupby["command"] == "groupby(by=[county_fips])"
+        assert int(groupby["stack_bytes"]) < int(read["stack_bytes"])
+        assert int(groupby["stack_bytes"]) == shallow  # Not scanning strings
+
+    def test_stack(self, capsys) -> None:
+        with Tables(src="test/lang", data="test/files", repl=False) as T:
+            T.stack()
+            assert "The stack is empty." in capsys.readouterr().out
+
+            run_mode("groupby.t", T)
+            T.duplicate()
+            capsys.readouterr()
+
+            T.stack()
+            out: str = capsys.readouterr().out
+
+            tables: list = T.table_stack.top_n(2)
+            total: int = stack_memory(tables)
+
+        assert total == 2 * tables[0].n_bytes()
+        assert out.split("\n")[1].split() == ["#", "COMMAND", "ROWS", "COLS", "MEMORY"]
+        assert "Total:" in out and "in 2 table(s)" in out
+
+
+### END ###
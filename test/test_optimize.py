@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+TEST OPTIMIZE
+"""
+
+from T.optimize import *
+
+
+class TestOptimize:
+    def test_bind_command(self) -> None:
+        ns: Namespace = Namespace({"census": "census.csv"})
+
+        assert bind_command("keep(GEOID20, Total)", ns) == ("keep", "GEOID20,Total")
+        assert bind_command("from_(args.census)", ns) == ("from_", "census.csv")
+        assert bind_command("not a command", ns) is None
+
+    def test_prune_groupby_outputs(self) -> None:
+        ns: Namespace = Namespace({})
+
+        # A 'keep' narrows the outputs
+        commands: list[str] = [
+            "from_(precincts.csv)",
+            "groupby(by=[District])",
+            "derive(D_pct, D_votes_sum / (D_votes_sum + R_votes_sum))",
+            "keep(District, Total_sum, D_pct)",
+            "write(districts.csv)",
+        ]
+        used_by: dict[int, set[str]] = prune_groupby_outputs(commands, ns)
+
+        assert list(used_by.keys()) == [1]
+        assert {"District", "Total_sum", "D_votes_sum", "R_votes_sum"} <= used_by[1]
+        assert "Total_std" not in used_by[1]
+
+        # Script args are bound before looking for references
+        ns = Namespace({"col": "Total_sum"})
+        commands = ["groupby(by=[District])", "keep(District, args.col)"]
+        used_by = prune_groupby_outputs(commands, ns)
+
+        assert "Total_sum" in used_by[0]
+
+        # Something could observe all the columns before they're narrowed
+        for barrier in ["show()", "write(out.csv)", "join()", "duplicate()"]:
+            commands = [
+                "groupby(by=[District])",
+                barrier,
+                "keep(District, Total_sum)",
+            ]
+            assert prune_groupby_outputs(commands, ns) == dict()
+
+        # The end of the script
+        commands = ["groupby(by=[District])", "sort(District)"]
+        assert prune_groupby_outputs(commands, ns) == dict()
+
+    def test_fuse_sort_first(self) -> None:
+        commands: list[str] = [
+            "from(precincts.csv)",
+            "sort((Total, DESC), GEOID)",
+            "first(10)",
+            "show()",
+        ]
+        assert fuse_sort_first(commands) == [
+            "from(precincts.csv)",
+            "top(10, by=[(Total, DESC), GEOID])",
+            "show()",
+        ]
+
+        # Not adjacent, or a percentage
+        for commands in [
+            ["sort(Total)", "show()", "first(10)"],
+            ["sort(Total)", "first(10, %)"],
+            ["sort(Total)"],
+        ]:
+            assert fuse_sort_first(commands) == commands
+
+
+### END ###
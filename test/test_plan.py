@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""
+TEST PLAN
+"""
+
+from T.plan import *
+
+
+def plan_of(*commands: str) -> list[Step]:
+    return [Step(command, Namespace({})) for command in commands]
+
+
+def commands_of(steps: list[Step]) -> list[str]:
+    return [step.command for step in steps]
+
+
+class TestPlan:
+    def test_step(self) -> None:
+        ns: Namespace = Namespace({"col": "Total"})
+        step: Step = Step("select(args.col > Total_VAP)", ns)
+
+        assert step.verb == "select"
+        assert step.names() == {"Total", "Total_VAP"}
+
+        step = Step.rewrite("keep", ["GEOID", "Total"])
+        assert step.command == "keep(GEOID, Total)"
+        assert step.positional_args == ["GEOID", "Total"]
+
+    def test_fuse_column_ops(self) -> None:
+        steps: list[Step] = optimize_plan(plan_of("keep(a, b, c)", "keep(c, a)"))
+        assert commands_of(steps) == ["keep(c, a)"]
+
+        steps = optimize_plan(plan_of("drop(a)", "drop(b, c)"))
+        assert commands_of(steps) == ["drop(a, b, c)"]
+
+        steps = optimize_plan(plan_of("keep(a, b, c)", "drop(b)"))
+        assert commands_of(steps) == ["keep(a, c)"]
+
+        steps = optimize_plan(plan_of("drop(a)", "keep(b, c)"))
+        assert commands_of(steps) == ["keep(b, c)"]
+
+        # These would fail, so leave them alone
+        for commands in [("keep(a, b)", "keep(c)"), ("drop(a)", "drop(a)")]:
+            steps = optimize_plan(plan_of(*commands))
+            assert commands_of(steps) == list(commands)
+
+    def test_fuse_renames(self) -> None:
+        steps: list[Step] = optimize_plan(
+            plan_of("rename((a, b), (c, d))", "rename((b, x), (e, f))")
+        )
+        assert commands_of(steps) == ["rename((a, x), (c, d), (e, f))"]
+
+        # Renaming a column back
+        steps = optimize_plan(plan_of("rename((a, b))", "rename((b, a))"))
+        assert commands_of(steps) == []
+
+        # Reusing a freed-up name can't be done in one step
+        commands: tuple[str, ...] = ("rename((a, b))", "rename((c, a))")
+        steps = optimize_plan(plan_of(*commands))
+        assert commands_of(steps) == list(commands)
+
+    def test_move_selects_up(self) -> None:
+        steps: list[Step] = optimize_plan(
+            plan_of("derive(x, a + b)", "derive(y, a * 2)", "select(a > 10)")
+        )
+        assert commands_of(steps) == [
+            "select(a > 10)",
+            "derive(x, a + b)",
+            "derive(y, a * 2)",
+        ]
+
+        # Uses the derived column, or the derive depends on the rows
+        for commands in [
+            ("derive(x, a + b)", "select(x > 10)"),
+            ("derive(x, a / sum(a))", "select(a > 10)"),
+        ]:
+            steps = optimize_plan(plan_of(*commands))
+            assert commands_of(steps) == list(commands)
+
+    def test_eliminate_dead_derives(self) -> None:
+        steps: list[Step] = optimize_plan(
+            plan_of("derive(x, a + b)", "sort(a)", "drop(x, b)")
+        )
+        assert commands_of(steps) == ["sort(a)", "drop(b)"]
+
+        steps = optimize_plan(plan_of("derive(x, a + b)", "keep(a, b)"))
+        assert commands_of(steps) == ["keep(a, b)"]
+
+        # Used before it's dropped, or something else could see it
+        for commands in [
+            ("derive(x, a + b)", "sort(x)", "drop(x)"),
+            ("derive(x, a + b)", "groupby(by=[a])", "drop(x_sum)"),
+        ]:
+            steps = optimize_plan(plan_of(*commands))
+            assert commands_of(steps) == list(commands)
+
+
+### END ###
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+TEST PREVIEW
+"""
+
+import os
+
+from T.preview import *
+from T.lang import interpret
+from T.program import Program
+from T.readwrite import read_delimited_file
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def run(env: Program, *commands: str) -> None:
+    """Run commands as the REPL does, recording them"""
+
+    for command in commands:
+        result: str = interpret(command, env)
+        assert result != "_error_"
+        if env.preview is not None:
+            env.preview.record(command, result)
+            env.preview.flush(env)
+
+
+def data_file(d: str, n: int) -> str:
+    path: str = d + "data.csv"
+    write_file(path, "A,B\n" + "".join(f"{i},{i % 3}\n" for i in range(n)))
+
+    return path
+
+
+class TestPreview:
+    def test_sample_rows(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        path: str = data_file(d, 1000)
+
+        head = read_delimited_file(path, header=0, nrows=10)
+        assert list(head["A"]) == list(range(10))
+
+        sample = read_delimited_file(path, header=0, nrows=10, sample=True)
+        assert len(sample) == 10
+        assert list(sample["A"]) == sorted(sample["A"])  # In file order
+        assert sample["A"].is_unique
+
+    def test_replay_on_write(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 100)
+
+        env: Program = Program(data=d, output=d, repl=False, silent=True)
+        env.preview = Preview(5)
+
+        run(env, "from_(data.csv)", "select(B == 1)", "derive(C, A * 2)")
+        assert env.n_rows == 2  # Of the first 5 rows
+        run(env, "show()")
+
+        run(env, "write(out.csv)")
+        with open(d + "out.csv") as f:
+            lines: list[str] = f.readlines()
+        assert len(lines) == 1 + 33
+        assert lines[1].strip() == "1,1,2"
+
+        assert env.n_rows == 2  # Still the preview
+        assert env.preview.commands == list()  # All replayed
+
+    def test_write_in_script(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 100)
+        write_file(d + "sub.t", "from(data.csv)\nwrite(out.csv)\n")
+
+        env: Program = Program(src=d, data=d, output=d, repl=False, silent=True)
+        env.preview = Preview(5)
+
+        run(env, "from_(sub.t)")
+        assert env.n_rows == 5
+        with open(d + "out.csv") as f:
+            assert len(f.readlines()) == 1 + 100  # Not the preview
+        assert not env.preview.deferred
+
+    def test_materialize(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 100)
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        env.preview = Preview(5, sample=True)
+
+        run(env, "from_(data.csv)", "keep(A)")
+        assert env.n_rows == 5
+
+        run(env, "materialize()")
+        assert env.preview is None
+        assert env.n_rows == 100
+        assert env.cols == ["A"]
+
+    def test_clear(self) -> None:
+        preview: Preview = Preview(5)
+        preview.record("from_(data.csv)", "from_")
+        preview.record("show()", "show")
+        assert preview.commands == ["from_(data.csv)"]
+
+        preview.record("clear()", "clear")
+        assert preview.commands == ["clear()"]
+
+
+### END ###
@@ -4,7 +4,10 @@
 TEST PROGRAM
 """
 
+import os
+
 from T.program import *
+from T.lang import interpret
 
 
 class TestNamespaces:
@@ -35,4 +38,51 @@ class TestNamespaces:
         assert ns.bind("elections", default) == caller
 
 
+class TestProgram:
+    def test_keys_and_sparse(self, tmp_path, capsys) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        with open(d + "a.csv", "w") as f:
+            f.write("GEOID,Total,Rare\n")
+            for i in range(20):
+                f.write(f"37001{i:06d},{i + 1},{5 if i == 3 else 0}\n")
+
+        for read in [
+            "from_(a.csv, keys=auto, sparse=auto)",
+            "from_(a.csv, keys=[GEOID], sparse=[Rare])",
+        ]:
+            env: Program = Program(data=d, repl=False, silent=True)
+            for command in [read, "inspect()", "show()", "derive(Other, Total + Rare)"]:
+                assert interpret(command, env) != "_error_"
+
+            table: Table = env.table_stack.first()
+            assert table.get_column("GEOID").type == "key"
+            assert table.get_column("Other").type == "int64"
+            assert table.first_n_rows(1) == [["37001000000", 1, 0, 1]]
+
+        env = Program(data=d, repl=False, silent=True)
+        for command in ["from_(a.csv)", "cast([GEOID], key)", "cast([Rare], sparse)"]:
+            assert interpret(command, env) != "_error_"
+        assert env.table_stack.first().get_column("GEOID").type == "key"
+
+    def test_compact(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        with open(d + "a.csv", "w") as f:
+            f.write("Total,Share\n")
+            for i in range(20):
+                f.write(f"{i},{i / 4}\n")
+
+        for read, compacted in [
+            ("from_(a.csv, compact=auto)", ["Total", "Share"]),
+            ("from_(a.csv, compact=all)", ["Total", "Share"]),
+            ("from_(a.csv, compact=[Total])", ["Total"]),
+        ]:
+            env: Program = Program(data=d, repl=False, silent=True)
+            assert interpret(read, env) != "_error_"
+
+            table: Table = env.table_stack.first()
+            assert [
+                c.name for c in table.cols() if c.type != table.value_type(c.name)
+            ] == compacted
+
+
 ### END ###
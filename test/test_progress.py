@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+TEST PROGRESS
+"""
+
+import os
+import time
+
+import pytest
+
+from T import progress
+from T.progress import *
+from T.lang import interpret
+from T.program import Program
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def data_file(d: str, n: int) -> str:
+    path: str = d + "data.csv"
+    write_file(path, "A,B\n" + "".join(f"{i},{i % 3}\n" for i in range(n)))
+
+    return path
+
+
+class TestProgress:
+    def test_outside_a_task(self) -> None:
+        assert current() is None
+        report("Reading", 1, 2)  # No-ops
+        check()
+
+    def test_progress_file(self, tmp_path, monkeypatch) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 1000)
+        monkeypatch.setattr(progress, "REPORT_BYTES", 100)
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        result = run_command(
+            "from_(data.csv)",
+            env,
+            lambda: interpret("from_(data.csv)", env),
+            show=False,
+        )
+        assert result == "from_"
+        assert env.n_rows == 1000
+        assert env.table_stack.first().nth_row(999) == [999, 0]
+
+    def test_timeout_leaves_stack_unchanged(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 10)
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        interpret("from_(data.csv)", env)
+        interpret("duplicate()", env)
+        interpret("keep(B)", env)
+
+        def slow() -> str:
+            interpret("duplicate()", env)
+            interpret("keep(A)", env)
+            while True:  # Until it's cancelled
+                report("Waiting", 0)
+                time.sleep(0.01)
+
+        result = run_command("slow()", env, slow, timeout=0.2, show=False)
+        assert result is None
+        assert env.table_stack.len() == 2
+        assert env.cols == ["B"]
+        assert env.table_stack.second().col_names() == ["A", "B"]
+
+    def test_cancelled_command_pushes_nothing(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        data_file(d, 10)
+
+        env: Program = Program(data=d, repl=False, silent=True)
+        interpret("from_(data.csv)", env)
+
+        def cancelled() -> str:
+            task: Optional[Task] = current()
+            assert task is not None
+            task.cancel()
+            return interpret("duplicate()", env)
+
+        assert run_command("duplicate()", env, cancelled, show=False) is None
+        assert env.table_stack.len() == 1
+
+    def test_errors_propagate(self) -> None:
+        env: Program = Program(repl=False, silent=True)
+
+        def fail() -> str:
+            raise ValueError("Oops")
+
+        with pytest.raises(ValueError):
+            run_command("fail()", env, fail, show=False)
+
+
+### END ###
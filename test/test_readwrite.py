@@ -4,8 +4,11 @@
 #
 
 import ast
+import os
 import random
 
+import pytest
+
 from T.readwrite import *
 
 
@@ -301,6 +304,202 @@ class TestDelimiters:
         assert df.shape[0] == 10
 
 
+class TestDistinct:
+    def test_read_distinct_rows(self) -> None:
+        sample: str = "test/files/precincts_with_counties.csv"
+        df: pd.DataFrame = DelimitedFileReader(sample).read()
+
+        # A chunk at a time, the same rows as dropping duplicates in memory
+        for on in [["District"], ["District", "COUNTY"], None]:
+            for keep in ["first", "last"]:
+                expected: pd.DataFrame = df.drop_duplicates(
+                    subset=on, keep=keep, ignore_index=True
+                )
+                actual: pd.DataFrame = read_distinct_rows(
+                    FileSpec(sample).abs_path, header=0, on=on, keep=keep, chunksize=97
+                )
+                assert actual.equals(expected)
+
+        reader: DelimitedFileReader = DelimitedFileReader(
+            sample, distinct=True, on=["District"]
+        )
+        assert reader.read().shape[0] == df["District"].nunique()
+
+        # Invalid column
+        try:
+            read_distinct_rows(FileSpec(sample).abs_path, header=0, on=["Nonesuch"])
+            assert False
+        except:
+            assert True
+
+    def test_key_index(self) -> None:
+        # Many small chunks: the runs of hashes stay few, & the lookups right
+        index: KeyIndex = KeyIndex("keys.csv")
+        offset: int = 0
+        for c in range(1000):
+            keys: pd.DataFrame = pd.DataFrame({"K": [c % 500, c % 500, 1000 + c]})
+            hashes: np.ndarray = pd.util.hash_pandas_object(
+                keys, index=False
+            ).to_numpy()
+            new: np.ndarray = index.add(keys, hashes, offset)
+            assert list(new) == [c < 500, False, True]
+            offset += len(keys)
+
+        assert index.n_kept == 1500
+        assert len(index.runs) <= 11
+
+        keys = pd.DataFrame({"K": [0, 499, 1999]})
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        assert list(index.last(hashes)) == [3 * 500 + 1, 3 * 999 + 1, 3 * 999 + 2]
+
+    def test_hash_collision(self, monkeypatch) -> None:
+        sample: str = "test/files/precincts_with_counties.csv"
+
+        # Distinct keys with the same hash aren't silently dropped
+        def collide(df: pd.DataFrame, index: bool = True) -> pd.Series:
+            return pd.Series(np.zeros(len(df), dtype=np.uint64))
+
+        monkeypatch.setattr(pd.util, "hash_pandas_object", collide)
+        for keep in ["first", "last"]:
+            with pytest.raises(Exception, match="Hash collision"):
+                read_distinct_rows(
+                    FileSpec(sample).abs_path, header=0, on=["District"], keep=keep
+                )
+
+
+class TestCategories:
+    def test_categorize(self) -> None:
+        sample: str = "test/files/precincts_with_counties.csv"
+
+        # The string columns with few distinct values
+        df: pd.DataFrame = DelimitedFileReader(sample, categorize=True).read()
+        assert df["COUNTY"].dtype.name == "category"
+        assert df["GEOID"].dtype.name == "string"
+
+        # A chunk at a time, the categories are the same for all chunks
+        df = read_distinct_rows(
+            FileSpec(sample).abs_path,
+            header=0,
+            on=["District"],
+            chunksize=97,
+            categorize=["COUNTY"],
+        )
+        assert df["COUNTY"].dtype.name == "category"
+
+        # Just string columns
+        try:
+            DelimitedFileReader(sample, categorize=["District"]).read()
+            assert False
+        except:
+            assert True
+
+
+class TestCompact:
+    def test_compact_types(self) -> None:
+        df: pd.DataFrame = pd.DataFrame(
+            {
+                "Small": [0, 1, 255],
+                "Negative": [-1, 0, 1000],
+                "Big": [0, 1, 2**40],
+                "Half": [0.5, 1.25, float("nan")],
+                "Third": [1 / 3, 1.0, 2.0],
+                "Name": ["a", "b", "c"],
+            }
+        )
+        assert compact_types(df) == {
+            "Small": "uint8",
+            "Negative": "int16",
+            "Half": "float32",
+        }
+
+        try:
+            compact_types(df, ["Name"])
+            assert False
+        except:
+            assert True
+
+        sample: str = "test/files/precincts_with_counties.csv"
+        plain: pd.DataFrame = DelimitedFileReader(sample).read()
+        compact: pd.DataFrame = DelimitedFileReader(sample, compact=True).read()
+        assert compact["District"].dtype.name == "uint8"
+        assert compact.memory_usage().sum() < plain.memory_usage().sum()
+        assert (compact["Total"] == plain["Total"]).all()
+
+
+class TestKeys:
+    def test_encode_key(self) -> None:
+        geoids: pd.Series = pd.Series(["37001", "37003", "00005"], dtype="string")
+        encoded = encode_key(geoids)
+        assert encoded is not None
+        assert encoded.dtype.name == "int64"
+        assert list(decode_key(encoded, 5)) == ["37001", "37003", "00005"]
+
+        assert encode_key(geoids, 6) is None  # Wrong width
+        assert encode_key(pd.Series(["37001", "3700"])) is None  # Mixed widths
+        assert encode_key(pd.Series(["3700A", "37003"])) is None  # Not digits
+        assert encode_key(pd.Series(["37001", None])) is None  # Missing values
+        assert encode_key(pd.Series(["1" * 19])) is None  # Too many digits
+        assert encode_key(pd.Series([37001, 37003])) is None  # Already numbers
+
+    def test_read_keys(self) -> None:
+        sample: str = "test/files/precincts_with_counties.csv"
+        plain: pd.DataFrame = DelimitedFileReader(sample).read()
+        reader: DelimitedFileReader = DelimitedFileReader(sample, keys=True)
+        keyed: pd.DataFrame = reader.read()
+
+        assert reader.key_widths == {"COUNTY": 3}
+        assert keyed["COUNTY"].dtype.name == "int64"
+        assert (decode_key(keyed["COUNTY"], 3) == plain["COUNTY"]).all()
+
+        try:
+            DelimitedFileReader(sample, keys=["GEOID"]).read()  # Not all digits
+            assert False
+        except:
+            assert True
+
+
+class TestSparse:
+    def test_sparse_names(self) -> None:
+        df: pd.DataFrame = pd.DataFrame(
+            {
+                "Pacific": [0, 0, 0, 7],
+                "Native": [0, 2, 0, 3],
+                "Share": [0.0, 0.0, 0.0, 0.5],
+                "Name": ["a", "b", "c", "d"],
+            }
+        )
+        assert sparse_names(df) == ["Pacific", "Share"]
+        assert sparse_names(df, ["Native"]) == ["Native"]
+
+        try:
+            sparse_names(df, ["Name"])
+            assert False
+        except:
+            assert True
+
+        sparse: pd.DataFrame = sparsify_columns(df.copy(), ["Pacific", "Native"])
+        assert sparse["Pacific"].dtype == pd.SparseDtype("int64", 0)
+        assert list(densify(sparse["Pacific"])) == [0, 0, 0, 7]
+        assert densify(df["Name"]) is df["Name"]
+
+    def test_read_sparse(self, tmp_path) -> None:
+        sample: str = os.path.join(str(tmp_path), "counts.csv")
+        with open(sample, "w") as f:
+            f.write("Total,Pacific\n")
+            f.write("".join(f"{i},{i if i % 10 == 0 else 0}\n" for i in range(1000)))
+
+        plain: pd.DataFrame = DelimitedFileReader(sample).read()
+        sparse: pd.DataFrame = DelimitedFileReader(sample, sparse=True).read()
+        assert sparse["Total"].dtype.name == "int64"
+        assert isinstance(sparse["Pacific"].dtype, pd.SparseDtype)
+        assert sparse["Pacific"].memory_usage() < plain["Pacific"].memory_usage() / 2
+        assert (densify(sparse["Pacific"]) == plain["Pacific"]).all()
+
+        listed: pd.DataFrame = DelimitedFileReader(sample, sparse=["Total"]).read()
+        assert isinstance(listed["Total"].dtype, pd.SparseDtype)
+        assert listed["Pacific"].dtype.name == "int64"
+
+
 class TestDataTypes:
     def test_dtypes(self) -> None:
         sample: str = "basic.csv"
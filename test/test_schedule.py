@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+TEST SCHEDULE
+"""
+
+import os
+
+from T.schedule import *
+from T.lang import run_mode
+from T.program import Program
+from T.trace import Tracer
+from T.memo import clear as clear_memo, memo_key
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestSchedule:
+    def test_prefetch(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "a.csv", "K,A\n1,2\n3,4\n")
+        write_file(d + "b.csv", "K,B\n1,5\n3,6\n")
+        write_file(d + "b.t", "from(b.csv)\nderive(C, B * 2)\n")
+        write_file(d + "main.t", "from(a.csv)\nfrom(b.t)\njoin()\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        env.jobs = 2
+
+        prefetcher: Prefetcher = Prefetcher(
+            ["from_(a.csv)", "from_(b.t)", "join()"], env
+        )
+        assert sorted(prefetcher.futures.keys()) == [0, 1]
+        prefetcher.close()
+
+        exit: bool
+        exit, _ = run_mode("main.t", env)
+
+        assert not exit
+        assert env.table_stack.len() == 1
+        assert env.table_stack.first().col_names() == ["K", "A", "B", "C"]
+        assert env.table_stack.first().nth_row(1) == [3, 4, 6, 12]
+
+    def test_prefetch_traced(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "a.csv", "K,A\n1,2\n3,4\n")
+        write_file(d + "b.csv", "K,B\n1,5\n3,6\n")
+        write_file(d + "c.csv", "K,C\n1,7\n3,8\n")
+        write_file(d + "c.t", "from(c.csv)\nderive(D, C * 2)\n")
+        write_file(
+            d + "main.t", "from(a.csv)\nfrom(b.csv)\nfrom(c.t)\njoin()\njoin()\n"
+        )
+        main: list[str] = ["from_(a.csv)", "from_(b.csv)", "from_(c.t)", "join()"]
+
+        # Commands that ran ahead are traced & memoized like any others
+        traced: list[list[tuple]] = list()
+        for jobs in [1, 2]:
+            clear_memo()
+            env: Program = Program(src=d, data=d, repl=False, silent=True)
+            env.jobs = jobs
+            env.tracer = Tracer()
+            exit: bool
+            exit, _ = run_mode("main.t", env)
+            assert not exit
+
+            traced.append(
+                [
+                    (
+                        e["name"],
+                        e["args"]["command"],
+                        e["args"]["rows_out"],
+                        e["args"]["cols_out"],
+                    )
+                    for e in env.tracer.events
+                    if e["cat"] == "command" and e["args"]["command"] in main
+                ]
+            )
+            assert env.memo.lookup(memo_key(d + "c.t", {}, env)) is not None
+
+        assert traced[0] == traced[1]
+        assert len(traced[0]) == 5
+
+    def test_not_independent(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "a.csv", "K,A\n1,2\n3,4\n")
+        write_file(d + "show.t", "from(a.csv)\nshow()\n")
+        write_file(d + "write.t", "from(a.csv)\nwrite(out.csv)\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        env.jobs = 2
+
+        # Scripts that display or write things run in order
+        assert not ispure_script("show.t", {}, d)
+        assert not ispure_script("write.t", {}, d)
+        prefetcher: Prefetcher = Prefetcher(["from_(show.t)", "from_(a.csv)"], env)
+        assert prefetcher.futures == dict()
+
+        # Nor does anything after a 'write'
+        prefetcher = Prefetcher(
+            ["from_(a.csv)", "write(b.csv)", "from_(a.csv)", "from_(b.csv)"], env
+        )
+        assert prefetcher.futures == dict()
+
+        # Or after a script that might write the files read later, or a session
+        for barrier in ["from_(write.t)", "save_session(s.pkl)"]:
+            prefetcher = Prefetcher(
+                ["from_(a.csv)", barrier, "from_(a.csv)", "from_(out.csv)"], env
+            )
+            assert prefetcher.futures == dict()
+
+    def test_run_ahead(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "a.csv", "K,A\n1,2\n3,4\n")
+        write_file(d + "dup.t", "duplicate()\n")
+
+        result: Any = run_ahead(
+            "from_(a.csv)", user=None, src=d, data=d, cache=None, lazy=False
+        )
+        assert result is not None
+        tables, paths, patterns = result
+        assert len(tables) == 1 and tables[0].n_rows == 2
+        assert paths == [os.path.abspath(d + "a.csv")]
+        assert patterns == []
+
+        # Scripts that use tables already on the stack can't run ahead
+        result = run_ahead(
+            "from_(dup.t)", user=None, src=d, data=d, cache=None, lazy=False
+        )
+        assert result is None
+
+
+### END ###
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+TEST SERVE
+"""
+
+import sys
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from T.serve import *
+
+
+def request(path: str, message: dict) -> list[dict]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps(message) + "\n").encode())
+
+        with sock.makefile("r") as responses:
+            return [json.loads(line) for line in responses]
+
+
+class TestServe:
+    def test_server(self, tmp_path, monkeypatch) -> None:
+        path: str = str(tmp_path / "t.sock")
+        stdout: ThreadStdout = ThreadStdout(sys.stdout)
+        monkeypatch.setattr(sys, "stdout", stdout)
+
+        with Server(path, Handler) as server:
+            server.settings = dict(
+                user="user/alec.py",
+                src="test/lang",
+                data="test/files",
+                output=str(tmp_path) + "/",
+                cache=None,
+            )
+            server.stdout = stdout
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            # Concurrent requests, with separate stacks
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [
+                    pool.submit(request, path, {"file": name})
+                    for name in ["groupby.t", "derive.t"]
+                ]
+                results: list[list[dict]] = [future.result() for future in futures]
+
+            for responses in results:
+                assert responses[-1]["done"] and responses[-1]["ok"]
+
+            groupby: list[str] = [r["out"] for r in results[0] if "out" in r]
+            assert groupby[0].startswith("county_fips,Total_sum")
+
+            # Bad requests
+            responses = request(path, {"file": "missing.t"})
+            assert responses[-1]["done"] and not responses[-1]["ok"]
+
+            server.shutdown()
+
+
+### END ###
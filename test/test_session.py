@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""
+TEST SESSION
+"""
+
+import os
+
+import T.session
+from T.session import *
+from T.lang import interpret, run_mode
+from T.program import Program, Namespace
+
+
+def write_file(path: str, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestSession:
+    def test_save_load(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+
+        env: Program = Program(data=d, output=d, repl=False, silent=True)
+        env.call_stack.push(Namespace({"x": "1"}))
+        for command in ["from_(data.csv)", "duplicate()", "derive(C, A + B)"]:
+            assert interpret(command, env) != "_error_"
+        assert interpret("save_session(test.session)", env) == "save_session"
+        assert os.path.exists(d + "test.session")
+
+        other: Program = Program(data=d, output=d, repl=False, silent=True)
+        assert interpret("load_session(test.session)", other) == "load_session"
+
+        assert other.table_stack.len() == 2
+        top: Any = other.table_stack.first()
+        assert top.col_names() == ["A", "B", "C"]
+        assert top.nth_row(1) == [3, 4, 7]
+        assert other.table_stack.second().col_names() == ["A", "B"]
+        assert other.cols == ["A", "B", "C"] and other.n_rows == 2
+        assert top.stats is not None
+
+        # At the top level, the script args are restored too
+        assert other.call_stack.len() == 2
+        assert other.call_stack.first().bind("x") == "1"
+
+    def test_not_a_session(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "bad.session", "A,B\n1,2\n")
+
+        env: Program = Program(output=d, repl=False, silent=True)
+        interpret("load_session(bad.session)", env)
+        assert env.table_stack.isempty()
+
+    def test_checkpoint(self, tmp_path, monkeypatch, capsys) -> None:
+        monkeypatch.setattr(T.session, "CHECKPOINT_SECONDS", 0.0)
+
+        d: str = os.path.join(str(tmp_path), "")
+        checkpoint: str = d + "script.checkpoint"
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A + B)\nkeep(D)\n")
+
+        # The script fails at its last command
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        exit, _ = run_mode("script.t", env, checkpoint)
+        assert exit
+        assert os.path.exists(checkpoint)
+
+        # Fixed, it resumes after the commands that were done
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A + B)\nkeep(C)\n")
+        capsys.readouterr()
+
+        env = Program(src=d, data=d, repl=False, silent=True)
+        exit, last_verb = run_mode("script.t", env, checkpoint)
+        assert "Resuming after command 2" in capsys.readouterr().out
+        assert not exit and last_verb == "keep"
+        assert env.table_stack.len() == 1
+        assert env.table_stack.first().col_names() == ["C"]
+        assert not os.path.exists(checkpoint)  # It finished
+
+    def test_checkpoint_incremental(self, tmp_path, monkeypatch) -> None:
+        monkeypatch.setattr(T.session, "CHECKPOINT_SECONDS", 0.0)
+        monkeypatch.setattr(T.session, "CHECKPOINT_RATIO", 0.0)
+        pickled: list[Any] = list()
+        dump: Any = T.session.dump
+        monkeypatch.setattr(
+            T.session, "dump", lambda obj, path: pickled.append(obj) or dump(obj, path)
+        )
+
+        d: str = os.path.join(str(tmp_path), "")
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        commands: list[str] = ["from_(data.csv)", "duplicate()", "derive(C, A + B)"]
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        saver: Checkpoint = Checkpoint(
+            d + "script.checkpoint", d + "script.t", commands, env
+        )
+        for i, command in enumerate(commands):
+            assert interpret(command, env) != "_error_"
+            saver.mark(env, i + 1)
+
+        # Each table is pickled once, when it's new, plus the list of them each time
+        tables: list[Any] = [t for t in pickled if not isinstance(t, dict)]
+        assert len(tables) == len(set(map(id, tables))) == 3
+        assert len(pickled) == len(commands) + 3
+        assert len(os.listdir(d + "script.checkpoint.tables")) == 2
+
+        other: Program = Program(src=d, data=d, repl=False, silent=True)
+        resumed: Checkpoint = Checkpoint(
+            d + "script.checkpoint", d + "script.t", commands, other
+        )
+        assert resumed.resume(other) == 3
+        assert other.table_stack.len() == 2
+        assert other.table_stack.first().col_names() == ["A", "B", "C"]
+
+        resumed.remove()
+        assert not os.path.exists(d + "script.checkpoint.tables")
+
+    def test_checkpoint_changed(self, tmp_path, monkeypatch) -> None:
+        monkeypatch.setattr(T.session, "CHECKPOINT_SECONDS", 0.0)
+
+        d: str = os.path.join(str(tmp_path), "")
+        checkpoint: str = d + "script.checkpoint"
+        write_file(d + "data.csv", "A,B\n1,2\n3,4\n")
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A + B)\nkeep(D)\n")
+
+        env: Program = Program(src=d, data=d, repl=False, silent=True)
+        run_mode("script.t", env, checkpoint)
+        assert os.path.exists(checkpoint)
+
+        # The commands that were done changed, so it starts over
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A * B)\nkeep(C)\n")
+
+        env = Program(src=d, data=d, repl=False, silent=True)
+        exit, _ = run_mode("script.t", env, checkpoint)
+        assert not exit
+        assert env.table_stack.first().nth_row(1) == [12]
+
+        # The file the commands read changed, so it starts over
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A * B)\nkeep(D)\n")
+        run_mode(
+            "script.t", Program(src=d, data=d, repl=False, silent=True), checkpoint
+        )
+        assert os.path.exists(checkpoint)
+        write_file(d + "data.csv", "A,B\n1,2\n3,40\n")
+        write_file(d + "script.t", "from(data.csv)\nderive(C, A * B)\nkeep(C)\n")
+
+        env = Program(src=d, data=d, repl=False, silent=True)
+        exit, _ = run_mode("script.t", env, checkpoint)
+        assert not exit
+        assert env.table_stack.first().nth_row(1) == [120]
+
+
+### END ###
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+TEST SPILL
+"""
+
+import copy
+
+import pandas as pd
+
+from T.spill import *
+from T.datamodel import Table
+from T.program import Program
+
+
+def sample_table(n: int = 100) -> Table:
+    table: Table = Table()
+    table.test(
+        {
+            "GEOID": [f"37{i:09d}" for i in range(n)],
+            "Total": list(range(n)),
+            "Share": [i / n for i in range(n)],
+            "Flag": [i % 2 == 0 for i in range(n)],
+            "Date": pd.date_range("2020-01-01", periods=n),
+        }
+    )
+    table._data["GEOID"] = table._data["GEOID"].astype("string")
+    table._extract_col_defs()
+    table.command = "test()"
+
+    return table
+
+
+class TestSpill:
+    def test_spill_reload(self, tmp_path) -> None:
+        table: Table = sample_table()
+        before: pd.DataFrame = table._data.copy()
+        n_bytes: int = table.n_bytes()
+
+        stats: SpillStats = SpillStats()
+        table.spill(str(tmp_path), n_bytes, stats)
+
+        assert table.isspilled()
+        assert table.n_bytes() == 0
+        assert (table.n_rows, table.n_cols) == (100, 5)
+        assert table.isspilled()  # Shape doesn't reload it
+
+        # A copy has the data, & the original stays spilled
+        copied: Table = copy.deepcopy(table)
+        assert not copied.isspilled()
+        pd.testing.assert_frame_equal(copied._data, before)
+        assert table.isspilled()
+
+        # Using the data reloads it, transparently
+        pd.testing.assert_frame_equal(table._data, before)
+        assert not table.isspilled()
+        assert (stats.spills, stats.reloads) == (1, 2)  # Copying reads it too
+        assert stats.bytes_spilled == n_bytes
+
+    def test_budget(self) -> None:
+        env: Program = Program(repl=False, silent=True)
+        env.spiller = StackSpiller(budget=2 * sample_table().n_bytes())
+
+        tables: list[Table] = [sample_table() for _ in range(4)]
+        for i, table in enumerate(tables):
+            env.command = f"table {i}"
+            env._update_stack(table, pop=0)
+
+        # The lowest tables are spilled, never the top one
+        assert [t.isspilled() for t in env.table_stack.top_n(4)] == [
+            False,
+            False,
+            True,
+            True,
+        ]
+
+        # Rotating the bottom table to the top reloads it
+        env.rotate()
+        top: Table = env.table_stack.first()
+        assert top.command == "table 0"
+        assert not top.isspilled()
+        assert env.n_rows == 100
+        assert env.spiller.stats.reloads == 1
+
+        # ... & spills another to stay within the budget
+        assert sum(not t.isspilled() for t in env.table_stack.top_n(4)) == 2
+
+    def test_parse_bytes(self) -> None:
+        assert parse_bytes("512") == 512
+        assert parse_bytes("2KB") == 2048
+        assert parse_bytes("1.5 GB") == int(1.5 * 1024**3)
+        assert parse_bytes("10mb") == 10 * 1024**2
+
+
+### END ###
@@ -43,6 +43,12 @@ class TestStacks:
         assert s.first() == "bas"
         assert list(s._queue_) == ["bas", "bar", "foo"]
 
+    def test_top_n(self) -> None:
+        s: Stack = sample_stack()
+
+        assert s.top_n(2) == ["bas", "bar"]
+        assert list(s._queue_) == ["bas", "bar", "foo"]
+
     def test_replace_top(self) -> None:
         s: Stack = sample_stack()
 
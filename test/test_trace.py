@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+TEST TRACE
+"""
+
+import os
+import json
+
+from T.program import Tables
+from T.lang import interpret, run_mode
+from T.trace import *
+
+
+class TestTrace:
+    def test_trace(self, tmp_path) -> None:
+        rel_path: str = str(tmp_path / "trace.json")
+
+        with Tables(src="test/lang", data="test/files", repl=False) as T:
+            T.tracer = Tracer()
+            run_mode("groupby.t", T)
+            T.tracer.write(rel_path)
+            shallow: int = T.table_stack.first().n_bytes(deep=False)
+
+        with open(rel_path, "r") as f:
+            trace: dict = json.load(f)
+
+        commands: list[dict] = [
+            e for e in trace["traceEvents"] if e["cat"] == "command"
+        ]
+        assert [e["name"] for e in commands] == [
+            "from",
+            "derive",
+            "keep",
+            "rename",
+            "groupby",
+        ]
+
+        groupby: dict = commands[-1]["args"]
+        assert groupby["command"] == "groupby(by=[county_fips])"
+        assert groupby["cols_in"] == 3
+        assert groupby["rows_out"] < groupby["rows_in"]
+        assert groupby["bytes_in"] > 0
+        assert groupby["bytes_out"] == shallow  # Not scanning strings
+        assert groupby["op_ms"] > 0 and groupby["stats_ms"] > 0
+
+        # The phases add up to the command's time
+        total_ms: float = sum(groupby[f"{p}_ms"] for p in PHASES)
+        assert abs(total_ms - commands[-1]["dur"] / 1000) < 0.1
+
+        # Phases nest within their commands
+        phases: list[dict] = [e for e in trace["traceEvents"] if e["cat"] == "phase"]
+        assert all(e["name"] in PHASES for e in phases)
+
+        summary: str = report(rel_path)
+        assert summary.split("\n")[0].split()[:3] == ["VERB", "COUNT", "TOTAL"]
+        assert "groupby" in summary
+
+    def test_nested_script(self, tmp_path) -> None:
+        d: str = os.path.join(str(tmp_path), "")
+        with open(d + "b.csv", "w") as f:
+            f.write("K,B\n1,5\n3,6\n")
+        with open(d + "b.t", "w") as f:
+            f.write("from(b.csv)\nderive(C, B * 2)\n")
+        with open(d + "main.t", "w") as f:
+            f.write("from(b.t)\n")
+
+        with Tables(src=d, data=d, repl=False) as T:
+            T.tracer = Tracer()
+            run_mode("main.t", T)
+
+        commands: list[dict] = [e for e in T.tracer.events if e["cat"] == "command"]
+        outer: dict = commands[-1]
+
+        assert outer["name"] == "from"
+        assert outer["args"]["nested_ms"] > 0
+        assert outer["args"]["validate_ms"] < outer["args"]["nested_ms"]
+
+    def test_phases(self, tmp_path, capsys) -> None:
+        with Tables(src="test/lang", data="test/files", repl=True) as T:
+            T.tracer = Tracer()
+            interpret("from_(precincts_with_counties.csv)", T)
+            T.tracer.events.clear()
+            interpret("derive(Twice, Total * 2)", T)
+
+        # Making the verb is timed as validating it, & applying it as the op.
+        # Showing the result in the REPL doesn't add another op.
+        phases: list[str] = [e["name"] for e in T.tracer.events if e["cat"] == "phase"]
+        assert phases == ["parse", "validate", "op", "stats", "display"]
+
+
+### END ###
@@ -4,7 +4,10 @@
 TEST VERBS
 """
 
+import pandas as pd
+
 from T.verbs import *
+from T.datamodel import table_to_csv
 from T.constants import *
 
 
@@ -666,6 +669,173 @@ class TestTableVerbs:
         except:
             assert True
 
+    def test_distinct_verb(self) -> None:
+        data: dict[str, list] = {
+            "ID": ["a", "b", "c", "d", "e"],
+            "County": ["X", "Y", "X", "Y", "X"],
+            "Total": [10, 20, 10, 40, 30],
+        }
+        x_table: Table = Table()
+        x_table.test(data)
+        x_table.get_column("County").alias = "County Name"
+
+        f: DistinctVerb = DistinctVerb(x_table, on=["County"])
+        new_table: Table = f.apply()
+        assert list(new_table._data["ID"]) == ["a", "b"]
+        assert new_table.get_column("County").alias == "County Name"
+
+        f = DistinctVerb(x_table, on=["County", "Total"], keep="last")
+        new_table = f.apply()
+        assert list(new_table._data["ID"]) == ["b", "c", "d", "e"]
+
+        # All columns
+        f = DistinctVerb(x_table)
+        new_table = f.apply()
+        assert new_table.n_rows == 5
+
+        # Invalid column
+        try:
+            f = DistinctVerb(x_table, on=["Nonesuch"])
+            assert False
+        except:
+            assert True
+
+    def test_top_verb(self) -> None:
+        sample: str = "precincts_with_counties.csv"
+        x_table: Table = Table()
+        x_table.read("test/files/" + sample)
+
+        specs: list = [("District", "ASC"), ("Total", "DESC")]
+
+        # Same rows as a sort followed by first
+        for n in [0, 1, 10, 100, x_table.n_rows + 1]:
+            s: SortVerb = SortVerb(x_table, specs)
+            sorted: Table = s.apply()
+            f: FirstVerb = FirstVerb(sorted, n)
+            expected: Table = f.apply()
+
+            t: TopVerb = TopVerb(x_table, n, specs)
+            actual: Table = t.apply()
+
+            assert list(actual._data["GEOID"]) == list(expected._data["GEOID"])
+
+        # Ties on the first sort column keep their original order
+        data: dict[str, list] = {
+            "ID": ["a", "b", "c", "d", "e"],
+            "Total": [10, 30, 20, 30, 30],
+        }
+        x_table = Table()
+        x_table.test(data)
+
+        t = TopVerb(x_table, 2, [("Total", "DESC")])
+        actual = t.apply()
+        assert list(actual._data["ID"]) == ["b", "d"]
+
+        # Within groups
+        x_table = Table()
+        x_table.read("test/files/" + sample)
+
+        t = TopVerb(x_table, 2, [("Total", "DESC")], within=["District"])
+        actual = t.apply()
+
+        for district, group in actual._data.groupby("District"):
+            rows = x_table._data[x_table._data["District"] == district]
+            expected_ids: list = list(
+                rows.sort_values("Total", ascending=False, kind="stable")["GEOID"][:2]
+            )
+            assert list(group["GEOID"]) == expected_ids
+
+        # Invalid column
+        try:
+            t = TopVerb(x_table, 2, [("Nonesuch", "DESC")])
+            assert False
+        except:
+            assert True
+
+    def test_groupby_verb_outputs(self) -> None:
+        sample: str = "precincts_with_counties.csv"
+        x_table: Table = Table()
+        x_table.read("test/files/" + sample)
+
+        full: GroupByVerb = GroupByVerb(x_table, ["District"])
+        full.apply()
+
+        # Only compute the outputs used later
+        used: set[str] = {"District", "Total_sum", "Total_max", "White_mean"}
+        f: GroupByVerb = GroupByVerb(x_table, ["District"], outputs=used)
+        f.apply()
+
+        assert f._new_table.col_names() == [
+            "District",
+            "Total_sum",
+            "Total_max",
+            "White_mean",
+        ]
+        for name in f._new_table.col_names():
+            assert f._new_table._data[name].equals(full._new_table._data[name])
+
+        # Nothing used -- compute everything
+        f = GroupByVerb(x_table, ["District"], outputs={"District"})
+        f.apply()
+
+        assert f._new_table.col_names() == full._new_table.col_names()
+
+    def test_tally_verb(self) -> None:
+        data: dict[str, list] = {
+            "ID": ["a", "b", "c", "d", "e"],
+            "Plan_1": [1, 1, 2, 2, 2],
+            "Plan_2": [2, 1, 1, 1, None],
+            "Total": [10, 20, 30, 40, 50],
+            "Share": [0.5, 0.25, 0.5, 0.25, 1.0],
+        }
+        x_table: Table = Table()
+        x_table.test(data)
+
+        f: TallyVerb = TallyVerb(x_table, ["Plan_1", "Plan_2"])
+        new_table: Table = f.apply()
+
+        assert new_table.col_names() == ["Plan", "District", "Total_sum", "Share_sum"]
+        assert list(new_table._data["Plan"]) == ["Plan_1", "Plan_1", "Plan_2", "Plan_2"]
+        assert list(new_table._data["District"]) == [1.0, 2.0, 1.0, 2.0]
+        assert list(new_table._data["Total_sum"]) == [30, 120, 90, 10]
+        assert list(new_table._data["Share_sum"]) == [0.75, 1.75, 1.0, 0.5]
+        assert new_table.get_column("Total_sum").type == "int64"
+
+        # Integer sums past 2**53 are exact
+        big: int = 2**60 + 1
+        x_table = Table()
+        x_table.test({"Plan_1": [1, 1, 2], "Total": [big, 2, big]})
+        new_table = TallyVerb(x_table, ["Plan_1"]).apply()
+        assert list(new_table._data["Total_sum"]) == [big + 2, big]
+
+        # Same sums as grouping by each plan, one at a time
+        x_table = Table()
+        x_table.read("test/files/precincts_with_counties.csv")
+
+        f = TallyVerb(x_table, ["District"], only=["Total", "D_votes"])
+        new_table = f.apply()
+
+        g: GroupByVerb = GroupByVerb(
+            x_table, ["District"], only=["Total", "D_votes"], agg=["sum"]
+        )
+        grouped: Table = g.apply()
+
+        assert list(new_table._data["District"]) == list(grouped._data["District"])
+        assert list(new_table._data["Total_sum"]) == list(grouped._data["Total_sum"])
+        assert all(
+            abs(a - b) < 1e-6
+            for a, b in zip(
+                new_table._data["D_votes_sum"], grouped._data["D_votes_sum"]
+            )
+        )
+
+        # Names clash
+        try:
+            f = TallyVerb(x_table, ["District"], names=("Plan", "Total_sum"))
+            assert False
+        except:
+            assert True
+
     def test_union_verb(self) -> None:
         # Matched tables
         y_table: Table = Table()
@@ -710,5 +880,220 @@ class TestTableVerbs:
         except:
             assert False
 
+    def test_union_verb_n(self) -> None:
+        tables: list[Table] = list()
+        for i in range(3):
+            table: Table = Table()
+            table.test({"ID": [f"{i}a", f"{i}b"], "Total": [i, i]})
+            tables.append(table)
+        tables[0].get_column("Total").alias = "Total Population"
+
+        # Stack order, from the bottom up
+        f: UnionVerb = UnionVerb(*tables)
+        new_table: Table = f.apply()
+
+        assert list(new_table._data["ID"]) == ["2a", "2b", "1a", "1b", "0a", "0b"]
+        assert new_table.get_column("Total").alias == "Total Population"
+
+        # One mismatched table
+        odd: Table = Table()
+        odd.test(PRODUCTS_DF)
+
+        try:
+            f = UnionVerb(tables[0], tables[1], odd)
+            assert False
+        except:
+            assert True
+
+    def test_category_columns(self) -> None:
+        path: str = "test/files/precincts_with_counties.csv"
+        plain: Table = Table()
+        plain.read(path)
+        encoded: Table = Table()
+        encoded.read(path, categorize=True)
+
+        assert encoded.get_column("COUNTY").type == "category"
+        assert encoded.value_type("COUNTY") == plain.value_type("COUNTY") == "string"
+
+        # Just the groups that occur
+        f: GroupByVerb = GroupByVerb(
+            encoded, ["District", "COUNTY"], only=["Total"], agg=["mean"]
+        )
+        assert f.apply().n_rows == 101
+
+        # Join with a string key
+        names: Table = Table()
+        names.test(
+            {
+                "COUNTY": pd.array(["001", "003"], dtype="string"),
+                "Name": ["Alamance", "Alexander"],
+            }
+        )
+        joined: Table = JoinVerb(names, encoded, how="inner").apply()
+        assert joined.n_rows == (plain._data["COUNTY"].isin(["001", "003"])).sum()
+        assert joined.get_column("COUNTY").type == "category"
+
+        # Union with a string column
+        union: Table = UnionVerb(encoded, plain).apply()
+        assert union.n_rows == 2 * plain.n_rows
+        assert union._data["COUNTY"].dtype.name == "category"
+
+        # Sort alphabetically
+        f: SortVerb = SortVerb(encoded, [("COUNTY", "DESC")])
+        assert f.apply()._data["COUNTY"].iloc[0] == plain._data["COUNTY"].max()
+
+        # Derive from the values, as if the column weren't encoded
+        for table in [plain, encoded]:
+            derived: Table = DeriveVerb(table, "Name", 'COUNTY + "x"').apply()
+            assert derived.get_column("Name").type == "string"
+            assert list(derived._data["Name"]) == [
+                c + "x" for c in plain._data["COUNTY"]
+            ]
+        assert derived.get_column("COUNTY").type == "category"
+
+    def test_compact_columns(self) -> None:
+        path: str = "test/files/precincts_with_counties.csv"
+        plain: Table = Table()
+        plain.read(path)
+        compact: Table = CastVerb(plain, ["Total", "White"], "compact").apply()
+
+        assert compact.get_column("Total").type == "uint16"
+        assert compact.value_type("Total") == "int64"
+
+        # Arithmetic is done in 64 bits, so differences can be negative
+        derived: Table = DeriveVerb(compact, "Diff", "White - Total").apply()
+        assert derived.get_column("Diff").type == "int64"
+        assert (derived._data["Diff"] <= 0).all()
+        assert derived.get_column("Total").type == "uint16"
+
+        selected: Table = SelectVerb(compact, "White - Total < -1000").apply()
+        expected: int = (plain._data["White"] - plain._data["Total"] < -1000).sum()
+        assert selected.n_rows == expected
+
+        # Unions & joins match the 64-bit types
+        union: Table = UnionVerb(compact, plain).apply()
+        assert union.get_column("Total").type == "int64"
+
+        keys: Table = Table()
+        keys.test({"Total": [int(plain._data["Total"].iloc[0])]})
+        joined: Table = JoinVerb(keys, compact, how="inner", on=["Total"]).apply()
+        assert joined.n_rows >= 1
+
+        # Groups are aggregated in 64 bits, so they match the uncompacted ones
+        w: list[float] = [2.0**24, 1.0, 1.0, 1.0, 1.0, 0.5, 0.25]
+        floats: Table = Table()
+        floats.test({"G": [1] * len(w), "W": w})
+        compacted: Table = CastVerb(floats, ["W"], "compact").apply()
+        assert compacted.get_column("W").type == "float32"
+        for table in [floats, compacted]:
+            grouped: Table = GroupByVerb(table, ["G"], agg=["mean", "sum"]).apply()
+            assert grouped.get_column("W_mean").type == "float64"
+            assert grouped._data["W_mean"].iloc[0] == sum(w) / len(w)
+            assert grouped._data["W_sum"].iloc[0] == sum(w)
+
+    def test_key_columns(self, capsys) -> None:
+        plain: Table = Table()
+        plain.test(
+            {
+                "GEOID": pd.Series(
+                    ["37001000001", "37003000002", "37003000003", "37005000004"],
+                    dtype="string",
+                ),
+                "Total": [1, 2, 3, 4],
+            }
+        )
+        keyed: Table = CastVerb(plain, ["GEOID"], "key").apply()
+        assert keyed.get_column("GEOID").type == "key"
+        assert keyed.get_column("GEOID").width == 11
+        assert keyed.value_type("GEOID") == "string"
+        assert keyed._data["GEOID"].dtype.name == "int64"
+
+        # Selecting compares the key to the integer a literal encodes
+        selected: Table = SelectVerb(keyed, "GEOID == '37003000002'").apply()
+        assert selected.first_n_rows(1) == [["37003000002", 2]]
+        assert SelectVerb(keyed, "GEOID == '3700300000'").apply().n_rows == 0
+        assert SelectVerb(keyed, "GEOID > '37003000002'").apply().n_rows == 2
+
+        # Slicing a key is a key
+        derived: Table = DeriveVerb(keyed, "County", "GEOID[2:5]").apply()
+        assert derived.get_column("County").type == "key"
+        assert derived.get_column("County").width == 3
+        assert list(derived._data["County"]) == [1, 3, 3, 5]
+
+        grouped: Table = GroupByVerb(
+            derived, ["County"], only=["Total"], agg=["sum"]
+        ).apply()
+        assert grouped.first_n_rows(3) == [["001", 1], ["003", 5], ["005", 4]]
+
+        # Strings that are keys of the same width are encoded to join them
+        names: Table = Table()
+        names.test(
+            {
+                "County": pd.Series(["001", "003"], dtype="string"),
+                "Name": ["Alamance", "Alexander"],
+            }
+        )
+        joined: Table = JoinVerb(derived, names, how="left", on=["County"]).apply()
+        assert joined.get_column("County").type == "key"
+        assert list(joined._data["Name"].fillna("")) == [
+            "Alamance",
+            "Alexander",
+            "Alexander",
+            "",
+        ]
+
+        # Unions with strings decode the keys
+        union: Table = UnionVerb(keyed, plain).apply()
+        assert union.get_column("GEOID").type == "string"
+        assert union.n_rows == 8
+
+        # Keys are written as the strings they encode
+        table_to_csv(derived, None)
+        written: str = capsys.readouterr().out
+        assert written.splitlines()[1] == "37001000001,1,001"
+
+        back: Table = CastVerb(derived, ["County"], "string").apply()
+        assert list(back._data["County"]) == ["001", "003", "003", "005"]
+
+    def test_sparse_columns(self) -> None:
+        path: str = "test/files/precincts_with_counties.csv"
+        table: Table = Table()
+        table.read(path)
+        # Mostly zeroes
+        plain: Table = DeriveVerb(table, "Rare", "Pacific * (Pacific > 20)").apply()
+        sparse: Table = CastVerb(plain, ["Rare"], "sparse").apply()
+
+        # The type is the type of the values, however they're stored
+        assert sparse.get_column("Rare").type == "int64"
+        assert isinstance(sparse._data["Rare"].dtype, pd.SparseDtype)
+        assert sparse.n_bytes() < plain.n_bytes()
+
+        plain._calc_stats()
+        sparse._calc_stats()
+        assert sparse.stats == plain.stats
+
+        selected: Table = SelectVerb(sparse, "Rare - Native > 0").apply()
+        expected: int = (plain._data["Rare"] - plain._data["Native"] > 0).sum()
+        assert selected.n_rows == expected
+
+        derived: Table = DeriveVerb(sparse, "Other", "Rare + Native").apply()
+        assert derived.get_column("Other").type == "int64"
+        assert not isinstance(derived._data["Other"].dtype, pd.SparseDtype)
+
+        by: list[str] = ["District"]
+        aggs: list[str] = ["sum", "mean", "std", "median", "count"]
+        grouped: Table = GroupByVerb(sparse, by, only=["Rare"], agg=aggs).apply()
+        expected_df: Table = GroupByVerb(plain, by, only=["Rare"], agg=aggs).apply()
+        assert grouped.first_n_rows(13) == expected_df.first_n_rows(13)
+        assert grouped.col_types() == expected_df.col_types()
+
+        union: Table = UnionVerb(sparse, plain).apply()
+        assert union.get_column("Rare").type == "int64"
+        assert union.n_rows == 2 * plain.n_rows
+
+        dense: Table = CastVerb(sparse, ["Rare"], "int64").apply()
+        assert dense._data["Rare"].dtype.name == "int64"
+        assert sparse.first_n_rows(5) == plain.first_n_rows(5)
+
 
 ### END ###